@@ -0,0 +1,107 @@
+"""Benchmarks the binary format against the JSON written in db.json.
+
+For each tournament size, the benchmark first checks the round trip:
+a tournament written in the binary format then read back serializes
+exactly like the original, and writing it again gives the same bytes.
+It then compares the size of the tournament and its players, and the
+time to write and read them, in three formats:
+
+    pretty JSON: as TinyDB writes them in db.json, indented.
+    compact JSON: the same documents without whitespace.
+    binary: the format of c_21_binary_format.py.
+
+Run from anywhere: python project/benchmarks/bench_binary.py
+"""
+
+import json
+import time
+from typing import Any, Callable, Dict
+
+import synthetic
+from c_17_storage import deserialize_player, deserialize_tournament
+from c_21_binary_format import dump_tournament, load_tournament_binary
+from models import Tournament
+
+SIZES = [(16, 4), (128, 7), (1024, 9), (4096, 11)]
+REPEATS = 3
+
+
+def database_documents(tournament: Tournament) -> Dict[str, Any]:
+    """Returns the tables db.json holds for the tournament."""
+    return {
+        tournament.name: {"1": tournament.serialize_tournament()},
+        f"players_competing_in_{tournament.name}": {
+            str(i + 1): player.serialize_player()
+            for i, player in enumerate(tournament.players_instances)},
+    }
+
+
+def load_documents(text: str):
+    """Deserializes the tables of db.json, as the requests do."""
+    documents = json.loads(text)
+    for table_name, table in documents.items():
+        for document in table.values():
+            if table_name.startswith("players_competing_in_"):
+                deserialize_player(document)
+            else:
+                # the matches are only deserialized when read.
+                tournament = deserialize_tournament(table_name, document)
+                for round in tournament.rounds.values():
+                    list(round.matches.values())
+
+
+def check_round_trip(tournament: Tournament):
+    data = dump_tournament(tournament)
+    loaded = load_tournament_binary(data)
+
+    assert loaded.serialize_tournament() == tournament.serialize_tournament()
+    assert ([player.serialize_player() for player in loaded.players_instances]
+            == [player.serialize_player()
+                for player in tournament.players_instances])
+    for loaded_round in loaded.rounds.values():
+        for match in (loaded_round.matches or {}).values():
+            assert match.player1 in loaded.players_instances
+            assert match.round is loaded_round
+    assert dump_tournament(loaded) == data
+
+
+def best_time(function: Callable[[], Any]) -> float:
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    print(f"{'players':>8} {'format':>13} {'size':>11} "
+          f"{'write':>10} {'read':>10}")
+    for players_number, number_of_rounds in SIZES:
+        tournament = synthetic.make_played_tournament(players_number,
+                                                      number_of_rounds)
+        check_round_trip(tournament)
+
+        formats = {
+            "pretty JSON": (
+                lambda: json.dumps(database_documents(tournament), indent=4,
+                                   separators=(',', ': ')),
+                load_documents),
+            "compact JSON": (
+                lambda: json.dumps(database_documents(tournament),
+                                   separators=(',', ':')),
+                load_documents),
+            "binary": (lambda: dump_tournament(tournament),
+                       load_tournament_binary),
+        }
+        for format_name, (write, read) in formats.items():
+            written = write()
+            write_time = best_time(write)
+            read_time = best_time(lambda: read(written))
+            print(f"{players_number:>8} {format_name:>13} "
+                  f"{len(written) / 1024:>8.1f} KB "
+                  f"{write_time * 1000:>8.1f}ms {read_time * 1000:>8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Benchmarks the announcements of the pairing and the ranking.
+
+The announcements used to give each player a freshly created subclass
+of Player to shorten its representation. The benchmark counts the
+subclasses of Player before and after announcing every round of
+tournaments of growing size: the count must not move.
+
+Run from anywhere: python project/benchmarks/bench_display.py
+"""
+
+import contextlib
+import io
+import time
+
+import synthetic
+from c_1_pairing_first_round import announce_pairing_for_first_round
+from c_2_pairing_subsequent_rounds import (
+    announce_pairing_for_subsequent_round, announce_ranking)
+from models import Player
+
+FIELD_SIZES = [16, 128, 1024, 4096]
+NUMBER_OF_ROUNDS = 5
+
+
+def announce_whole_tournament(players_number: int) -> float:
+    tournament = synthetic.make_tournament(players_number, NUMBER_OF_ROUNDS)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        announce_pairing_for_first_round(tournament)
+        synthetic.play_round(tournament, 1)
+        for round_number in range(2, NUMBER_OF_ROUNDS + 1):
+            announce_pairing_for_subsequent_round(tournament, round_number)
+            synthetic.play_round(tournament, round_number)
+        announce_ranking(tournament)
+    return time.perf_counter() - start
+
+
+def main():
+    print(f"{'players':>8} {'seconds':>9} {'new Player subclasses':>22}")
+    for players_number in FIELD_SIZES:
+        subclasses_before = len(Player.__subclasses__())
+        elapsed = announce_whole_tournament(players_number)
+        new_subclasses = len(Player.__subclasses__()) - subclasses_before
+        print(f"{players_number:>8} {elapsed:>9.4f} {new_subclasses:>22}")
+        assert new_subclasses == 0, "announcements created Player types"
+
+
+if __name__ == "__main__":
+    main()
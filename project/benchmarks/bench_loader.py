@@ -0,0 +1,107 @@
+"""Benchmarks loading a saved tournament with its objects linked.
+
+For tournaments of a few thousand matches, the benchmark compares:
+
+    rounds only: the Tournament the requests return, listing its
+        rounds. Its matches are never read, so never deserialized.
+    deserialize: the same Tournament, all its matches read. It has no
+        players and its matches hold last names (c_17_storage.py).
+    linear search: linking each match to its players by searching them
+        in the list of players, as the program did before the loader.
+    identity map: the loader of c_20_tournament_loader.py.
+
+Only the deserialization is timed: the serialized tournaments are kept
+in memory, so reading the database doesn't blur the comparison.
+
+Run from anywhere: python project/benchmarks/bench_loader.py
+"""
+
+import time
+from typing import Any, Callable, Dict, List
+
+import synthetic
+from c_17_storage import deserialize_tournament
+from c_20_tournament_loader import link_tournament
+from models import Match, Player, Round, Tournament
+
+SIZES = [(256, 8), (1024, 9), (4096, 11)]
+REPEATS = 3
+
+
+def link_by_linear_search(tournament_name: str,
+                          serialized_tournament: Dict[str, Any],
+                          serialized_players: List[Dict[str, Any]]
+                          ) -> Tournament:
+    """Links the matches by searching each player in the players list."""
+    tournament = deserialize_tournament(tournament_name,
+                                        serialized_tournament)
+    players = [Player(**dict(serialized_player,
+                             result_field=float(
+                                 serialized_player["result_field"])))
+               for serialized_player in serialized_players]
+    tournament.players_instances = players
+
+    tournament.rounds = {}
+    for round_name, serialized_round in serialized_tournament[
+            "rounds"].items():
+        round = Round(round_name, tournament)
+        round.matches = {}
+        for match_number, serialized_match in serialized_round[
+                "matches"].items():
+            player1 = next(player for player in players
+                           if player.last_name == serialized_match["player1"])
+            player2 = next(player for player in players
+                           if player.last_name == serialized_match["player2"])
+            round.matches[f"match{match_number}"] = Match(
+                player1, player2, serialized_match["result"], round)
+        tournament.rounds[round_name] = round
+    return tournament
+
+
+def read_rounds(tournament: Tournament) -> List[Round]:
+    return list(tournament.rounds.values())
+
+
+def read_matches(tournament: Tournament) -> List[Match]:
+    return [match for round in tournament.rounds.values()
+            for match in round.matches.values()]
+
+
+def best_time(function: Callable[[], Any]) -> float:
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    print(f"{'players':>8} {'matches':>8} {'rounds only':>12} "
+          f"{'deserialize':>12} "
+          f"{'linear search':>14} {'identity map':>13}")
+    for players_number, number_of_rounds in SIZES:
+        tournament = synthetic.make_played_tournament(players_number,
+                                                      number_of_rounds)
+        serialized_tournament = tournament.serialize_tournament()
+        serialized_players = [player.serialize_player()
+                              for player in tournament.players_instances]
+        matches_number = players_number // 2 * number_of_rounds
+
+        rounds_only = best_time(lambda: read_rounds(deserialize_tournament(
+            tournament.name, serialized_tournament)))
+        deserialize = best_time(lambda: read_matches(deserialize_tournament(
+            tournament.name, serialized_tournament)))
+        linear_search = best_time(lambda: link_by_linear_search(
+            tournament.name, serialized_tournament, serialized_players))
+        identity_map = best_time(lambda: link_tournament(
+            tournament.name, serialized_tournament, serialized_players))
+
+        print(f"{players_number:>8} {matches_number:>8} "
+              f"{rounds_only * 1000:>10.1f}ms "
+              f"{deserialize * 1000:>10.1f}ms {linear_search * 1000:>12.1f}ms "
+              f"{identity_map * 1000:>11.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
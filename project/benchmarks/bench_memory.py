@@ -0,0 +1,108 @@
+"""Benchmarks the memory taken by the players, rounds and matches.
+
+Player, Round and Match declare __slots__. For comparison, the
+benchmark defines Legacy classes laid out like the models were before:
+a plain Player class, and Round and Match dataclasses, the Round
+storing beautified copies of its datetimes. The same players and
+matches are copied into both layouts and the bytes allocated per
+object are measured with tracemalloc.
+
+Run from anywhere: python project/benchmarks/bench_memory.py
+"""
+
+import datetime
+import gc
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, List
+
+import synthetic
+from models import Match, Player, Round
+
+OBJECTS_NUMBER = 20000
+
+
+class LegacyPlayer:
+    def __init__(self, player: Player):
+        self.last_name = player.last_name
+        self.first_name = player.first_name
+        self.date_of_birth = player.date_of_birth
+        self.sex = player.sex
+        self.ranking = player.ranking
+        self.opponents_faced = player.opponents_faced
+        self.result_field = player.result_field
+        self.player_id = player.player_id
+
+
+@dataclass
+class LegacyRound:
+    name_field: str
+    tournament: Any
+    start_datetime: float = 0
+    end_datetime: float = 0
+    matches: Any = None
+    plan: Any = None
+
+    def __post_init__(self):
+        self.start_datetime_beautified = datetime.datetime.fromtimestamp(
+            self.start_datetime).replace(microsecond=0)
+        self.end_datetime_beautified = datetime.datetime.fromtimestamp(
+            self.end_datetime).replace(microsecond=0)
+
+
+@dataclass
+class LegacyMatch:
+    player1: Any
+    player2: Any
+    result: str
+    round: Any
+
+
+def bytes_per_object(build: Callable[[int], Any]) -> float:
+    """Returns the bytes allocated per object built by build(i)."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects: List[Any] = [build(i) for i in range(OBJECTS_NUMBER)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # the list holding the objects is not part of their cost.
+    list_bytes = 8 * len(objects)
+    return (after - before - list_bytes) / OBJECTS_NUMBER
+
+
+def copy_player(player: Player) -> Player:
+    copy = Player.__new__(Player)
+    for attribute in Player.__slots__:
+        setattr(copy, attribute, getattr(player, attribute))
+    return copy
+
+
+def main():
+    players = synthetic.make_players(OBJECTS_NUMBER)
+    tournament = synthetic.make_tournament(16)
+    a_round = tournament.rounds["Round 1"]
+
+    measures = [
+        ("player",
+         lambda i: LegacyPlayer(players[i]),
+         # copying through __init__ would parse the date again.
+         lambda i: copy_player(players[i])),
+        ("round",
+         lambda i: LegacyRound("Round 1", tournament, 1.6e9 + i, 1.6e9 + i),
+         lambda i: Round("Round 1", tournament, 1.6e9 + i, 1.6e9 + i)),
+        ("match",
+         lambda i: LegacyMatch(players[i], players[i - 1], "W", a_round),
+         lambda i: Match(players[i], players[i - 1], "W", a_round)),
+    ]
+
+    print(f"{'object':>8} {'before (B)':>11} {'after (B)':>10} {'saved':>7}")
+    for name, build_legacy, build_slotted in measures:
+        before = bytes_per_object(build_legacy)
+        after = bytes_per_object(build_slotted)
+        print(f"{name:>8} {before:>11.0f} {after:>10.0f} "
+              f"{1 - after / before:>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Benchmarks the optimal and parallel pairings against the greedy one.
+
+For tournaments of growing size, the rounds after the first are each
+paired four times, from the same standings:
+
+    greedy: pair_players_for_subsequent_round from
+        c_2_pairing_subsequent_rounds.py.
+    optimal: pair_players_optimally from c_25_optimal_pairing.py,
+        without time budget.
+    by group: pair_players_in_parallel from c_26_parallel_pairing.py,
+        the score groups paired one after the other in this process.
+    parallel: the same with ParallelPairing, the large score groups
+        paired on a pool of processes, one per core, kept for all the
+        rounds of the tournament.
+
+For each pairing, the benchmark reports the mean time to pair a
+round, and the rematches and the cost of the pairings (see
+pairing_cost) summed over the rounds. The tournament itself goes on
+with the greedy pairing. The speedup of the parallel pairing over the
+pairing by group is then reported with the number of cores: on a
+single core, the groups are paired in this process and there is no
+speedup to expect.
+
+Run from anywhere: python project/benchmarks/bench_pairing.py
+"""
+
+import os
+import time
+
+import synthetic
+from c_2_pairing_subsequent_rounds import (build_have_met,
+                                           pair_players_for_subsequent_round,
+                                           rank_players_for_subsequent_round)
+from c_25_optimal_pairing import pair_players_optimally, pairing_cost
+from c_26_parallel_pairing import ParallelPairing, pair_players_in_parallel
+
+SIZES = [(128, 7), (1024, 9), (2048, 11)]
+NO_TIME_BUDGET = float("inf")
+
+
+def main():
+    print(f"{os.cpu_count() or 1} core(s)")
+    print(f"{'players':>8} {'pairing':>8} {'per round':>10} "
+          f"{'rematches':>10} {'cost':>10}")
+    for players_number, number_of_rounds in SIZES:
+        tournament = synthetic.make_tournament(players_number,
+                                               number_of_rounds)
+        synthetic.play_round(tournament, 1)
+
+        parallel_pairing = ParallelPairing(time_budget=NO_TIME_BUDGET)
+        pairings = {
+            "greedy": pair_players_for_subsequent_round,
+            "optimal": lambda *arguments: pair_players_optimally(
+                *arguments, time_budget=NO_TIME_BUDGET),
+            "by group": lambda *arguments: pair_players_in_parallel(
+                *arguments, time_budget=NO_TIME_BUDGET, processes=1),
+            "parallel": parallel_pairing}
+        totals = {name: [0.0, 0, 0] for name in pairings}
+        for round_number in range(2, number_of_rounds + 1):
+            ranked_players = rank_players_for_subsequent_round(
+                tournament.players_instances, tournament.standings)
+            have_met = build_have_met(ranked_players,
+                                      tournament.opponent_matrix)
+
+            for name, pair_players in pairings.items():
+                start = time.perf_counter()
+                pairs = pair_players(tournament.players_instances,
+                                     tournament.standings,
+                                     tournament.opponent_matrix)
+                totals[name][0] += time.perf_counter() - start
+                totals[name][1] += sum(1 for player1, player2 in pairs
+                                       if have_met(player1, player2))
+                totals[name][2] += pairing_cost(ranked_players, pairs)
+
+            synthetic.play_round(tournament, round_number)
+        parallel_pairing.close()
+
+        for name, (elapsed, rematches, cost) in totals.items():
+            mean_time = elapsed / (number_of_rounds - 1)
+            print(f"{players_number:>8} {name:>8} {mean_time:>9.2f}s "
+                  f"{rematches:>10} {cost:>10}")
+        print(f"{players_number:>8} parallel speedup over by group: "
+              f"x{totals['by group'][0] / totals['parallel'][0]:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Benchmarks rating the whole history of the database.
+
+The benchmark writes archives of growing size in a temporary folder,
+in the layout TinyDB gives db.json. The tournaments draw their players
+from a common pool, so the players meet again from one tournament to
+the next. It then times:
+
+    read: reading the games of all the tournaments, read_rated_rounds
+        from c_24_ratings.py.
+    game by game: rating the games one after the other in plain Python,
+        with the same rating periods as the engine.
+    vectorized: rating the games with the rating engine.
+
+It checks that both ratings give the same ratings.
+
+Run from anywhere: python project/benchmarks/bench_ratings.py
+"""
+
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Dict, List
+
+import synthetic  # noqa: F401
+from c_16_player_index import PLAYER_TABLE_PREFIX
+from c_24_ratings import (INITIAL_RATING, K_DEFAULT, K_MASTER, K_NEW_PLAYER,
+                          MASTER_RATING, NEW_PLAYER_GAMES, RatedRound,
+                          RatingEngine, read_rated_rounds)
+
+# (tournaments, players in the pool)
+SIZES = [(100, 1000), (1000, 5000), (4000, 20000)]
+PLAYERS_NUMBER = 64
+NUMBER_OF_ROUNDS = 7
+DATES_NUMBER = 200
+
+
+def write_archive(path: str, tournaments_number: int, pool_size: int):
+    """Writes random tournaments in a db.json."""
+    rng = random.Random(tournaments_number)
+    database = {}
+    for k in range(tournaments_number):
+        pool_ids = rng.sample(range(pool_size), PLAYERS_NUMBER)
+        database[f"{PLAYER_TABLE_PREFIX}t{k}"] = {
+            str(i + 1): {"last_name": f"Player{pool_id}",
+                         "first_name": "Synthetic",
+                         "date_of_birth": "1990-01-01", "sex": "men",
+                         "ranking": str(i + 1), "opponents_faced": "[]",
+                         "result_field": "0.0", "player_id": str(i)}
+            for i, pool_id in enumerate(pool_ids)}
+
+        rounds = {}
+        for round_number in range(1, NUMBER_OF_ROUNDS + 1):
+            order = list(range(PLAYERS_NUMBER))
+            rng.shuffle(order)
+            rounds[f"Round {round_number}"] = {
+                "start_datetime": "2021-01-01 10:00:00",
+                "end_datetime": "2021-01-01 10:05:00",
+                "matches": {
+                    str(i + 1): {"player1": f"Player{pool_ids[order[2 * i]]}",
+                                 "player2":
+                                     f"Player{pool_ids[order[2 * i + 1]]}",
+                                 "result": rng.choice("WLD"),
+                                 "round": f"Round {round_number}",
+                                 "player1_id": str(order[2 * i]),
+                                 "player2_id": str(order[2 * i + 1])}
+                    for i in range(PLAYERS_NUMBER // 2)}}
+        database[f"t{k}"] = {"1": {
+            "venue": "benchmark hall",
+            "date": f"2021-{1 + k % DATES_NUMBER // 28:02}-"
+                    f"{1 + k % DATES_NUMBER % 28:02}",
+            "players number": str(PLAYERS_NUMBER), "description": "",
+            "time control": "blitz",
+            "number of rounds": str(NUMBER_OF_ROUNDS), "rounds": rounds}}
+
+    with open(path, "w") as database_file:
+        json.dump(database, database_file)
+
+
+def rate_game_by_game(rated_rounds: List[RatedRound]) -> Dict[str, float]:
+    ratings: Dict[str, float] = {}
+    games: Dict[str, int] = {}
+
+    def k_factor(identity: str) -> float:
+        if games.get(identity, 0) < NEW_PLAYER_GAMES:
+            return K_NEW_PLAYER
+        if ratings[identity] >= MASTER_RATING:
+            return K_MASTER
+        return K_DEFAULT
+
+    periods: Dict[tuple, List[RatedRound]] = {}
+    for rated_round in rated_rounds:
+        periods.setdefault((rated_round.date, rated_round.round_position),
+                           []).append(rated_round)
+
+    for key in sorted(periods):
+        changes: Dict[str, float] = {}
+        for rated_round in periods[key]:
+            for player1, player2, score1 in zip(rated_round.players1,
+                                                rated_round.players2,
+                                                rated_round.scores1):
+                rating1 = ratings.setdefault(player1, INITIAL_RATING)
+                rating2 = ratings.setdefault(player2, INITIAL_RATING)
+                expected1 = 1 / (1 + 10 ** ((rating2 - rating1) / 400))
+                changes[player1] = changes.get(player1, 0.0) \
+                    + k_factor(player1) * (score1 - expected1)
+                changes[player2] = changes.get(player2, 0.0) \
+                    + k_factor(player2) * (expected1 - score1)
+        for identity, change in changes.items():
+            ratings[identity] += change
+        for rated_round in periods[key]:
+            for identity in rated_round.players1 + rated_round.players2:
+                games[identity] = games.get(identity, 0) + 1
+    return ratings
+
+
+def main():
+    print(f"{'tournaments':>12} {'games':>8} {'read':>9} "
+          f"{'game by game':>13} {'vectorized':>11}")
+    with tempfile.TemporaryDirectory() as folder:
+        database_path = os.path.join(folder, "db.json")
+        deltas_path = os.path.join(folder, "db.deltas.jsonl")
+        for tournaments_number, pool_size in SIZES:
+            write_archive(database_path, tournaments_number, pool_size)
+
+            start = time.perf_counter()
+            rated_rounds = read_rated_rounds(database_path, deltas_path)
+            read = time.perf_counter() - start
+
+            start = time.perf_counter()
+            expected = rate_game_by_game(rated_rounds)
+            game_by_game = time.perf_counter() - start
+
+            start = time.perf_counter()
+            engine = RatingEngine()
+            engine.rate_rounds(rated_rounds)
+            vectorized = time.perf_counter() - start
+
+            assert all(abs(engine.rating(identity) - rating) < 1e-6
+                       for identity, rating in expected.items())
+            games = sum(len(rated_round.scores1)
+                        for rated_round in rated_rounds)
+            print(f"{tournaments_number:>12} {games:>8} "
+                  f"{read:>8.2f}s {game_by_game:>12.2f}s "
+                  f"{vectorized:>10.2f}s")
+
+
+if __name__ == "__main__":
+    main()
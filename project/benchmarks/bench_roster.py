@@ -0,0 +1,76 @@
+"""Benchmarks registering thousands of players from a roster file.
+
+For rosters of growing size, written as CSV and as JSON Lines in a
+temporary folder, the benchmark times:
+
+    read: reading and checking the roster with load_roster from
+        c_22_roster.py.
+    register: instantiating the players from the rows read, as the
+        engine does when registering them.
+
+Run from anywhere: python project/benchmarks/bench_roster.py
+"""
+
+import csv
+import json
+import os
+import random
+import tempfile
+import time
+
+import synthetic  # noqa: F401
+from c_22_roster import ROSTER_COLUMNS, load_roster
+from models import Player
+
+SIZES = [1000, 10000, 100000]
+
+
+def write_rosters(folder: str, players_number: int):
+    """Writes the same roster as CSV and as JSON Lines."""
+    rng = random.Random(players_number)
+    rows = [{"last_name": f"Player{i}", "first_name": "Synthetic",
+             "date_of_birth": f"{rng.randint(1950, 2010)}/"
+                              f"{rng.randint(1, 12):02}/"
+                              f"{rng.randint(1, 28):02}",
+             "sex": rng.choice(["men", "women"]),
+             "ranking": str(i + 1)}
+            for i in range(players_number)]
+
+    csv_path = os.path.join(folder, "roster.csv")
+    with open(csv_path, "w", newline="", encoding="utf-8") as roster:
+        writer = csv.DictWriter(roster, ROSTER_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    jsonl_path = os.path.join(folder, "roster.jsonl")
+    with open(jsonl_path, "w", encoding="utf-8") as roster:
+        for row in rows:
+            roster.write(json.dumps(row) + "\n")
+    return csv_path, jsonl_path
+
+
+def time_roster(path: str, players_number: int):
+    start = time.perf_counter()
+    players_info = load_roster(path, players_number)
+    read = time.perf_counter() - start
+
+    start = time.perf_counter()
+    [Player(*player_info, player_id=player_id)
+     for player_id, player_info in enumerate(players_info)]
+    register = time.perf_counter() - start
+    return read, register
+
+
+def main():
+    print(f"{'players':>8} {'format':>6} {'read':>10} {'register':>10}")
+    with tempfile.TemporaryDirectory() as folder:
+        for players_number in SIZES:
+            for path in write_rosters(folder, players_number):
+                read, register = time_roster(path, players_number)
+                extension = os.path.splitext(path)[1][1:]
+                print(f"{players_number:>8} {extension:>6} "
+                      f"{read * 1000:>8.1f}ms {register * 1000:>8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""Benchmarks the whole program and compares it with a stored baseline.
+
+For synthetic tournaments of 16, 128, 1024 and 8192 players, the suite
+measures:
+
+    ranking: ranking the players halfway through the tournament.
+    pairing: pairing the next round, from the same standings.
+    full run: running the whole tournament with the engine of
+        c_11_engine.py, from the registration of the players to the
+        final ranking.
+    save: saving the tournament and its players with SaveDataInDB.
+    round trip: saving them, then reading the players back through
+        RequestsMenu. The players read back are checked against the
+        players saved.
+    query 1 to query 8: each request of RequestsMenu, the database
+        holding the tournament saved.
+
+Each case is timed REPEATS times and the best time is kept. It is then
+run once more under tracemalloc for its peak memory, i.e. the most
+memory it allocated on top of what was allocated before it started.
+Before each query, the read models are invalidated: the database files
+are parsed again, as for the first request of the program.
+
+The results are compared with the baseline file, baseline.json next to
+this script. A case is a regression when it is more than
+TIME_TOLERANCE times slower, or takes more than MEMORY_TOLERANCE times
+the memory, than in the baseline. The script then exits with status 1.
+Times under MINIMUM_SECONDS and peaks under MINIMUM_BYTES are too noisy
+to be compared.
+
+The baseline was measured on a single machine: on another one, update it
+before comparing, e.g. on the last release.
+
+Run from anywhere: python project/benchmarks/bench_suite.py
+    --sizes 16 128: only benchmark these sizes.
+    --storage sqlite: save and query db.sqlite3 instead of db.json.
+    --update-baseline: store the results as the new baseline.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import synthetic
+from c_2_pairing_subsequent_rounds import (pair_players_for_subsequent_round,
+                                           rank_players_for_subsequent_round)
+from c_6_save_data import SaveDataInDB
+from c_7_retrieve_data import RequestsMenu
+from c_11_engine import TournamentEngine
+from c_14_read_model import invalidate_read_models
+from c_17_storage import get_storage
+from models import RoundPlan, Tournament
+
+# players: rounds
+SIZES = {16: 4, 128: 7, 1024: 10, 8192: 13}
+REPEATS = 5
+REQUESTS = ["1", "2", "3", "4", "5", "6", "7", "8"]
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "baseline.json")
+TIME_TOLERANCE = 2.0
+MEMORY_TOLERANCE = 1.2
+MINIMUM_SECONDS = 0.005
+MINIMUM_BYTES = 2 ** 16
+
+
+class Measure(NamedTuple):
+    seconds: float
+    peak_bytes: int
+
+
+def measure(function: Callable[[], Any],
+            prepare: Callable[[], Any] = lambda: None) -> Measure:
+    """Returns the best time and the peak memory of the function.
+
+    Args:
+        function: the case to measure.
+        prepare: called before each run of the function, untimed.
+    """
+    times = []
+    for _ in range(REPEATS):
+        prepare()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    prepare()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return Measure(min(times), peak - before)
+
+
+def players_info(players_number: int) -> List[tuple]:
+    """Returns the info of the players, as collect_player_info does."""
+    return [(player.last_name, player.first_name, "1990/01/01", player.sex,
+             str(player.ranking))
+            for player in synthetic.make_players(players_number)]
+
+
+def run_tournament(players_number: int, number_of_rounds: int):
+    rng = random.Random(players_number)
+
+    def results_for(plan: RoundPlan) -> List[str]:
+        return [rng.choice("WLD") for _ in plan.pairs]
+
+    engine = TournamentEngine(Tournament(
+        "full run", "benchmark hall", "2021/01/01", players_number,
+        "synthetic tournament", "bullet", number_of_rounds))
+    engine.run(players_info(players_number), results_for)
+
+
+def round_trip(tournament: Tournament, storage_name: str):
+    storage = get_storage(storage_name)
+    SaveDataInDB(tournament, "3", storage=storage)
+    invalidate_read_models()
+    with contextlib.redirect_stdout(io.StringIO()):
+        players = RequestsMenu(tournament, "2", tournament.name,
+                               storage).result
+    read_back = {player.last_name: player.serialize_player()
+                 for player in players}
+    assert read_back == {player.last_name: player.serialize_player()
+                         for player in tournament.players_instances}
+
+
+def query(tournament: Tournament, request: str, storage_name: str):
+    with contextlib.redirect_stdout(io.StringIO()):
+        RequestsMenu(tournament, request, tournament.name,
+                     get_storage(storage_name))
+
+
+def benchmark_size(players_number: int, number_of_rounds: int,
+                   storage_name: str) -> Dict[str, Measure]:
+    """Measures all the cases for tournaments of one size."""
+    results = {}
+    tournament = synthetic.make_tournament(players_number, number_of_rounds)
+    for round_number in range(1, number_of_rounds // 2 + 1):
+        synthetic.play_round(tournament, round_number)
+
+    results["ranking"] = measure(
+        lambda: rank_players_for_subsequent_round(
+            tournament.players_instances, tournament.standings))
+    results["pairing"] = measure(
+        lambda: pair_players_for_subsequent_round(
+            tournament.players_instances, tournament.standings,
+            tournament.opponent_matrix))
+    results["full run"] = measure(
+        lambda: run_tournament(players_number, number_of_rounds))
+
+    tournament = synthetic.make_played_tournament(players_number,
+                                                  number_of_rounds)
+    results["save"] = measure(lambda: SaveDataInDB(
+        tournament, "3", storage=get_storage(storage_name)))
+    results["round trip"] = measure(
+        lambda: round_trip(tournament, storage_name))
+    for request in REQUESTS:
+        results[f"query {request}"] = measure(
+            lambda: query(tournament, request, storage_name),
+            invalidate_read_models)
+    return results
+
+
+def compare(measured: Measure, baseline: Optional[Dict[str, Any]]) -> str:
+    """Returns how the measure compares with the baseline."""
+    if baseline is None:
+        return "new"
+    if (measured.seconds > MINIMUM_SECONDS
+            and measured.seconds
+            > TIME_TOLERANCE * baseline["seconds"]):
+        return "SLOWER"
+    if (measured.peak_bytes > MINIMUM_BYTES
+            and measured.peak_bytes
+            > MEMORY_TOLERANCE * baseline["peak_bytes"]):
+        return "MORE MEMORY"
+    return "ok"
+
+
+def format_seconds(seconds: float) -> str:
+    return f"{seconds * 1000:.2f}ms"
+
+
+def format_bytes(bytes_number: int) -> str:
+    return f"{bytes_number / 2 ** 20:.2f}MiB"
+
+
+def read_baseline(path: str) -> Dict[str, Dict[str, Any]]:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as baseline_file:
+        return json.load(baseline_file)["results"]
+
+
+def write_baseline(path: str, results: Dict[str, Dict[str, Any]]):
+    with open(path, "w") as baseline_file:
+        json.dump({"python": platform.python_version(),
+                   "machine": platform.machine(),
+                   "results": results}, baseline_file, indent=4)
+        baseline_file.write("\n")
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmarks the program against a stored baseline.")
+    parser.add_argument("--sizes", type=int, nargs="+", choices=SIZES,
+                        default=list(SIZES))
+    parser.add_argument("--storage", choices=["json", "sqlite"],
+                        default="json")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--update-baseline", action="store_true")
+    options = parser.parse_args(arguments)
+
+    baseline = read_baseline(options.baseline)
+    results = dict(baseline)
+    regressions = 0
+    print(f"{'players':>8} {'case':>12} {'time':>10} {'baseline':>10} "
+          f"{'peak':>10} {'baseline':>10}  comparison")
+
+    # the databases are written in a temporary folder.
+    working_directory = os.getcwd()
+    with tempfile.TemporaryDirectory() as folder:
+        for players_number in options.sizes:
+            os.chdir(tempfile.mkdtemp(dir=folder))
+            try:
+                measures = benchmark_size(players_number,
+                                          SIZES[players_number],
+                                          options.storage)
+            finally:
+                os.chdir(working_directory)
+
+            for case, measured in measures.items():
+                key = f"{options.storage}/{players_number}/{case}"
+                comparison = compare(measured, baseline.get(key))
+                regressions += comparison in ("SLOWER", "MORE MEMORY")
+                base_time = base_peak = "-"
+                if key in baseline:
+                    base_time = format_seconds(baseline[key]["seconds"])
+                    base_peak = format_bytes(baseline[key]["peak_bytes"])
+                print(f"{players_number:>8} {case:>12} "
+                      f"{format_seconds(measured.seconds):>10} "
+                      f"{base_time:>10} "
+                      f"{format_bytes(measured.peak_bytes):>10} "
+                      f"{base_peak:>10}  {comparison}")
+                results[key] = measured._asdict()
+
+    if options.update_baseline:
+        write_baseline(options.baseline, results)
+        print(f"baseline written to {options.baseline}")
+        return 0
+    if regressions:
+        print(f"{regressions} regression(s) against the baseline.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""Benchmarks the tiebreaks of c_23_tiebreaks.py.
+
+For tournaments of growing size, the benchmark compares:
+
+    per player: each tiebreak computed player by player, searching each
+        opponent of the opponents_faced lists in the list of players,
+        as breaking the ties would be written without the module.
+    vectorized: compute_tiebreaks, then sorting the players by points
+        and tiebreaks.
+
+It checks first that both give the same tiebreaks. The per player
+computation is quadratic, so it is skipped for the largest sizes.
+
+Run from anywhere: python project/benchmarks/bench_tiebreaks.py
+"""
+
+import time
+from typing import Dict, List
+
+import synthetic
+from c_23_tiebreaks import TIEBREAKS, compute_tiebreaks
+from models import Player, Tournament
+
+SIZES = [(128, 7), (1024, 10), (8192, 13)]
+PER_PLAYER_LIMIT = 1024
+
+
+def tiebreaks_per_player(tournament: Tournament
+                         ) -> Dict[int, Dict[str, float]]:
+    """Computes the tiebreaks of each player, one player at a time."""
+    players = tournament.players_instances
+    played_rounds = [round for round in tournament.rounds.values()
+                     if round.matches]
+    tiebreaks = {}
+    for player in players:
+        opponent_scores = [
+            next(opponent for opponent in players
+                 if opponent.last_name == last_name).result_field
+            for last_name in player.opponents_faced]
+
+        points_per_round = []
+        for played_round in played_rounds:
+            for match in played_round.matches.values():
+                for match_player, points in \
+                        match.convert_match_result_into_points():
+                    if match_player is player:
+                        points_per_round.append(points)
+
+        buchholz = sum(opponent_scores)
+        median_buchholz = buchholz
+        if len(opponent_scores) >= 3:
+            median_buchholz -= max(opponent_scores) + min(opponent_scores)
+        cumulative = 0.0
+        running_score = 0.0
+        for points in points_per_round:
+            running_score += points
+            cumulative += running_score
+
+        tiebreaks[id(player)] = {
+            "buchholz": buchholz,
+            "median_buchholz": median_buchholz,
+            "sonneborn_berger": sum(
+                score * points for score, points
+                in zip(opponent_scores, points_per_round)),
+            "cumulative": cumulative}
+    return tiebreaks
+
+
+def rank_with_tiebreaks(tournament: Tournament) -> List[Player]:
+    tiebreaks = compute_tiebreaks(tournament)
+    return tiebreaks.ranked_players(tournament.players_instances)
+
+
+def main():
+    print(f"{'players':>8} {'rounds':>7} {'per player':>12} "
+          f"{'vectorized':>12}")
+    for players_number, number_of_rounds in SIZES:
+        tournament = synthetic.make_played_tournament(players_number,
+                                                      number_of_rounds)
+
+        start = time.perf_counter()
+        rank_with_tiebreaks(tournament)
+        vectorized = time.perf_counter() - start
+
+        per_player = "skipped"
+        if players_number <= PER_PLAYER_LIMIT:
+            start = time.perf_counter()
+            expected = tiebreaks_per_player(tournament)
+            per_player = f"{(time.perf_counter() - start) * 1000:.1f}ms"
+
+            tiebreaks = compute_tiebreaks(tournament)
+            for player in tournament.players_instances:
+                values = tiebreaks.values(player)
+                assert all(values[name] == expected[id(player)][name]
+                           for name in TIEBREAKS), player
+
+        print(f"{players_number:>8} {number_of_rounds:>7} "
+              f"{per_player:>12} {vectorized * 1000:>10.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
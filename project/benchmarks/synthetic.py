@@ -0,0 +1,74 @@
+"""Builds synthetic tournaments for the benchmarks.
+
+The scripts folder is not a package: its modules import each other by
+their file name. Importing this module makes them importable from the
+benchmarks folder.
+"""
+
+import os
+import random
+import sys
+from typing import List
+
+SCRIPTS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              os.pardir, "scripts")
+sys.path.insert(0, os.path.normpath(SCRIPTS_FOLDER))
+
+from c_2_pairing_subsequent_rounds import (  # noqa: E402
+    plan_round, update_all_players_attrs_after_round)
+from c_4_round_instantiation import (  # noqa: E402
+    CreatingRoundStoringInTournament)
+from models import (Match, OpponentMatrix, Player, Standings,  # noqa: E402
+                    Tournament)
+
+
+def make_players(players_number: int, seed: int = 0) -> List[Player]:
+    """Returns players with distinct last names and shuffled rankings."""
+    rng = random.Random(seed)
+    rankings = list(range(1, players_number + 1))
+    rng.shuffle(rankings)
+
+    players = []
+    for player_id in range(players_number):
+        players.append(Player(f"Player{player_id}", "Synthetic",
+                              "1990/01/01", rng.choice(["men", "women"]),
+                              rankings[player_id], player_id=player_id))
+    return players
+
+
+def make_tournament(players_number: int, number_of_rounds: int = 4,
+                    name: str = "synthetic") -> Tournament:
+    """Returns a tournament with its players and rounds, none played."""
+    tournament = Tournament(name, "benchmark hall", "2021/01/01",
+                            players_number, "synthetic tournament",
+                            "bullet", number_of_rounds)
+    players = make_players(players_number)
+    tournament.players_instances = players
+    tournament.standings = Standings(players)
+    tournament.opponent_matrix = OpponentMatrix(players_number)
+    CreatingRoundStoringInTournament(tournament)
+    return tournament
+
+
+def play_round(tournament: Tournament, round_number: int, seed: int = 0):
+    """Pairs a round, draws random results and applies them."""
+    rng = random.Random(seed * 1000 + round_number)
+    plan = plan_round(tournament, round_number)
+    played_round = tournament.rounds[f"Round {round_number}"]
+
+    matches = {}
+    for i, (player1, player2) in enumerate(plan.pairs):
+        matches[f"match{i + 1}"] = Match(player1, player2,
+                                         rng.choice("WLD"), played_round)
+    played_round.matches = matches
+    update_all_players_attrs_after_round(matches, tournament.standings,
+                                         tournament.opponent_matrix)
+
+
+def make_played_tournament(players_number: int, number_of_rounds: int = 4,
+                           name: str = "synthetic") -> Tournament:
+    """Returns a tournament whose rounds all took place."""
+    tournament = make_tournament(players_number, number_of_rounds, name)
+    for round_number in range(1, number_of_rounds + 1):
+        play_round(tournament, round_number)
+    return tournament
@@ -1,75 +1,117 @@
 """ Pairing players, storing and/or retrieving data about the tournament.
+
+The tournament is run by the headless engine from c_11_engine.py. This
+module only collects the data from the user through view.py and gives
+it to the engine.
 """
 
-from c_2_pairing_subsequent_rounds import update_all_players_attrs_after_round
-from c_5_match_instantiation import (CreatingMatchesStoringInRoundOne,
-                                     CreatingMatchesStoringInSubsequentRounds)
-from c_4_round_instantiation import CreatingRoundStoringInTournament
-from c_3_player_instantiation import CreatingPlayersStoringInTournament
-from c_6_save_data import SaveDataInDB
+from c_2_pairing_subsequent_rounds import tiebreaks_from_environment
+from c_5_match_instantiation import collect_round_results
 from c_7_retrieve_data import RequestsMenu
+from c_6_save_data import SaveDataInDB, incremental_save_from_environment
 from c_8_modify_attributes import (request_tournament_new_description,
                                    request_player_new_ranking)
-from c_9_time_control import (time_control,
-                              update_start_end_datetime_round)
+from c_9_time_control import clock_from_environment, time_control
+from c_11_engine import TournamentEngine, ratings_from_environment
+from c_19_journal import MatchJournal, has_snapshot, recover_tournament
+from c_22_roster import load_roster, roster_path_from_environment
+from c_25_optimal_pairing import pairing_from_environment
+from c_26_parallel_pairing import ParallelPairing
+from c_27_profiling import (enable_profiling, profiler,
+                            profiling_from_environment)
 from models import Tournament
-from view import collect_tournament_info
-from view_display import (display_ranking,
+from view import collect_player_info, collect_tournament_info
+from view_display import (display_ranking, display_ratings,
                           display_first_round_matches,
                           display_subsequent_round_matches)
 
 if __name__ == "__main__":
 
-    # instantiating the tournament.
-    tournament = Tournament(*collect_tournament_info())
-
-    creating_pl_instances = CreatingPlayersStoringInTournament(tournament)
-
-    # setting up the first round.
-    display_first_round_matches(tournament)
-    creating_round_instances = CreatingRoundStoringInTournament(tournament)
-
-    for i in range(1, tournament.number_of_rounds):
-        update_start_end_datetime_round(i + 1, tournament)
-
-    # the first round is taking place.
-    time_control(tournament)
-
-    # the first round happened. Collecting the results.
-    creating_match_instances = CreatingMatchesStoringInRoundOne(tournament, 1)
-    last_round_matches = tournament.rounds["Round 1"].matches
-    update_all_players_attrs_after_round(last_round_matches)
+    # with CHESS_PROFILE=1, the time of each phase and the bytes written
+    # are recorded, then reported at the end.
+    if profiling_from_environment():
+        enable_profiling()
 
-    # checking if the manager wants to override some data.
-    request_tournament_new_description(tournament)
-    request_player_new_ranking(tournament)
+    # instantiating the tournament. The clock is the real one unless
+    # the CHESS_TIME_FACTOR environment variable says otherwise.
+    clock = clock_from_environment()
+    tournament = Tournament(*collect_tournament_info())
 
-    # checking if the manager wants to save some data.
-    possibly_saving_data = SaveDataInDB(tournament)
+    # the results and overrides are journaled as soon as they are
+    # entered. If the program stopped before the end of the tournament,
+    # the tournament is recovered from its journal.
+    # with CHESS_PAIRING=optimal, the rounds after the first are paired
+    # by a minimum-cost perfect matching instead of the greedy pairing.
+    pairing = pairing_from_environment()
+
+    known_results = []
+    if has_snapshot(tournament.name):
+        engine, known_results = recover_tournament(tournament.name, clock,
+                                                   pairing)
+        tournament = engine.tournament
+        print(f"resuming {tournament} at round {engine.round_number}, "
+              f"{len(known_results)} result(s) already entered.")
+    else:
+        engine = TournamentEngine(tournament, clock)
+        tournament.journal = MatchJournal(tournament.name)
+
+        # instantiating the players and the rounds. With the
+        # CHESS_ROSTER environment variable, the players are read from a
+        # roster file instead of being prompted for.
+        roster_path = roster_path_from_environment()
+        if roster_path:
+            players_info = load_roster(roster_path,
+                                       tournament.players_number)
+        else:
+            players_info = [collect_player_info()
+                            for _ in range(tournament.players_number)]
+        engine.register_players(players_info)
+
+    tournament.pairing = pairing
 
     # the algorithms used for setting up the first round matches
     # is different from the one used for setting up the
-    # subsequent rounds matches. Therefore, the first round matches
-    # are instantiated before the loop.
-    # Also, the range function starts at 1 but the first round
-    # to be instantiated in the loop is round2. Thus, the arg passed
-    # to CreatingMatchesStoringInSubsequentRounds is i+1
-    if tournament.number_of_rounds > 1:
-        for i in range(1, tournament.number_of_rounds):
-            display_subsequent_round_matches(tournament)
-
-            time_control(tournament)
-
-            creating_more_matches = CreatingMatchesStoringInSubsequentRounds(
-                tournament, i + 1)
-            last_round_matches = tournament.rounds[f"Round {i + 1}"].matches
-            update_all_players_attrs_after_round(last_round_matches)
-
-            request_tournament_new_description(tournament)
-            request_player_new_ranking(tournament)
-
-            possibly_saving_data = SaveDataInDB(tournament)
-
-    display_ranking(tournament)
+    # subsequent rounds matches. The engine picks the right one
+    # from the number of the round taking place.
+    while not engine.is_over():
+        if engine.round_number == 1:
+            display_first_round_matches(tournament)
+        else:
+            display_subsequent_round_matches(tournament, engine.round_number)
+
+        # the round is taking place.
+        time_control(tournament, clock)
+
+        # the round happened. Collecting the results.
+        results = collect_round_results(tournament, engine.round_number,
+                                        known_results)
+        known_results = []
+        engine.record_results(results)
+
+        # checking if the manager wants to override some data.
+        request_tournament_new_description(tournament)
+        request_player_new_ranking(tournament)
+
+        # checking if the manager wants to save some data.
+        possibly_saving_data = SaveDataInDB(
+            tournament, incremental=incremental_save_from_environment())
+
+    # the tournament is over: there is nothing left to recover.
+    tournament.journal.discard()
+
+    # the processes of CHESS_PAIRING=parallel are stopped.
+    if isinstance(pairing, ParallelPairing):
+        pairing.close()
+
+    # with CHESS_TIEBREAKS=1, the ties of the final ranking are broken.
+    display_ranking(tournament, tiebreaks_from_environment())
+
+    # with CHESS_RATINGS=1, the players are rated from the database and
+    # the tournament that just took place.
+    if ratings_from_environment():
+        display_ratings(engine.ratings())
 
     making_a_request = RequestsMenu(tournament)
+
+    if profiler.enabled:
+        profiler.write_reports()
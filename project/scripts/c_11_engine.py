@@ -0,0 +1,219 @@
+"""Runs a tournament from data, without prompting the user.
+
+The controller classes prompt the user through view.py unless they are
+given the data they need. The engine gives them that data: the
+players, the results and the overrides are passed as arguments. The
+pairing and the storage logic are the same as in the interactive
+program, which is itself a client of the engine.
+"""
+
+import os
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from c_2_pairing_subsequent_rounds import (
+    plan_round, rank_players_for_subsequent_round,
+    update_all_players_attrs_after_round)
+from c_3_player_instantiation import CreatingPlayersStoringInTournament
+from c_4_round_instantiation import CreatingRoundStoringInTournament
+from c_5_match_instantiation import (CreatingMatchesStoringInRoundOne,
+                                     CreatingMatchesStoringInSubsequentRounds)
+from c_8_modify_attributes import (change_player_ranking,
+                                   change_tournament_description)
+from c_9_time_control import (Clock, VirtualClock,
+                              update_start_end_datetime_round)
+from models import Match, Player, RoundPlan, Tournament
+
+
+def ratings_from_environment() -> bool:
+    """Returns True if CHESS_RATINGS asks for the players to be rated."""
+    return os.environ.get("CHESS_RATINGS", "") == "1"
+
+
+class TournamentEngine:
+    """Drives a tournament programmatically.
+
+    The engine keeps track of the round taking place. Its methods are
+    meant to be called in the order of the interactive program: register
+    the players, then for each round read the pairing and record the
+    results, possibly overriding data or saving the tournament between
+    two rounds.
+
+    Example:
+        engine = TournamentEngine(Tournament("cheese", "Paris",
+                                             "2021/05/01", "4", "",
+                                             "blitz", "2"))
+        engine.register_players(players_info)
+        for _ in range(engine.tournament.number_of_rounds):
+            pairs = engine.pairing().pairs
+            engine.record_results(["W"] * len(pairs))
+        final_ranking = engine.ranking()
+
+    By default, the clock of the engine is a virtual clock: waiting for
+    the end of a round only moves the time of the clock forward.
+
+    Attributes:
+        tournament: the tournament run by the engine.
+        round_number: the number of the round taking place. 0 before the
+            players are registered.
+        clock: the clock dating the rounds.
+
+    Raises:
+        IndexError: results are recorded while all the rounds took place.
+        ValueError: the players are registered twice, or the data given
+            is refused by the model or the controllers.
+    """
+    def __init__(self, tournament: Tournament, clock: Clock = None):
+        self.tournament = tournament
+        self.round_number = 0
+        self.clock = clock if clock is not None else VirtualClock()
+
+    def register_players(self, players_info: Sequence[Tuple]):
+        """Instantiates the players and the rounds of the tournament.
+
+        Args:
+            players_info: one tuple per player, with the values
+                collect_player_info from view.py would return.
+        """
+        if self.round_number != 0:
+            raise ValueError("the players are already registered")
+
+        CreatingPlayersStoringInTournament(self.tournament, players_info)
+        CreatingRoundStoringInTournament(self.tournament, self.clock)
+        for i in range(1, self.tournament.number_of_rounds):
+            update_start_end_datetime_round(i + 1, self.tournament)
+        self.round_number = 1
+        self.write_snapshot()
+
+    def is_over(self) -> bool:
+        return self.round_number > self.tournament.number_of_rounds
+
+    def pairing(self) -> RoundPlan:
+        """Returns the pairing of the round taking place."""
+        if self.round_number == 0 or self.is_over():
+            raise IndexError("no round is taking place")
+        return plan_round(self.tournament, self.round_number)
+
+    def wait_for_round_end(self):
+        """Lets the duration of a round go by on the clock."""
+        self.clock.sleep(self.tournament.round_duration())
+
+    def record_results(self, results: Sequence[str]) -> Dict[str, Match]:
+        """Stores the matches of the round taking place.
+
+        The players' attributes are updated, then the next round starts.
+
+        Args:
+            results: the result of each match, in the order of the pairs
+                of the round plan, from the perspective of the first
+                player of the pair.
+
+        Returns: the matches of the round.
+
+        Raises:
+            ValueError: a result isn't "W", "L" or "D", or there isn't
+                one per match. The tournament is then left unchanged.
+        """
+        if self.round_number == 0 or self.is_over():
+            raise IndexError("all the rounds already took place")
+
+        if self.round_number == 1:
+            CreatingMatchesStoringInRoundOne(self.tournament, 1, results)
+        else:
+            CreatingMatchesStoringInSubsequentRounds(
+                self.tournament, self.round_number, results)
+
+        matches = self.tournament.rounds[f"Round {self.round_number}"].matches
+        update_all_players_attrs_after_round(matches,
+                                             self.tournament.standings,
+                                             self.tournament.opponent_matrix)
+        self.round_number += 1
+        self.write_snapshot()
+        return matches
+
+    def write_snapshot(self):
+        """Snapshots the tournament if it is journaled.
+
+        The journal then only needs to be replayed from this point to
+        recover the tournament, see c_19_journal.py.
+        """
+        if self.tournament.journal is not None:
+            self.tournament.journal.write_snapshot(self.tournament,
+                                                   self.round_number)
+
+    def override_description(self, new_description: str):
+        change_tournament_description(self.tournament, new_description)
+
+    def override_ranking(self, which_player: str, new_ranking: str):
+        change_player_ranking(self.tournament, which_player, new_ranking)
+
+    def save(self, what_table: str = "3", incremental: bool = False):
+        """Saves the tournament and/or its players in the database.
+
+        Args:
+            what_table: the number of the need, as listed by
+                what_table_to_save from view.py.
+            incremental: True to only save what changed since the last
+                save, see SaveDataInDB.
+        """
+        # imported here: importing c_6 imports the storages and TinyDB,
+        # which a tournament run only in memory doesn't need.
+        from c_6_save_data import SaveDataInDB
+        SaveDataInDB(self.tournament, what_table, incremental)
+
+    def query(self, request: str, which_tournament: Optional[str] = None):
+        """Returns the data of a request to the database.
+
+        Args:
+            request: the number of the request, as listed by
+                what_data_to_read from view.py.
+            which_tournament: the tournament name, for the requests
+                referring to a single tournament.
+
+        Returns: the data asked for. The tournaments of request 5 are
+            an iterator, read from the database as it is consumed.
+        """
+        from c_7_retrieve_data import RequestsMenu
+        return RequestsMenu(self.tournament, request, which_tournament).result
+
+    def ranking(self, tiebreaks: bool = False) -> List[Player]:
+        """Returns the players, from the first to the last.
+
+        Args:
+            tiebreaks: whether to break the ties between players with
+                the same number of points, see c_23_tiebreaks.py.
+        """
+        computed_tiebreaks = None
+        if tiebreaks:
+            from c_23_tiebreaks import compute_tiebreaks
+            computed_tiebreaks = compute_tiebreaks(self.tournament)
+        return rank_players_for_subsequent_round(
+            self.tournament.players_instances, self.tournament.standings,
+            computed_tiebreaks)
+
+    def ratings(self) -> List[Tuple[Player, float, float]]:
+        """Rates the players once the tournament is over.
+
+        Returns: each player with his Elo rating before and after the
+            tournament, see rate_players in c_24_ratings.py.
+        """
+        # NumPy is only imported when the ratings are asked for.
+        from c_24_ratings import rate_players
+        return rate_players(self.tournament)
+
+    def run(self, players_info: Sequence[Tuple],
+            results_for: Callable[[RoundPlan], Sequence[str]]
+            ) -> List[Player]:
+        """Runs the whole tournament.
+
+        Args:
+            players_info: the info of each player, see register_players.
+            results_for: called with the plan of each round, returns
+                the results of its matches.
+
+        Returns: the final ranking.
+        """
+        self.register_players(players_info)
+        while not self.is_over():
+            self.wait_for_round_end()
+            self.record_results(results_for(self.pairing()))
+        return self.ranking()
@@ -0,0 +1,222 @@
+"""Simulates many tournaments to help sizing events.
+
+Each simulated tournament is run by the headless engine from
+c_11_engine.py, with the same pairing and the same update of the
+players' attributes as a real tournament. The results are drawn from
+the players' ratings: the better rated player is more likely to win.
+
+The tournaments are independent from each other. They are spread over
+a pool of processes, one per core by default, so the number of
+tournaments simulated per second grows with the number of cores.
+
+Run from the scripts folder, e.g.:
+    python c_12_simulation.py --players 64 --rounds 6 --runs 2000
+"""
+
+import argparse
+import os
+import random
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional
+
+from c_11_engine import TournamentEngine
+from models import Player, RoundPlan, Tournament
+
+# share of the games between two equally rated players ending in a draw.
+DRAW_RATE = 0.3
+MEAN_RATING = 1500
+RATING_DEVIATION = 300
+
+
+class SimulationSettings(NamedTuple):
+    players_number: int
+    number_of_rounds: int
+    seed: int
+    draw_rate: float = DRAW_RATE
+
+
+class SimulationResult(NamedTuple):
+    """The statistics of one simulated tournament.
+
+    Attributes:
+        matches_number: the number of matches played.
+        repeat_pairings: the number of matches between two players who
+            already met.
+        undefeated_players: the number of players who never lost.
+        rank_correlation: the Spearman correlation between the ranking
+            by rating and the final ranking. 1 means the tournament
+            ranked the players exactly by strength.
+    """
+    matches_number: int
+    repeat_pairings: int
+    undefeated_players: int
+    rank_correlation: float
+
+
+def expected_score(rating: float, opponent_rating: float) -> float:
+    """Returns the score the player is expected to make, per the Elo model.
+    """
+    return 1 / (1 + 10 ** ((opponent_rating - rating) / 400))
+
+
+def draw_result(rng: random.Random, rating1: float, rating2: float,
+                draw_rate: float = DRAW_RATE) -> str:
+    """Draws the result of a match from the perspective of player1.
+
+    The expected score of player1 is shared between a win and a draw so
+    that the draws are more frequent between equally rated players.
+
+    Returns: "W", "L" or "D".
+    """
+    expected = expected_score(rating1, rating2)
+    draw_probability = draw_rate * 2 * min(expected, 1 - expected)
+    roll = rng.random()
+    if roll < expected - draw_probability / 2:
+        return "W"
+    if roll < expected + draw_probability / 2:
+        return "D"
+    return "L"
+
+
+def spearman_correlation(ranks1: List[int], ranks2: List[int]) -> float:
+    """Returns the Spearman correlation of two rankings without ties."""
+    n = len(ranks1)
+    if n < 2:
+        return 1.0
+    squared_differences = sum((a - b) ** 2 for a, b in zip(ranks1, ranks2))
+    return 1 - 6 * squared_differences / (n * (n ** 2 - 1))
+
+
+def simulate_tournament(settings: SimulationSettings) -> SimulationResult:
+    """Runs one tournament with results drawn from the players' ratings.
+
+    The players are ranked by rating before the tournament starts, the
+    best rated player being ranked first.
+    """
+    rng = random.Random(settings.seed)
+    ratings = sorted((rng.gauss(MEAN_RATING, RATING_DEVIATION)
+                      for _ in range(settings.players_number)),
+                     reverse=True)
+    players_info = [(f"Player{i}", "Simulated", "1990/01/01", "other", i + 1)
+                    for i in range(settings.players_number)]
+
+    tournament = Tournament("simulation", "nowhere", "2021/01/01",
+                            settings.players_number, "",
+                            "bullet", settings.number_of_rounds)
+    engine = TournamentEngine(tournament)
+
+    counts = {"matches": 0, "repeats": 0}
+    defeated = set()
+
+    def results_for(plan: RoundPlan) -> List[str]:
+        results = []
+        for player1, player2 in plan.pairs:
+            counts["matches"] += 1
+            if tournament.opponent_matrix.have_met(player1.player_id,
+                                                   player2.player_id):
+                counts["repeats"] += 1
+            result = draw_result(rng, ratings[player1.player_id],
+                                 ratings[player2.player_id],
+                                 settings.draw_rate)
+            if result == "W":
+                defeated.add(player2.player_id)
+            elif result == "L":
+                defeated.add(player1.player_id)
+            results.append(result)
+        return results
+
+    final_ranking: List[Player] = engine.run(players_info, results_for)
+
+    # the player_id is also the rank by rating, starting at 0.
+    final_rank_of_player = [0] * settings.players_number
+    for rank, player in enumerate(final_ranking):
+        final_rank_of_player[player.player_id] = rank
+    correlation = spearman_correlation(
+        list(range(settings.players_number)), final_rank_of_player)
+
+    return SimulationResult(counts["matches"], counts["repeats"],
+                            settings.players_number - len(defeated),
+                            correlation)
+
+
+def run_simulations(players_number: int, number_of_rounds: int,
+                    runs: int, processes: Optional[int] = None,
+                    base_seed: int = 0,
+                    draw_rate: float = DRAW_RATE) -> Dict[str, float]:
+    """Simulates many tournaments in parallel and aggregates their results.
+
+    Args:
+        players_number: the number of players of each tournament.
+        number_of_rounds: the number of rounds of each tournament.
+        runs: the number of tournaments to simulate.
+        processes: the number of processes of the pool. By default, one
+            per core. With 1, the tournaments are simulated in this
+            process.
+        base_seed: the seed of the first tournament. The i-th tournament
+            uses base_seed + i, so the same call gives the same results.
+        draw_rate: share of draws between two equally rated players.
+
+    Returns: the aggregated statistics.
+
+    Raises:
+        ValueError: runs is lower than 1: there would be no tournament
+            to compute statistics from.
+    """
+    if runs < 1:
+        raise ValueError("please, simulate at least one tournament")
+
+    all_settings = [SimulationSettings(players_number, number_of_rounds,
+                                       base_seed + i, draw_rate)
+                    for i in range(runs)]
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    if processes == 1:
+        results = [simulate_tournament(s) for s in all_settings]
+    else:
+        # sending the tournaments by chunks saves most of the
+        # inter-process communication.
+        chunksize = max(1, runs // (4 * processes))
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            results = list(executor.map(simulate_tournament, all_settings,
+                                        chunksize=chunksize))
+
+    matches_number = sum(result.matches_number for result in results)
+    repeat_pairings = sum(result.repeat_pairings for result in results)
+    return {
+        "runs": runs,
+        "repeat_pairing_rate": (repeat_pairings / matches_number
+                                if matches_number else 0.0),
+        "mean_undefeated_players": statistics.mean(
+            result.undefeated_players for result in results),
+        "mean_rank_correlation": statistics.mean(
+            result.rank_correlation for result in results),
+        "min_rank_correlation": min(
+            result.rank_correlation for result in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Simulates swiss-system tournaments.")
+    parser.add_argument("--players", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=4)
+    parser.add_argument("--runs", type=int, default=1000)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+    if arguments.runs < 1:
+        parser.error("--runs must be at least 1")
+
+    statistics_found = run_simulations(arguments.players, arguments.rounds,
+                                       arguments.runs, arguments.processes,
+                                       arguments.seed)
+    for name, value in statistics_found.items():
+        print(f"{name}: {value:.4f}" if isinstance(value, float)
+              else f"{name}: {value}")
+
+
+if __name__ == "__main__":
+    main()
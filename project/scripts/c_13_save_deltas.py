@@ -0,0 +1,134 @@
+"""Records the changes made to the database tables in an append-only file.
+
+Saving a table through TinyDB rewrites the whole database file, so the
+cost of a save grows with the number of tournaments in the database.
+Instead, an incremental save only appends to a deltas file the
+documents, the fields and the rounds that changed since the last save.
+Each line of the file is one JSON operation:
+
+    {"table": "cheese", "replace": {"1": {...}}}
+        replaces the whole table.
+    {"table": "cheese", "doc_id": "1", "path": ["rounds", "Round 2"],
+     "value": {...}}
+        sets the value found at path in the document doc_id.
+
+Whoever reads the database applies the deltas over it. Compacting the
+database applies the deltas once and for all, then empties the file.
+"""
+
+import json
+import os
+from typing import Any, Dict, List
+
+from c_27_profiling import profiler
+
+DATABASE_FILE = "db.json"
+DELTAS_FILE = "db.deltas.jsonl"
+
+# a document is compared field by field, and the fields that are
+# dictionaries one level further. Thus, a changed round of a tournament
+# is saved alone, not the whole tournament.
+DIFF_DEPTH = 2
+
+
+def diff_values(old: Any, new: Any, path: List[str],
+                depth: int) -> List[Dict[str, Any]]:
+    """Returns the operations turning old into new, as (path, value)."""
+    if old == new:
+        return []
+    if depth == 0 or not (isinstance(old, dict) and isinstance(new, dict)) \
+            or set(old) - set(new):
+        # removed keys can only be expressed by setting the parent.
+        return [{"path": path, "value": new}]
+
+    operations = []
+    for key, value in new.items():
+        if key not in old:
+            operations.append({"path": path + [key], "value": value})
+        else:
+            operations.extend(
+                diff_values(old[key], value, path + [key], depth - 1))
+    return operations
+
+
+def diff_table(table_name: str,
+               old_documents: Dict[str, Dict[str, Any]],
+               new_documents: Dict[str, Dict[str, Any]]
+               ) -> List[Dict[str, Any]]:
+    """Returns the operations turning the old documents into the new ones.
+
+    Args:
+        table_name: the name of the table holding the documents.
+        old_documents: the documents as they were last saved, keyed by
+            doc_id. None if the table wasn't saved yet.
+        new_documents: the documents to save, keyed by doc_id.
+    """
+    if old_documents is None or set(old_documents) - set(new_documents):
+        return [{"table": table_name, "replace": new_documents}]
+
+    operations = []
+    for doc_id, document in new_documents.items():
+        if doc_id not in old_documents:
+            changes = [{"path": [], "value": document}]
+        else:
+            changes = diff_values(old_documents[doc_id], document, [],
+                                  DIFF_DEPTH)
+        for change in changes:
+            operations.append({"table": table_name, "doc_id": doc_id,
+                               **change})
+    return operations
+
+
+def append_deltas(operations: List[Dict[str, Any]],
+                  path: str = DELTAS_FILE):
+    """Appends the operations to the deltas file, one per line."""
+    if not operations:
+        return
+    lines = [json.dumps(operation, separators=(",", ":"))
+             for operation in operations]
+    text = "\n".join(lines) + "\n"
+    with open(path, "a") as deltas_file:
+        deltas_file.write(text)
+    profiler.add_bytes(os.path.basename(path), len(text.encode("utf-8")))
+
+
+def apply_operation(database: Dict[str, Any], operation: Dict[str, Any]):
+    if "replace" in operation:
+        database[operation["table"]] = operation["replace"]
+        return
+
+    table = database.setdefault(operation["table"], {})
+    path = operation["path"]
+    if not path:
+        table[operation["doc_id"]] = operation["value"]
+        return
+
+    parent = table.setdefault(operation["doc_id"], {})
+    for key in path[:-1]:
+        parent = parent.setdefault(key, {})
+    parent[path[-1]] = operation["value"]
+
+
+def apply_deltas(database: Dict[str, Any],
+                 path: str = DELTAS_FILE) -> Dict[str, Any]:
+    """Applies the deltas file, if any, over the database in place.
+
+    Returns: the database.
+    """
+    if not os.path.exists(path):
+        return database
+
+    with open(path) as deltas_file:
+        for line in deltas_file:
+            if line.strip():
+                apply_operation(database, json.loads(line))
+    return database
+
+
+def has_deltas(path: str = DELTAS_FILE) -> bool:
+    return os.path.exists(path) and os.path.getsize(path) > 0
+
+
+def clear_deltas(path: str = DELTAS_FILE):
+    if os.path.exists(path):
+        os.remove(path)
@@ -0,0 +1,121 @@
+"""Keeps the database parsed in memory between two requests.
+
+Parsing db.json is the main cost of a request to the database. The read
+model parses it once, applies the deltas of the incremental saves, and
+keeps the result. It also keeps the objects deserialized from it, so
+repeating a request doesn't deserialize the players or the tournament
+again.
+
+Before answering, the read model compares the modification time and
+the size of the database and deltas files with the ones it read. If a
+file changed, whether from this program or another one, everything
+kept is dropped and the database is parsed again.
+"""
+
+import json
+import os
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from c_13_save_deltas import DATABASE_FILE, DELTAS_FILE, apply_deltas
+
+FileVersion = Optional[Tuple[int, int, int]]
+
+
+def file_version(path: str) -> FileVersion:
+    """Returns what identifies the content of a file, None if missing."""
+    try:
+        status = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return status.st_ino, status.st_mtime_ns, status.st_size
+
+
+class DatabaseReadModel:
+    """Parses the database once and keeps it with its deserialized objects.
+
+    Attributes:
+        database_path: the path of the database file.
+        deltas_path: the path of the incremental saves file.
+        version: the versions of both files when they were last read.
+        database: the parsed database, deltas applied. None until a
+            request needs the whole database: the objects kept may have
+            been built by streaming the file instead.
+        objects: the objects deserialized from the database, keyed by
+            whatever identifies the request that built them.
+    """
+    def __init__(self, database_path: str = DATABASE_FILE,
+                 deltas_path: str = DELTAS_FILE):
+        self.database_path = database_path
+        self.deltas_path = deltas_path
+        self.version: Optional[Tuple[FileVersion, FileVersion]] = None
+        self.database: Optional[Dict[str, Any]] = None
+        self.objects: Dict[Any, Any] = {}
+
+    def current_version(self) -> Tuple[FileVersion, FileVersion]:
+        return (file_version(self.database_path),
+                file_version(self.deltas_path))
+
+    def invalidate(self):
+        """Forgets everything kept: the next request parses the files."""
+        self.version = None
+        self.database = None
+        self.objects = {}
+
+    def refresh(self):
+        """Forgets everything kept if one of the files changed."""
+        version = self.current_version()
+        if version != self.version:
+            self.invalidate()
+            self.version = version
+
+    def read(self) -> Dict[str, Any]:
+        """Returns the parsed database, parsing it only if it changed.
+
+        The dictionary returned is shared by all the requests: it must
+        not be modified.
+        """
+        self.refresh()
+        if self.database is None:
+            # TinyDB creates the file empty: it is only written at the
+            # first full save. Before that, the file may not even exist.
+            database = {}
+            database_version, _ = self.version
+            # the version ends with the size of the file.
+            if database_version is not None and database_version[-1] > 0:
+                with open(self.database_path) as database_file:
+                    database = json.load(database_file)
+            self.database = apply_deltas(database, self.deltas_path)
+        return self.database
+
+    def cached(self, key: Any, build: Callable[[], Any]) -> Any:
+        """Returns the objects kept under key, building them if needed.
+
+        Args:
+            key: identifies the request, e.g. ("players", "cheese").
+            build: called to deserialize the objects when they aren't
+                kept yet or the database changed.
+        """
+        self.refresh()
+        if key not in self.objects:
+            self.objects[key] = build()
+        return self.objects[key]
+
+
+# one read model per database file, keyed by absolute path, so that a
+# change of working directory doesn't mix two databases.
+read_models: Dict[str, DatabaseReadModel] = {}
+
+
+def get_read_model() -> DatabaseReadModel:
+    """Returns the read model of the database of the working directory."""
+    database_path = os.path.abspath(DATABASE_FILE)
+    if database_path not in read_models:
+        read_models[database_path] = DatabaseReadModel(
+            database_path, os.path.abspath(DELTAS_FILE))
+    return read_models[database_path]
+
+
+def invalidate_read_models():
+    """Forgets everything kept, e.g. after the database was written."""
+    for read_model in read_models.values():
+        read_model.invalidate()
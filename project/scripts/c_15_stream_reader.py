@@ -0,0 +1,226 @@
+"""Reads the database document by document, without loading it whole.
+
+json.load builds the whole database in memory before anything can be
+read from it. The stream reader walks db.json instead: it reads the
+file by chunks and decodes one document at a time, so the memory used
+is bounded by the size of the largest document, not by the size of
+the database.
+
+The database written by TinyDB has two levels:
+
+    {"table name": {"doc_id": {document}, ...}, ...}
+
+The deltas of the incremental saves (see c_13_save_deltas.py) are
+applied to the documents as they are read.
+"""
+
+import itertools
+import json
+import os
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from c_13_save_deltas import DATABASE_FILE, DELTAS_FILE, apply_operation
+
+CHUNK_SIZE = 64 * 1024
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+Document = Tuple[str, str, Dict[str, Any]]
+
+
+class JSONStreamReader:
+    """Decodes the values of a JSON file one after the other.
+
+    Attributes:
+        file: the file being read.
+        buffer: the part of the file read but not decoded yet.
+        position: the position of the next character to decode in buffer.
+        end_of_file: True once the whole file was read.
+    """
+    def __init__(self, file, chunk_size: int = CHUNK_SIZE):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.position = 0
+        self.end_of_file = False
+        self.decoder = json.JSONDecoder()
+
+    def fill(self, at_least: int = 0):
+        """Reads more of the file, dropping what was already decoded."""
+        chunk = self.file.read(max(self.chunk_size, at_least))
+        if not chunk:
+            self.end_of_file = True
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+
+    def peek(self) -> str:
+        """Returns the next character that isn't a whitespace."""
+        while True:
+            self.position = WHITESPACE.match(self.buffer,
+                                             self.position).end()
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if self.end_of_file:
+                raise ValueError("the database file ends unexpectedly")
+            self.fill()
+
+    def expect(self, character: str):
+        if self.peek() != character:
+            raise ValueError(f"expected {character!r} in the database file "
+                             f"but found {self.peek()!r}")
+        self.position += 1
+
+    def skip_comma(self) -> bool:
+        """Skips a comma. Returns False if there is none."""
+        if self.peek() == ",":
+            self.position += 1
+            return True
+        return False
+
+    def decode(self) -> Any:
+        """Decodes the next value, reading the file until it is complete.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer,
+                                                     self.position)
+            except json.JSONDecodeError:
+                if self.end_of_file:
+                    raise
+            else:
+                # a number at the end of the buffer may continue
+                # in the next chunk.
+                if end < len(self.buffer) or self.end_of_file:
+                    self.position = end
+                    return value
+            # the value is incomplete: the buffer is doubled so that
+            # a large value is decoded in a few attempts.
+            self.fill(at_least=len(self.buffer))
+
+    def iter_object(self) -> Iterator[str]:
+        """Yields the keys of an object, leaving each value to decode."""
+        self.expect("{")
+        if self.peek() == "}":
+            self.position += 1
+            return
+        while True:
+            key = self.decode()
+            self.expect(":")
+            yield key
+            if not self.skip_comma():
+                self.expect("}")
+                return
+
+
+def iter_raw_documents(database_path: str = DATABASE_FILE,
+                       chunk_size: int = CHUNK_SIZE) -> Iterator[Document]:
+    """Yields the documents of the database file, deltas not applied."""
+    # TinyDB creates the file empty: it is only written at the first
+    # full save.
+    if (not os.path.exists(database_path)
+            or os.path.getsize(database_path) == 0):
+        return
+    with open(database_path) as database_file:
+        reader = JSONStreamReader(database_file, chunk_size)
+        for table_name in reader.iter_object():
+            for doc_id in reader.iter_object():
+                yield table_name, doc_id, reader.decode()
+
+
+def load_deltas_by_table(
+        deltas_path: str = DELTAS_FILE) -> Dict[str, List[Dict[str, Any]]]:
+    deltas: Dict[str, List[Dict[str, Any]]] = {}
+    if not os.path.exists(deltas_path):
+        return deltas
+    with open(deltas_path) as deltas_file:
+        for line in deltas_file:
+            if line.strip():
+                operation = json.loads(line)
+                deltas.setdefault(operation["table"], []).append(operation)
+    return deltas
+
+
+def patch_table(table_name: str,
+                documents: Iterable[Tuple[str, Dict[str, Any]]],
+                operations: List[Dict[str, Any]]) -> Iterator[Document]:
+    """Yields the documents of a table with its deltas applied."""
+    replacements = [i for i, operation in enumerate(operations)
+                    if "replace" in operation]
+    if replacements:
+        # the table was replaced: the documents of the file are obsolete.
+        for _ in documents:
+            pass
+        table = {}
+        for operation in operations[replacements[-1]:]:
+            apply_operation(table, operation)
+        for doc_id, document in table.get(table_name, {}).items():
+            yield table_name, doc_id, document
+        return
+
+    operations_by_doc: Dict[str, List[Dict[str, Any]]] = {}
+    for operation in operations:
+        operations_by_doc.setdefault(operation["doc_id"], []).append(
+            operation)
+
+    for doc_id, document in documents:
+        document_operations = operations_by_doc.pop(doc_id, [])
+        if document_operations:
+            table = {table_name: {doc_id: document}}
+            for operation in document_operations:
+                apply_operation(table, operation)
+            document = table[table_name][doc_id]
+        yield table_name, doc_id, document
+
+    # the documents only found in the deltas.
+    for doc_id, document_operations in operations_by_doc.items():
+        table = {}
+        for operation in document_operations:
+            apply_operation(table, operation)
+        yield table_name, doc_id, table[table_name][doc_id]
+
+
+def iter_documents(database_path: str = DATABASE_FILE,
+                   deltas_path: str = DELTAS_FILE,
+                   chunk_size: int = CHUNK_SIZE) -> Iterator[Document]:
+    """Yields (table name, doc_id, document) for the whole database.
+
+    The deltas of the incremental saves are applied. Only one document
+    of the database file is in memory at a time, plus the deltas.
+    """
+    deltas = load_deltas_by_table(deltas_path)
+    raw_documents = iter_raw_documents(database_path, chunk_size)
+    for table_name, table_documents in itertools.groupby(
+            raw_documents, key=lambda document: document[0]):
+        documents = ((doc_id, document)
+                     for _, doc_id, document in table_documents)
+        operations = deltas.pop(table_name, [])
+        if operations:
+            yield from patch_table(table_name, documents, operations)
+        else:
+            for doc_id, document in documents:
+                yield table_name, doc_id, document
+
+    # the tables only found in the deltas.
+    for table_name, operations in deltas.items():
+        yield from patch_table(table_name, [], operations)
+
+
+def iter_player_documents(database_path: str = DATABASE_FILE,
+                          deltas_path: str = DELTAS_FILE
+                          ) -> Iterator[Dict[str, Any]]:
+    """Yields the serialized players of all the tournaments."""
+    for _, _, document in iter_documents(database_path, deltas_path):
+        # the player's first key is "last_name".
+        if next(iter(document), None) == "last_name":
+            yield document
+
+
+def iter_tournament_documents(database_path: str = DATABASE_FILE,
+                              deltas_path: str = DELTAS_FILE
+                              ) -> Iterator[Dict[str, Any]]:
+    """Yields the serialized tournaments."""
+    for _, _, document in iter_documents(database_path, deltas_path):
+        # the tournament's first key is "venue".
+        if next(iter(document), None) == "venue":
+            yield document
@@ -0,0 +1,183 @@
+"""Indexes the players of all the tournaments by identity.
+
+Listing the players of all the tournaments used to mean scanning every
+document of the database and guessing which ones are players. The index
+keeps them in a file of their own instead, keyed by a stable identity:
+last name, first name and date of birth. Two players sharing a last
+name are therefore told apart, and the same person is found in every
+tournament they played. The other way round, two players of one
+tournament with the same names and date of birth are taken for the
+same person: the index keeps only the last of them. Registering them
+with different names, e.g. with a middle initial, keeps them apart.
+
+The index file is append-only, one JSON line per player saved:
+
+    {"identity": "...", "tournament": "cheese", "player": {...}}
+
+SaveDataInDB appends the players it saves. When the index is read, the
+last line of each identity and tournament wins. If the index file
+doesn't exist yet, it is built once from the database.
+"""
+
+import json
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from c_13_save_deltas import DATABASE_FILE, DELTAS_FILE
+from c_14_read_model import FileVersion, file_version
+from c_15_stream_reader import iter_documents
+from c_27_profiling import profiler
+
+PLAYER_INDEX_FILE = "players_index.jsonl"
+PLAYER_TABLE_PREFIX = "players_competing_in_"
+
+# once the file holds this many times more lines than players, it is
+# rewritten with one line per player.
+COMPACTION_RATIO = 4
+
+
+def player_identity(serialized_player: Dict[str, Any]) -> str:
+    """Returns the key identifying a player across tournaments.
+
+    Two players with the same names and date of birth share the key.
+    """
+    return "|".join((serialized_player["last_name"],
+                     serialized_player["first_name"],
+                     serialized_player["date_of_birth"]))
+
+
+class PlayerIndex:
+    """The serialized players of all the tournaments, keyed by identity.
+
+    Attributes:
+        path: the path of the index file.
+        entries: the serialized players keyed by identity, then by the
+            name of the tournament they competed in.
+        version: the version of the index file when it was read.
+        lines_number: the number of lines of the index file.
+    """
+    def __init__(self, path: str = PLAYER_INDEX_FILE):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.version: Optional[FileVersion] = None
+        self.lines_number = 0
+
+    def refresh(self):
+        """Reads the index file again if it changed."""
+        version = file_version(self.path)
+        if version == self.version:
+            return
+
+        self.entries = {}
+        self.lines_number = 0
+        if version is not None:
+            with open(self.path) as index_file:
+                for line in index_file:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries.setdefault(entry["identity"], {})[
+                            entry["tournament"]] = entry["player"]
+                        self.lines_number += 1
+        self.version = file_version(self.path)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def record(self, tournament_name: str,
+               serialized_players: Iterable[Dict[str, Any]]):
+        """Appends the players saved for a tournament to the index."""
+        players = [(player_identity(serialized_player), serialized_player)
+                   for serialized_player in serialized_players]
+        lines = [json.dumps({"identity": identity,
+                             "tournament": tournament_name,
+                             "player": serialized_player},
+                            separators=(",", ":"))
+                 for identity, serialized_player in players]
+        if not lines:
+            return
+
+        text = "\n".join(lines) + "\n"
+        self.refresh()
+        with open(self.path, "a") as index_file:
+            index_file.write(text)
+        # the lines just written are added to the entries, instead of
+        # reading the whole file again.
+        for identity, serialized_player in players:
+            self.entries.setdefault(identity, {})[tournament_name] = (
+                serialized_player)
+        self.lines_number += len(lines)
+        self.version = file_version(self.path)
+        profiler.add_bytes(os.path.basename(self.path),
+                           len(text.encode("utf-8")))
+
+        if self.lines_number > COMPACTION_RATIO * self.players_number():
+            self.compact()
+
+    def players_number(self) -> int:
+        return sum(len(tournaments) for tournaments in self.entries.values())
+
+    def compact(self):
+        """Rewrites the index file with one line per player."""
+        self.refresh()
+        temporary_path = self.path + ".tmp"
+        with open(temporary_path, "w") as index_file:
+            for identity, tournament_name, player in self.iter_entries():
+                index_file.write(json.dumps(
+                    {"identity": identity, "tournament": tournament_name,
+                     "player": player}, separators=(",", ":")) + "\n")
+        os.replace(temporary_path, self.path)
+        self.refresh()
+        if profiler.enabled:
+            profiler.add_bytes(os.path.basename(self.path),
+                               os.path.getsize(self.path))
+
+    def iter_entries(self) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        """Yields (identity, tournament name, serialized player)."""
+        self.refresh()
+        for identity, tournaments in self.entries.items():
+            for tournament_name, player in tournaments.items():
+                yield identity, tournament_name, player
+
+    def serialized_players(self) -> List[Dict[str, Any]]:
+        """Returns one serialized player per identity and tournament."""
+        return [player for _, _, player in self.iter_entries()]
+
+
+def rebuild_player_index(player_index: PlayerIndex,
+                         database_path: str = DATABASE_FILE,
+                         deltas_path: str = DELTAS_FILE):
+    """Builds the index from the player tables of the database."""
+    if player_index.exists():
+        os.remove(player_index.path)
+
+    players_by_tournament: Dict[str, List[Dict[str, Any]]] = {}
+    for table_name, _, document in iter_documents(database_path,
+                                                  deltas_path):
+        if table_name.startswith(PLAYER_TABLE_PREFIX):
+            tournament_name = table_name[len(PLAYER_TABLE_PREFIX):]
+            players_by_tournament.setdefault(tournament_name, []).append(
+                document)
+
+    # creating the file even if there is no player: the index exists.
+    open(player_index.path, "a").close()
+    for tournament_name, players in players_by_tournament.items():
+        player_index.record(tournament_name, players)
+
+
+# one index per index file, keyed by absolute path.
+player_indexes: Dict[str, PlayerIndex] = {}
+
+
+def get_player_index() -> PlayerIndex:
+    """Returns the index of the working directory, built if missing.
+
+    Once built, the index already holds every player of the database.
+    """
+    index_path = os.path.abspath(PLAYER_INDEX_FILE)
+    if index_path not in player_indexes:
+        player_indexes[index_path] = PlayerIndex(index_path)
+
+    player_index = player_indexes[index_path]
+    if not player_index.exists():
+        rebuild_player_index(player_index)
+    return player_index
@@ -0,0 +1,443 @@
+"""Defines where the tournaments and their players are stored.
+
+Saving (c_6_save_data.py) and retrieving (c_7_retrieve_data.py) don't
+touch a database themselves. They go through a storage, an object
+offering the methods of the Storage class below. Two storages exist:
+
+    JSONStorage: the TinyDB database db.json, with the deltas of the
+        incremental saves and the index of the players. The default.
+    SQLiteStorage: a SQLite database, see c_18_sqlite_storage.py.
+        Each request is an SQL query using the indexes of the database.
+
+The CHESS_STORAGE environment variable chooses the storage: "json" or
+"sqlite".
+
+Whatever the storage, the requests return the same objects: Player,
+Round and Match instances, and the serialized tournaments.
+"""
+
+import abc
+import copy
+import datetime
+import json
+import os
+from collections.abc import Mapping
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from tinydb import TinyDB
+from tinydb.storages import JSONStorage as TinyDBJSONStorage
+
+from c_13_save_deltas import (DATABASE_FILE, append_deltas, apply_deltas,
+                              clear_deltas, diff_table, has_deltas)
+from c_14_read_model import get_read_model, invalidate_read_models
+from c_15_stream_reader import iter_tournament_documents
+from c_16_player_index import (PLAYER_INDEX_FILE, PLAYER_TABLE_PREFIX,
+                               get_player_index)
+from c_27_profiling import profiler
+from models import Match, Player, Round, Tournament
+
+# the orders in which the players can be listed.
+ALPHABETICAL = "alphabetical"
+BY_RANKING = "ranking"
+
+
+def storage_name_from_environment() -> str:
+    """Returns the storage chosen with the CHESS_STORAGE variable."""
+    storage_name = os.environ.get("CHESS_STORAGE", "json").lower()
+    if storage_name not in ("json", "sqlite"):
+        raise ValueError("CHESS_STORAGE must be either 'json' or 'sqlite'")
+    return storage_name
+
+
+def deserialize_player(serialized_player: Dict[str, Any]) -> Player:
+    player = Player(**dict(
+        serialized_player,
+        result_field=float(serialized_player["result_field"])))
+
+    # the constructor starts the player with no opponent.
+    player.opponents_faced.extend(
+        json.loads(serialized_player["opponents_faced"]))
+    return player
+
+
+def deserialize_match(serialized_match: Dict[str, Any]) -> Match:
+    return Match(serialized_match["player1"], serialized_match["player2"],
+                 serialized_match["result"], serialized_match["round"])
+
+
+class LazyMapping(Mapping):
+    """A read-only dictionary deserializing its values when first read.
+
+    Listing the rounds of a tournament shouldn't deserialize all their
+    matches, nor listing the tournaments all their rounds. The rounds
+    of a deserialized tournament and the matches of a deserialized
+    round are therefore lazy mappings: a value is only built when it is
+    read, then kept.
+
+    Attributes:
+        load: returns the serialized values, keyed like the mapping
+            without the prefix. Only called when the mapping is first
+            read, e.g. to run the SQL query fetching them.
+        build: called with the key and the serialized value to
+            deserialize a value.
+        prefix: added to the serialized keys, e.g. "match" to key the
+            matches "match1", "match2"... like the live rounds do.
+        serialized: the serialized values, once loaded.
+        built: the values already deserialized.
+    """
+    __slots__ = ("load", "build", "prefix", "serialized", "built")
+
+    def __init__(self, load: Callable[[], Dict[str, Any]],
+                 build: Callable[[str, Any], Any], prefix: str = ""):
+        self.load = load
+        self.build = build
+        self.prefix = prefix
+        self.serialized: Optional[Dict[str, Any]] = None
+        self.built: Dict[str, Any] = {}
+
+    def serialized_values(self) -> Dict[str, Any]:
+        if self.serialized is None:
+            self.serialized = self.load()
+        return self.serialized
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.built:
+            serialized_key = key[len(self.prefix):]
+            if not key.startswith(self.prefix) \
+                    or serialized_key not in self.serialized_values():
+                raise KeyError(key)
+            self.built[key] = self.build(
+                key, self.serialized_values()[serialized_key])
+        return self.built[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return (self.prefix + key for key in self.serialized_values())
+
+    def __len__(self) -> int:
+        return len(self.serialized_values())
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+def lazy_matches(load: Callable[[], Dict[str, Any]]) -> LazyMapping:
+    return LazyMapping(load, lambda _, serialized_match: deserialize_match(
+        serialized_match), "match")
+
+
+def deserialize_round(round_name: str, serialized_round: Dict[str, Any],
+                      matches: Optional[LazyMapping] = None) -> Round:
+    """Deserializes a round. Its matches are deserialized when read.
+
+    Args:
+        round_name: the name of the round, e.g. "Round 1".
+        serialized_round: the round, as serialize_round returned it.
+        matches: the matches of the round. By default, the ones of the
+            serialized round.
+    """
+    epoch_s_datetime = datetime.datetime.fromisoformat(
+        serialized_round["start_datetime"]).timestamp()
+    epoch_e_datetime = datetime.datetime.fromisoformat(
+        serialized_round["end_datetime"]).timestamp()
+
+    if matches is None:
+        # the matches of a round saved before its results are "".
+        matches = lazy_matches(lambda: serialized_round["matches"] or {})
+
+    return Round(round_name, serialized_round["tournament"],
+                 epoch_s_datetime, epoch_e_datetime, matches)
+
+
+def deserialize_tournament(tournament_name: str,
+                           serialized_tournament: Dict[str, Any]
+                           ) -> Tournament:
+    """Deserializes a tournament. Its rounds are deserialized when read.
+    """
+    rounds = LazyMapping(lambda: serialized_tournament["rounds"],
+                         deserialize_round)
+    return Tournament(tournament_name,
+                      serialized_tournament["venue"],
+                      serialized_tournament["date"],
+                      serialized_tournament["players number"],
+                      serialized_tournament["description"],
+                      serialized_tournament["time control"],
+                      serialized_tournament["number of rounds"],
+                      rounds)
+
+
+def sort_players(players: List[Player], order: str) -> List[Player]:
+    """Sorts the players alphabetically or by points then ranking."""
+    if order == ALPHABETICAL:
+        return sorted(players, key=attrgetter("last_name"))
+    return sorted(players, key=lambda x: (-x.result_field, x.ranking))
+
+
+class Storage(abc.ABC):
+    """The methods any storage offers.
+
+    A storage missing one of them can't be instantiated.
+
+    The methods taking a tournament name raise a KeyError if nothing is
+    saved under that name.
+    """
+    @abc.abstractmethod
+    def save_tournament(self, tournament: Tournament,
+                        incremental: bool = False):
+        """Saves the tournament with its rounds and matches."""
+
+    @abc.abstractmethod
+    def save_players(self, tournament: Tournament,
+                     incremental: bool = False):
+        """Saves the players of the tournament."""
+
+    @abc.abstractmethod
+    def serialized_tournament(self, tournament_name: str
+                              ) -> Dict[str, Any]:
+        """Returns the tournament as serialize_tournament returned it."""
+
+    @abc.abstractmethod
+    def serialized_players(self, tournament_name: str
+                           ) -> List[Dict[str, Any]]:
+        """Returns the players as serialize_player returned them."""
+
+    @abc.abstractmethod
+    def players_of_tournament(self, tournament_name: str,
+                              order: str) -> List[Player]:
+        """Returns the players of a tournament, ALPHABETICAL or BY_RANKING.
+
+        By ranking, the players are sorted by their ranking attribute.
+        """
+
+    @abc.abstractmethod
+    def players_of_all_tournaments(self, order: str) -> List[Player]:
+        """Returns the players of all the tournaments.
+
+        A player appears once per tournament played. By ranking, the
+        players are sorted by points in decreasing order then by
+        ranking in ascending order.
+        """
+
+    @abc.abstractmethod
+    def all_tournaments(self) -> Iterator[Dict[str, Any]]:
+        """Yields all the serialized tournaments, one at a time.
+
+        The tournaments are read as they are consumed: they don't need
+        to be in memory all at once.
+        """
+
+    @abc.abstractmethod
+    def rounds_of_tournament(self, tournament_name: str) -> List[Round]:
+        """Returns the rounds of a tournament."""
+
+    @abc.abstractmethod
+    def matches_of_tournament(self, tournament_name: str) -> List[Match]:
+        """Returns the matches of all the rounds of a tournament."""
+
+
+class ProfiledTinyDBStorage(TinyDBJSONStorage):
+    """The file storage of TinyDB, counting the bytes it writes.
+
+    TinyDB rewrites the whole file at each write: the size of the file
+    after the write is the number of bytes written.
+    """
+    def __init__(self, path: str, **kwargs):
+        super().__init__(path, **kwargs)
+        self.path = path
+
+    def write(self, data: Dict[str, Dict[str, Any]]):
+        super().write(data)
+        if profiler.enabled:
+            profiler.add_bytes(os.path.basename(self.path),
+                               os.path.getsize(self.path))
+
+
+class JSONStorage(Storage):
+    """Stores the tournaments in db.json through TinyDB.
+
+    Each tournament is a table named after it, and its players a table
+    named players_competing_in_ followed by its name.
+
+    By default, a saved table is truncated then written again, which
+    rewrites the whole database file. An incremental save instead
+    appends to the deltas file only the fields and rounds that changed
+    since the table was last saved, see c_13_save_deltas.py. Either way,
+    the players saved are also added to the index of the players of all
+    the tournaments, see c_16_player_index.py.
+
+    The database is read through the read model from c_14_read_model.py:
+    it is only parsed and deserialized again if the files changed.
+
+    Attributes:
+        db: the TinyDB database.
+        saved_documents: the documents of each table as they were last
+            saved, keyed by table name then doc_id. Incremental saves
+            only write what differs from them.
+    """
+    def __init__(self):
+        self.db = TinyDB(DATABASE_FILE, storage=ProfiledTinyDBStorage,
+                         indent=4, separators=(',', ': '))
+        self.saved_documents: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    def compact_database(self):
+        """Applies the deltas file to the database file, then empties it.
+        """
+        if not has_deltas():
+            return
+        database = self.db.storage.read() or {}
+        self.db.storage.write(apply_deltas(database))
+        clear_deltas()
+
+    def save_players(self, tournament: Tournament,
+                     incremental: bool = False):
+        serialized_players = [player.serialize_player()
+                              for player in tournament.players_instances]
+
+        player_table_name = f"{PLAYER_TABLE_PREFIX}{tournament.name}"
+        previously_saved = self.saved_documents.get(player_table_name, {})
+        self.save_table(player_table_name, serialized_players, incremental)
+
+        # a missing index is built from the database, which already
+        # holds the players just saved: they aren't recorded twice.
+        index_existed = os.path.exists(PLAYER_INDEX_FILE)
+        player_index = get_player_index()
+        if not index_existed:
+            return
+
+        # only the players who changed since the last save are added to
+        # the index of the players of all the tournaments.
+        changed_players = [
+            serialized_player
+            for i, serialized_player in enumerate(serialized_players)
+            if previously_saved.get(str(i + 1)) != serialized_player]
+        player_index.record(tournament.name, changed_players)
+
+    def save_tournament(self, tournament: Tournament,
+                        incremental: bool = False):
+        self.save_table(tournament.name, [tournament.serialize_tournament()],
+                        incremental)
+
+    def save_table(self, table_name: str, documents: List[Dict[str, Any]],
+                   incremental: bool):
+        if incremental:
+            self.save_table_incrementally(table_name, documents)
+        else:
+            # the table is about to be rewritten: older deltas must not
+            # be applied over it.
+            self.compact_database()
+            table = self.db.table(table_name)
+            table.truncate()
+            table.insert_multiple(documents)
+            self.remember_saved_documents(table_name, documents)
+
+        # the files changed: the next request must read them again, even
+        # if their modification time looks the same.
+        invalidate_read_models()
+
+    def remember_saved_documents(self, table_name: str,
+                                 documents: List[Dict[str, Any]]):
+        # TinyDB gives the doc_ids 1, 2, 3... to a truncated table.
+        self.saved_documents[table_name] = {
+            str(i + 1): copy.deepcopy(document)
+            for i, document in enumerate(documents)}
+
+    def save_table_incrementally(self, table_name: str,
+                                 documents: List[Dict[str, Any]]):
+        """Appends to the deltas file what changed since the last save.
+
+        The first time a table is saved, it is written whole to the
+        deltas file. Afterwards, only the changed fields of the
+        documents are.
+        """
+        new_documents = {str(i + 1): document
+                         for i, document in enumerate(documents)}
+        append_deltas(diff_table(table_name,
+                                 self.saved_documents.get(table_name),
+                                 new_documents))
+        self.remember_saved_documents(table_name, documents)
+
+    @staticmethod
+    def find_table(table_name: str) -> Dict[str, Dict[str, Any]]:
+        # the database is shared by all the requests: it is read,
+        # never modified.
+        database = get_read_model().read()
+        if table_name not in database:
+            raise KeyError("the table you're searching wasn't found."
+                           " Please, check your spelling")
+        return database[table_name]
+
+    def serialized_tournament(self, tournament_name: str
+                              ) -> Dict[str, Any]:
+        # the table holds a single document: the tournament.
+        return next(iter(self.find_table(tournament_name).values()))
+
+    def serialized_players(self, tournament_name: str
+                           ) -> List[Dict[str, Any]]:
+        return list(self.find_table(
+            f"{PLAYER_TABLE_PREFIX}{tournament_name}").values())
+
+    def players_of_tournament(self, tournament_name: str,
+                              order: str) -> List[Player]:
+        players = get_read_model().cached(
+            ("players", tournament_name),
+            lambda: [deserialize_player(serialized_player)
+                     for serialized_player in self.find_table(
+                         f"{PLAYER_TABLE_PREFIX}{tournament_name}").values()])
+
+        if order == ALPHABETICAL:
+            return sorted(players, key=attrgetter("last_name"))
+        return sorted(players, key=attrgetter("ranking"))
+
+    def players_of_all_tournaments(self, order: str) -> List[Player]:
+        # the players are read from the index of the players of all the
+        # tournaments, not searched among all the documents.
+        players = get_read_model().cached(
+            "all players",
+            lambda: [deserialize_player(serialized_player)
+                     for serialized_player
+                     in get_player_index().serialized_players()])
+        return sort_players(players, order)
+
+    def all_tournaments(self) -> Iterator[Dict[str, Any]]:
+        # the database is streamed, and the tournaments aren't kept in
+        # the read model: only one tournament is in memory at a time.
+        return iter_tournament_documents()
+
+    def tournament(self, tournament_name: str) -> Tournament:
+        return get_read_model().cached(
+            ("tournament", tournament_name),
+            lambda: deserialize_tournament(
+                tournament_name, self.serialized_tournament(tournament_name)))
+
+    def rounds_of_tournament(self, tournament_name: str) -> List[Round]:
+        return list(self.tournament(tournament_name).rounds.values())
+
+    def matches_of_tournament(self, tournament_name: str) -> List[Match]:
+        return [match
+                for round in self.rounds_of_tournament(tournament_name)
+                for match in round.matches.values()]
+
+
+# one storage per kind and database folder.
+storages: Dict[Any, Storage] = {}
+
+
+def get_storage(storage_name: Optional[str] = None) -> Storage:
+    """Returns the storage of the working directory.
+
+    Args:
+        storage_name: "json" or "sqlite". By default, the one chosen
+            with the CHESS_STORAGE environment variable.
+    """
+    if storage_name is None:
+        storage_name = storage_name_from_environment()
+
+    key = (storage_name, os.path.abspath(DATABASE_FILE))
+    if key not in storages:
+        if storage_name == "sqlite":
+            # imported here: c_18 builds upon this module.
+            from c_18_sqlite_storage import SQLiteStorage
+            storages[key] = SQLiteStorage()
+        else:
+            storages[key] = JSONStorage()
+    return storages[key]
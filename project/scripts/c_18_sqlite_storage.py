@@ -0,0 +1,325 @@
+"""Stores the tournaments in a SQLite database.
+
+Unlike db.json, the SQLite database doesn't need to be read whole to
+answer a request, nor written whole to save a table. The data is split
+in four tables, one row per tournament, player, round and match:
+
+    tournaments: the tournaments, keyed by name.
+    players: the players, keyed by tournament name and position.
+    rounds: the rounds, keyed by tournament name and position.
+    matches: the matches, keyed by tournament name, round position
+        and position.
+
+The tournament name comes first in the keys of the players, rounds and
+matches, so the key is also the index used to find the ones of a
+tournament. The players are also indexed by last name, by ranking and
+by points, which are the orders the requests list them in.
+
+The serialized players and tournaments are the same as in db.json:
+whatever the storage, a request returns the same objects.
+"""
+
+import functools
+import os
+import sqlite3
+from typing import Any, Dict, Iterable, Iterator, List
+
+from c_17_storage import (ALPHABETICAL, Storage, deserialize_match,
+                          deserialize_player, deserialize_round,
+                          lazy_matches)
+from c_27_profiling import profiler
+from models import Match, Player, Round, Tournament
+
+SQLITE_DATABASE_FILE = "db.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tournaments (
+    name TEXT PRIMARY KEY,
+    venue TEXT,
+    date TEXT,
+    players_number TEXT,
+    description TEXT,
+    time_control TEXT,
+    number_of_rounds TEXT
+);
+CREATE TABLE IF NOT EXISTS players (
+    tournament TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    player_id TEXT,
+    last_name TEXT,
+    first_name TEXT,
+    date_of_birth TEXT,
+    sex TEXT,
+    ranking INTEGER,
+    result_field REAL,
+    opponents_faced TEXT,
+    PRIMARY KEY (tournament, position)
+);
+CREATE TABLE IF NOT EXISTS rounds (
+    tournament TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT,
+    start_datetime TEXT,
+    end_datetime TEXT,
+    PRIMARY KEY (tournament, position)
+);
+CREATE TABLE IF NOT EXISTS matches (
+    tournament TEXT NOT NULL,
+    round_position INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    player1 TEXT,
+    player2 TEXT,
+    player1_id TEXT,
+    player2_id TEXT,
+    result TEXT,
+    round TEXT,
+    PRIMARY KEY (tournament, round_position, position)
+);
+CREATE INDEX IF NOT EXISTS players_by_last_name
+    ON players (last_name);
+CREATE INDEX IF NOT EXISTS players_by_ranking
+    ON players (tournament, ranking);
+CREATE INDEX IF NOT EXISTS players_by_points
+    ON players (result_field DESC, ranking);
+"""
+
+PLAYER_COLUMNS = ("last_name", "first_name", "date_of_birth", "sex",
+                  "ranking", "opponents_faced", "result_field", "player_id")
+MATCH_COLUMNS = ("player1", "player2", "result", "round", "player1_id",
+                 "player2_id")
+
+
+def serialized_player_from_row(row: sqlite3.Row) -> Dict[str, Any]:
+    """Returns the player as serialized in db.json."""
+    serialized_player = {column: str(row[column])
+                         for column in PLAYER_COLUMNS}
+    if row["player_id"] is None:
+        del serialized_player["player_id"]
+    return serialized_player
+
+
+def serialized_match_from_row(row: sqlite3.Row) -> Dict[str, Any]:
+    """Returns the match as serialized in db.json."""
+    return {column: row[column] for column in MATCH_COLUMNS
+            if row[column] is not None}
+
+
+def rows_size(rows: Iterable[tuple]) -> int:
+    """Returns the bytes of the values of the rows, written as text."""
+    return sum(len(str(value).encode("utf-8"))
+               for row in rows for value in row if value is not None)
+
+
+class SQLiteStorage(Storage):
+    """Stores the tournaments in db.sqlite3.
+
+    Each save replaces the rows of a single tournament in a transaction.
+    The incremental saves of db.json are therefore pointless here: all
+    the saves only write what they save.
+
+    Attributes:
+        connection: the connection to the database.
+        file_name: the name of the database file, under which the bytes
+            written are profiled.
+    """
+    def __init__(self, database_path: str = SQLITE_DATABASE_FILE):
+        self.file_name = os.path.basename(database_path)
+        self.connection = sqlite3.connect(database_path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(SCHEMA)
+
+    def save_tournament(self, tournament: Tournament,
+                        incremental: bool = False):
+        serialized_tournament = tournament.serialize_tournament()
+
+        rounds_rows = []
+        matches_rows = []
+        for round_position, (round_name, serialized_round) in enumerate(
+                serialized_tournament["rounds"].items()):
+            rounds_rows.append((tournament.name, round_position, round_name,
+                                serialized_round["start_datetime"],
+                                serialized_round["end_datetime"]))
+            # the matches of a round saved before its results are "".
+            for match_number, serialized_match in (
+                    serialized_round["matches"] or {}).items():
+                matches_rows.append(
+                    (tournament.name, round_position, int(match_number))
+                    + tuple(serialized_match.get(column)
+                            for column in MATCH_COLUMNS))
+
+        tournament_row = (tournament.name, serialized_tournament["venue"],
+                          serialized_tournament["date"],
+                          serialized_tournament["players number"],
+                          serialized_tournament["description"],
+                          serialized_tournament["time control"],
+                          serialized_tournament["number of rounds"])
+        with self.connection:
+            # updating the tournament row rather than replacing it keeps
+            # the tournaments in the order they were first saved.
+            self.connection.execute(
+                "INSERT INTO tournaments VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET venue = excluded.venue, "
+                "date = excluded.date, "
+                "players_number = excluded.players_number, "
+                "description = excluded.description, "
+                "time_control = excluded.time_control, "
+                "number_of_rounds = excluded.number_of_rounds",
+                tournament_row)
+            self.connection.execute(
+                "DELETE FROM rounds WHERE tournament = ?", (tournament.name,))
+            self.connection.execute(
+                "DELETE FROM matches WHERE tournament = ?",
+                (tournament.name,))
+            self.connection.executemany(
+                "INSERT INTO rounds VALUES (?, ?, ?, ?, ?)", rounds_rows)
+            self.connection.executemany(
+                "INSERT INTO matches (tournament, round_position, position, "
+                + ", ".join(MATCH_COLUMNS) + ") "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", matches_rows)
+        if profiler.enabled:
+            profiler.add_bytes(self.file_name, rows_size(
+                [tournament_row] + rounds_rows + matches_rows))
+
+    def save_players(self, tournament: Tournament,
+                     incremental: bool = False):
+        players_rows = []
+        for position, player in enumerate(tournament.players_instances):
+            serialized_player = player.serialize_player()
+            players_rows.append(
+                (tournament.name, position,
+                 serialized_player.get("player_id"),
+                 serialized_player["last_name"],
+                 serialized_player["first_name"],
+                 serialized_player["date_of_birth"],
+                 serialized_player["sex"],
+                 int(serialized_player["ranking"]),
+                 float(serialized_player["result_field"]),
+                 serialized_player["opponents_faced"]))
+
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM players WHERE tournament = ?",
+                (tournament.name,))
+            self.connection.executemany(
+                "INSERT INTO players VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                players_rows)
+        if profiler.enabled:
+            profiler.add_bytes(self.file_name, rows_size(players_rows))
+
+    def select(self, query: str, parameters: Iterable = ()
+               ) -> List[sqlite3.Row]:
+        return self.connection.execute(query, tuple(parameters)).fetchall()
+
+    def check_tournament_exists(self, tournament_name: str,
+                                table_name: str = "tournaments"):
+        column = "name" if table_name == "tournaments" else "tournament"
+        if not self.select(f"SELECT 1 FROM {table_name} "
+                           f"WHERE {column} = ? LIMIT 1", (tournament_name,)):
+            raise KeyError("the table you're searching wasn't found."
+                           " Please, check your spelling")
+
+    def players_of_tournament(self, tournament_name: str,
+                              order: str) -> List[Player]:
+        order_by = "last_name" if order == ALPHABETICAL else "ranking"
+        rows = self.select(f"SELECT * FROM players WHERE tournament = ? "
+                           f"ORDER BY {order_by}, position",
+                           (tournament_name,))
+        if not rows:
+            self.check_tournament_exists(tournament_name, "players")
+        return [deserialize_player(serialized_player_from_row(row))
+                for row in rows]
+
+    def players_of_all_tournaments(self, order: str) -> List[Player]:
+        order_by = ("last_name" if order == ALPHABETICAL
+                    else "result_field DESC, ranking")
+        rows = self.select(f"SELECT * FROM players ORDER BY {order_by}")
+        return [deserialize_player(serialized_player_from_row(row))
+                for row in rows]
+
+    def serialized_rounds(self, tournament_name: str
+                          ) -> Dict[str, Dict[str, Any]]:
+        """Returns the rounds of a tournament as serialized in db.json."""
+        serialized_rounds = {}
+        rounds_by_position = {}
+        for row in self.select("SELECT * FROM rounds WHERE tournament = ? "
+                               "ORDER BY position", (tournament_name,)):
+            serialized_round = {"tournament": tournament_name,
+                                "start_datetime": row["start_datetime"],
+                                "end_datetime": row["end_datetime"],
+                                "matches": {}}
+            serialized_rounds[row["name"]] = serialized_round
+            rounds_by_position[row["position"]] = serialized_round
+
+        for row in self.select("SELECT * FROM matches WHERE tournament = ? "
+                               "ORDER BY round_position, position",
+                               (tournament_name,)):
+            rounds_by_position[row["round_position"]]["matches"][
+                str(row["position"])] = serialized_match_from_row(row)
+        return serialized_rounds
+
+    def serialized_tournament_from_row(self, row: sqlite3.Row
+                                       ) -> Dict[str, Any]:
+        return {"venue": row["venue"],
+                "date": row["date"],
+                "players number": row["players_number"],
+                "description": row["description"],
+                "time control": row["time_control"],
+                "number of rounds": row["number_of_rounds"],
+                "rounds": self.serialized_rounds(row["name"])}
+
+    def serialized_tournament(self, tournament_name: str
+                              ) -> Dict[str, Any]:
+        rows = self.select("SELECT * FROM tournaments WHERE name = ?",
+                           (tournament_name,))
+        if not rows:
+            self.check_tournament_exists(tournament_name)
+        return self.serialized_tournament_from_row(rows[0])
+
+    def serialized_players(self, tournament_name: str
+                           ) -> List[Dict[str, Any]]:
+        self.check_tournament_exists(tournament_name, "players")
+        return [serialized_player_from_row(row)
+                for row in self.select("SELECT * FROM players "
+                                       "WHERE tournament = ? "
+                                       "ORDER BY position",
+                                       (tournament_name,))]
+
+    def all_tournaments(self) -> Iterator[Dict[str, Any]]:
+        # the cursor fetches the rows as they are consumed, unlike
+        # select.
+        for row in self.connection.execute("SELECT * FROM tournaments "
+                                           "ORDER BY rowid"):
+            yield self.serialized_tournament_from_row(row)
+
+    def serialized_matches(self, tournament_name: str,
+                           round_position: int) -> Dict[str, Any]:
+        """Returns the matches of a round as serialized in db.json."""
+        return {str(row["position"]): serialized_match_from_row(row)
+                for row in self.select(
+                    "SELECT * FROM matches WHERE tournament = ? "
+                    "AND round_position = ? ORDER BY position",
+                    (tournament_name, round_position))}
+
+    def rounds_of_tournament(self, tournament_name: str) -> List[Round]:
+        self.check_tournament_exists(tournament_name)
+
+        # the matches of a round are only queried if they are read.
+        rounds = []
+        for row in self.select("SELECT * FROM rounds WHERE tournament = ? "
+                               "ORDER BY position", (tournament_name,)):
+            serialized_round = {"tournament": tournament_name,
+                                "start_datetime": row["start_datetime"],
+                                "end_datetime": row["end_datetime"]}
+            matches = lazy_matches(functools.partial(
+                self.serialized_matches, tournament_name, row["position"]))
+            rounds.append(deserialize_round(row["name"], serialized_round,
+                                            matches))
+        return rounds
+
+    def matches_of_tournament(self, tournament_name: str) -> List[Match]:
+        self.check_tournament_exists(tournament_name)
+        rows = self.select("SELECT * FROM matches WHERE tournament = ? "
+                           "ORDER BY round_position, position",
+                           (tournament_name,))
+        return [deserialize_match(serialized_match_from_row(row))
+                for row in rows]
@@ -0,0 +1,295 @@
+"""Journals the results and overrides to recover from a crash.
+
+Nothing is saved in the database unless the manager asks for it after
+a round. If the program stops during a round, the results entered are
+lost. The journal prevents that: every result accepted and every
+override is appended to the journal file of the tournament, and the
+file is synced to the disk before the program goes on.
+
+The journal is made of one JSON list per line:
+
+    ["p", 2, [[0, 5], [3, 1]]]: the pairs of round 2, by player_id.
+    ["r", 2, 0, "W"]: the result of the first match of round 2.
+    ["d", "new description"]: the description was overridden.
+    ["k", "Carlsen", 3]: the player Carlsen was given the ranking 3.
+
+Replaying the whole journal would take longer as the tournament goes
+on. So, when the players are registered and after each round, the
+whole state of the tournament is written to a snapshot file, along
+with the size of the journal at that time. Recovering a tournament
+reads the snapshot, then only replays the part of the journal written
+after it: the pairs and results of the round interrupted and the
+overrides. The pairs are journaled because they can't always be
+computed again: the optimal pairing stops when its time is up, and the
+pairing chosen may not be the one the tournament was started with.
+"""
+
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from c_2_pairing_subsequent_rounds import plan_round
+from c_8_modify_attributes import (change_player_ranking,
+                                   change_tournament_description)
+from c_9_time_control import Clock
+from c_11_engine import TournamentEngine
+from c_17_storage import deserialize_player
+from models import (MATCH_RESULTS, Match, OpponentMatrix, Round, RoundPlan,
+                    Standings, Tournament)
+
+JOURNAL_SUFFIX = ".journal.jsonl"
+SNAPSHOT_SUFFIX = ".snapshot.json"
+
+
+def journal_path(tournament_name: str) -> str:
+    return f"{tournament_name}{JOURNAL_SUFFIX}"
+
+
+def snapshot_path(tournament_name: str) -> str:
+    return f"{tournament_name}{SNAPSHOT_SUFFIX}"
+
+
+def has_snapshot(tournament_name: str) -> bool:
+    """Returns True if an unfinished tournament can be recovered."""
+    return os.path.exists(snapshot_path(tournament_name))
+
+
+def drop_torn_line(path: str):
+    """Removes the end of the file after its last complete line.
+
+    A crash while appending may leave half a line at the end of the
+    journal. It is dropped: the next line appended would follow it.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as journal_file:
+        content = journal_file.read()
+        if content and not content.endswith(b"\n"):
+            journal_file.truncate(content.rfind(b"\n") + 1)
+
+
+class MatchJournal:
+    """Appends the results and overrides of a tournament to its journal.
+
+    Attributes:
+        tournament_name: the name of the tournament journaled.
+        journal_file: the journal, opened for appending.
+        recorded_results: the results already in the journal, keyed by
+            round number and match index. A result entered by the user,
+            then given to the controllers, is only journaled once.
+    """
+    def __init__(self, tournament_name: str):
+        self.tournament_name = tournament_name
+        drop_torn_line(journal_path(tournament_name))
+        self.journal_file = open(journal_path(tournament_name), "ab")
+        self.recorded_results: Dict[Tuple[int, int], str] = {}
+
+    def append(self, entries: List[List[Any]]):
+        """Appends the entries, then waits for them to be on the disk."""
+        if not entries:
+            return
+        lines = b"".join(
+            json.dumps(entry, separators=(",", ":")).encode() + b"\n"
+            for entry in entries)
+        self.journal_file.write(lines)
+        self.journal_file.flush()
+        os.fsync(self.journal_file.fileno())
+
+    def record_results(self, round_number: int, first_match_index: int,
+                       results: List[str]):
+        """Journals the results of consecutive matches of a round."""
+        entries = []
+        for match_index, result in enumerate(results, first_match_index):
+            if self.recorded_results.get(
+                    (round_number, match_index)) != result:
+                entries.append(["r", round_number, match_index, result])
+                self.recorded_results[round_number, match_index] = result
+        self.append(entries)
+
+    def record_plan(self, round_number: int, plan: RoundPlan):
+        """Journals the pairs of a round, by player_id."""
+        self.append([["p", round_number,
+                      [[player1.player_id, player2.player_id]
+                       for player1, player2 in plan.pairs]]])
+
+    def record_description(self, new_description: str):
+        self.append([["d", new_description]])
+
+    def record_ranking(self, which_player: str, new_ranking: int):
+        self.append([["k", which_player, new_ranking]])
+
+    def write_snapshot(self, tournament: Tournament, round_number: int):
+        """Writes the state of the tournament, replacing the last snapshot.
+
+        Args:
+            tournament: the tournament journaled.
+            round_number: the number of the round taking place.
+        """
+        snapshot = {
+            "journal_offset": self.journal_file.tell(),
+            "round_number": round_number,
+            "tournament": serialize_tournament_state(tournament),
+        }
+        # the new snapshot only replaces the old one once on the disk:
+        # a crash while writing it leaves the old one.
+        path = snapshot_path(self.tournament_name)
+        with open(path + ".tmp", "w") as snapshot_file:
+            json.dump(snapshot, snapshot_file, separators=(",", ":"))
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+        os.replace(path + ".tmp", path)
+
+        # the results older than the snapshot are never read again.
+        self.recorded_results = {
+            key: result for key, result in self.recorded_results.items()
+            if key[0] >= round_number}
+
+    def close(self):
+        self.journal_file.close()
+
+    def discard(self):
+        """Removes the journal and the snapshot of a finished tournament."""
+        self.close()
+        for path in (journal_path(self.tournament_name),
+                     snapshot_path(self.tournament_name)):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def serialize_tournament_state(tournament: Tournament) -> Dict[str, Any]:
+    """Returns all the data needed to rebuild the tournament.
+
+    Unlike serialize_tournament, the rounds keep their epoch datetimes
+    and the matches refer to the players by player_id.
+    """
+    rounds = {}
+    for round_name, round in tournament.rounds.items():
+        matches = [[match.player1.player_id, match.player2.player_id,
+                    match.result]
+                   for match in (round.matches or {}).values()]
+        rounds[round_name] = [round.start_datetime, round.end_datetime,
+                              matches]
+
+    return {"name": tournament.name,
+            "venue": tournament.venue,
+            "date": str(tournament.date),
+            "players number": tournament.players_number,
+            "description": tournament.description,
+            "time control": tournament.time_control,
+            "number of rounds": tournament.number_of_rounds,
+            "players": [player.serialize_player()
+                        for player in tournament.players_instances],
+            "rounds": rounds}
+
+
+def deserialize_tournament_state(state: Dict[str, Any]) -> Tournament:
+    """Rebuilds the tournament, its players, rounds and matches."""
+    tournament = Tournament(state["name"], state["venue"], state["date"],
+                            state["players number"], state["description"],
+                            state["time control"], state["number of rounds"])
+
+    # the players are in the order they were registered: their index is
+    # their player_id.
+    players = [deserialize_player(serialized_player)
+               for serialized_player in state["players"]]
+    tournament.players_instances = players
+    tournament.standings = Standings(players)
+    tournament.opponent_matrix = OpponentMatrix(len(players))
+
+    tournament.rounds = {}
+    for round_name, (start, end, matches) in state["rounds"].items():
+        round = Round(round_name, tournament, start, end)
+        if matches:
+            round.matches = {}
+            for i, (player_id1, player_id2, result) in enumerate(matches):
+                round.matches[f"match{i + 1}"] = Match(
+                    players[player_id1], players[player_id2], result, round)
+                tournament.opponent_matrix.record_match(player_id1,
+                                                        player_id2)
+        tournament.rounds[round_name] = round
+
+    return tournament
+
+
+def read_journal_tail(path: str, offset: int) -> List[List[Any]]:
+    """Returns the entries written after the offset, torn line excluded."""
+    if not os.path.exists(path):
+        return []
+    with open(path, "rb") as journal_file:
+        journal_file.seek(offset)
+        tail = journal_file.read()
+    return [json.loads(line) for line in tail.split(b"\n")[:-1]
+            if line.strip()]
+
+
+def recover_tournament(tournament_name: str, clock: Clock = None,
+                       pairing: Optional[Callable] = None
+                       ) -> Tuple[TournamentEngine, List[str]]:
+    """Rebuilds a tournament from its last snapshot and its journal.
+
+    The entries written since the snapshot are replayed in order. The
+    pairs journaled become the plan of their round, so the results are
+    given to the players who played them. The results of a round are
+    recorded once all of them were journaled. A
+    result other than "W", "L" or "D", e.g. journaled by an older
+    version of the program, is reported and skipped: it is asked for
+    again.
+
+    Args:
+        tournament_name: the name of the tournament to recover.
+        clock: the clock of the engine returned.
+        pairing: the pairing of the tournament, see models.py. It pairs
+            the rounds whose pairs weren't journaled.
+
+    Returns: the engine running the tournament, with a journal attached
+        to the tournament, and the results already journaled for the
+        round taking place.
+
+    Raises:
+        FileNotFoundError: the tournament has no snapshot.
+    """
+    with open(snapshot_path(tournament_name)) as snapshot_file:
+        snapshot = json.load(snapshot_file)
+
+    tournament = deserialize_tournament_state(snapshot["tournament"])
+    tournament.pairing = pairing
+    engine = TournamentEngine(tournament, clock)
+    engine.round_number = snapshot["round_number"]
+
+    pending_results: Dict[int, str] = {}
+    for entry in read_journal_tail(journal_path(tournament_name),
+                                   snapshot["journal_offset"]):
+        if entry[0] == "d":
+            change_tournament_description(tournament, entry[1])
+        elif entry[0] == "k":
+            change_player_ranking(tournament, entry[1], entry[2])
+        elif entry[0] == "p" and entry[1] == engine.round_number:
+            round = tournament.rounds[f"Round {entry[1]}"]
+            players = tournament.players_instances
+            round.plan = RoundPlan(round.name_field, tuple(
+                (players[player_id1], players[player_id2])
+                for player_id1, player_id2 in entry[2]))
+        elif entry[0] == "r" and entry[3] not in MATCH_RESULTS:
+            print(f"the journal holds the wrong result {entry[3]!r} for "
+                  f"match {entry[2] + 1} of round {entry[1]}: it is "
+                  f"skipped.")
+        elif entry[0] == "r" and entry[1] == engine.round_number:
+            pending_results[entry[2]] = entry[3]
+            matches_number = len(plan_round(tournament,
+                                            engine.round_number).pairs)
+            if len(pending_results) == matches_number:
+                engine.record_results([pending_results[i]
+                                       for i in range(matches_number)])
+                pending_results = {}
+
+    # the results of the round taking place, up to the first missing.
+    known_results = []
+    while len(known_results) in pending_results:
+        known_results.append(pending_results[len(known_results)])
+
+    journal = MatchJournal(tournament_name)
+    journal.recorded_results = {
+        (engine.round_number, i): result
+        for i, result in pending_results.items()}
+    tournament.journal = journal
+    return engine, known_results
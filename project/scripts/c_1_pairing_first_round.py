@@ -1,61 +1,30 @@
 """Pairs players for the first round.
 """
 
-from typing import List, Tuple, Callable
+from typing import Iterable, List, Tuple
 
-from models import Player, Tournament
+from c_27_profiling import profiled
+from models import Player, RoundPlan, Tournament
 
 
-def shorten_player_repr(players: List[Player]):
-    overriding_method = {
-        '__str__': lambda self: self.__getattribute__('last_name')}
-
-    for player in players:
-        player.__class__ = type(
-            'class_with_shorter_representation_inheriting_from_Player',
-            (Player,),
-            overriding_method)
-        yield player
-
-
-def lengthen_player_repr(players: List[Player]):
-    for player in players:
-        player.__class__ = Player
-        yield player
-
-
-def beautify_player_representation(func: Callable) -> Callable:
-    """Modifies the representation of the player object.
-
-    Decorator overriding the __repr__ method of the object. Makes it more
-    readable for the user. After the decorated function returns its value,
-    the __repr__ method of the objects is set back to original.
-
-    Args:
-        func: A function taking a tournament instance as sole argument. The
-            decoration only makes sense if the function
-            displays data about the player objects contained in the
-            player_instances attribute of the tournament.
-
-    Returns: Decorated function.
+def short_player_repr(player: Player) -> str:
+    """Returns the representation of a player used in announcements.
 
+    The full representation of the player object is long. Only the last
+    name is shown to the user when announcing the pairing or the
+    ranking. The player object itself is left untouched.
     """
-    def wrapper(tournament: Tournament):
-        # shortening the player's obj repr to make it more readable.
-        shortened_representation_players = []
-        for player in shorten_player_repr(tournament.players_instances):
-            shortened_representation_players.append(player)
+    return player.last_name
 
-        func(tournament)
 
-        # restoring the object representation for further uses.
-        restored_representation_players = []
-        for player in lengthen_player_repr(tournament.players_instances):
-            restored_representation_players.append(player)
-
-    return wrapper
+def announce_pairs(pairs: Iterable[Tuple[Player, Player]]) -> List[str]:
+    """Formats the matches of a round, one string per match."""
+    return [f'{short_player_repr(player1)} will meet '
+            f'{short_player_repr(player2)}'
+            for player1, player2 in pairs]
 
 
+@profiled("pairing_first_round")
 def pairing_for_first_round(
         players: List[Player]) -> List[Tuple[Player, Player]]:
     half = len(players) // 2
@@ -68,7 +37,23 @@ def pairing_for_first_round(
     return pairing
 
 
-@beautify_player_representation
+def plan_first_round(tournament: Tournament) -> RoundPlan:
+    """Returns the pairing of the first round, computing it only once.
+
+    The plan is cached in the plan attribute of the first round. The
+    rounds must have been instantiated beforehand.
+
+    Args:
+        tournament: The tournament that is taking place.
+    """
+    first_round = tournament.rounds["Round 1"]
+    if first_round.plan is None:
+        pairs = pairing_for_first_round(tournament.players_instances)
+        first_round.plan = RoundPlan(first_round.name_field, tuple(pairs))
+
+    return first_round.plan
+
+
 def announce_pairing_for_first_round(tournament: Tournament) -> List[str]:
     """Displays the matches that will take place in the first round.
 
@@ -84,11 +69,10 @@ def announce_pairing_for_first_round(tournament: Tournament) -> List[str]:
 
     Returns: The matches that will take place.
     """
-    pairs = pairing_for_first_round(tournament.players_instances)
+    pairs = plan_first_round(tournament).pairs
 
     pairing_announcement = ["For the first round"]
-    for pair in pairs:
-        pairing_announcement.append(f'{pair[0]} will meet {pair[1]}')
+    pairing_announcement.extend(announce_pairs(pairs))
 
     print(f"\nthe matches for the following round are:"
           f"\n{pairing_announcement}\n")
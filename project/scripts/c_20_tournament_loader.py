@@ -0,0 +1,152 @@
+"""Loads a saved tournament with all its objects linked to each other.
+
+The requests of c_7_retrieve_data.py return the tournament as it is
+serialized: its matches refer to the players by last name, and it has
+no players. The loader rebuilds the objects the tournament had while it
+took place instead:
+
+    the players, with their standings and the opponents they met;
+    the rounds, named "Round 1", "Round 2"... and linked to the
+    tournament;
+    the matches, holding the Player instances and their Round.
+
+The references are resolved through an identity map: a dictionary from
+player_id, or last name for the players saved before the ids existed,
+to the single Player instance of that player. Each match then finds its
+players in constant time, so the tournament is loaded in one pass over
+its players, rounds and matches.
+
+The loaded tournament can be run further by the engine, see
+resume_tournament.
+"""
+
+import datetime
+from typing import Any, Dict, List, Optional
+
+from c_9_time_control import Clock
+from c_11_engine import TournamentEngine
+from c_17_storage import Storage, deserialize_player, get_storage
+from models import (Match, OpponentMatrix, Player, Round, RoundPlan,
+                    Standings, Tournament)
+
+
+def epoch_from_datetime(beautified_datetime: str) -> float:
+    return datetime.datetime.fromisoformat(beautified_datetime).timestamp()
+
+
+def build_identity_map(players: List[Player]) -> Dict[Any, Player]:
+    """Returns the players keyed by player_id and by last name."""
+    identity_map: Dict[Any, Player] = {}
+    for player in players:
+        identity_map[player.player_id] = player
+        # a last name shared by two players refers to the first one, as
+        # it does in the rest of the program.
+        identity_map.setdefault(player.last_name, player)
+    return identity_map
+
+
+def find_player(identity_map: Dict[Any, Player],
+                serialized_match: Dict[str, Any], which: str) -> Player:
+    """Returns the player1 or player2 of a serialized match."""
+    player_id = serialized_match.get(f"{which}_id")
+    if player_id is not None:
+        return identity_map[int(player_id)]
+    return identity_map[serialized_match[which]]
+
+
+def link_tournament(tournament_name: str,
+                    serialized_tournament: Dict[str, Any],
+                    serialized_players: List[Dict[str, Any]]
+                    ) -> Tournament:
+    """Rebuilds the tournament and links its players, rounds and matches.
+
+    Args:
+        tournament_name: the name of the tournament.
+        serialized_tournament: the tournament, as serialize_tournament
+            returned it.
+        serialized_players: its players, as serialize_player returned
+            them, in the order they were registered.
+
+    Raises:
+        KeyError: a match refers to a player who isn't in the tournament.
+    """
+    tournament = Tournament(tournament_name,
+                            serialized_tournament["venue"],
+                            serialized_tournament["date"],
+                            serialized_tournament["players number"],
+                            serialized_tournament["description"],
+                            serialized_tournament["time control"],
+                            serialized_tournament["number of rounds"])
+
+    players = [deserialize_player(serialized_player)
+               for serialized_player in serialized_players]
+    for player_id, player in enumerate(players):
+        # the players saved before the ids existed get the one they
+        # would have been given when registered.
+        if player.player_id is None:
+            player.player_id = player_id
+    identity_map = build_identity_map(players)
+
+    tournament.players_instances = players
+    tournament.standings = Standings(players)
+    tournament.opponent_matrix = OpponentMatrix(len(players))
+
+    tournament.rounds = {}
+    for round_name, serialized_round in serialized_tournament[
+            "rounds"].items():
+        round = Round(round_name, tournament,
+                      epoch_from_datetime(serialized_round["start_datetime"]),
+                      epoch_from_datetime(serialized_round["end_datetime"]))
+
+        # the matches of a round saved before its results are "".
+        serialized_matches = serialized_round["matches"] or {}
+        if serialized_matches:
+            round.matches = {}
+            pairs = []
+            for match_number, serialized_match in serialized_matches.items():
+                player1 = find_player(identity_map, serialized_match,
+                                      "player1")
+                player2 = find_player(identity_map, serialized_match,
+                                      "player2")
+                round.matches[f"match{match_number}"] = Match(
+                    player1, player2, serialized_match["result"], round)
+                tournament.opponent_matrix.record_match(player1.player_id,
+                                                        player2.player_id)
+                pairs.append((player1, player2))
+            round.plan = RoundPlan(round_name, tuple(pairs))
+
+        tournament.rounds[round_name] = round
+
+    return tournament
+
+
+def load_tournament(tournament_name: str,
+                    storage: Optional[Storage] = None) -> Tournament:
+    """Loads a saved tournament with its players, rounds and matches.
+
+    Args:
+        tournament_name: the name of the tournament.
+        storage: where the tournament was saved. By default, the storage
+            chosen with the CHESS_STORAGE environment variable.
+
+    Raises:
+        KeyError: the tournament or its players weren't saved.
+    """
+    if storage is None:
+        storage = get_storage()
+    return link_tournament(tournament_name,
+                           storage.serialized_tournament(tournament_name),
+                           storage.serialized_players(tournament_name))
+
+
+def resume_tournament(tournament_name: str, clock: Clock = None,
+                      storage: Optional[Storage] = None) -> TournamentEngine:
+    """Returns an engine running a saved tournament from where it stopped.
+
+    The round taking place is the first round without matches.
+    """
+    tournament = load_tournament(tournament_name, storage)
+    engine = TournamentEngine(tournament, clock)
+    engine.round_number = 1 + sum(1 for round in tournament.rounds.values()
+                                  if round.matches)
+    return engine
@@ -0,0 +1,241 @@
+"""Writes tournaments in a compact binary format, for archives.
+
+db.json is written for people to read: every number is a string, the
+opponents of a player are a JSON string inside the JSON, and the file
+is indented. The binary format is written for the program to read: it
+takes a fraction of the size and is read faster.
+
+The file is made of, in order, all numbers being little-endian:
+
+    the header: the bytes b"CHTB" and the version of the format.
+    the strings: every name, result... written once, UTF-8 encoded.
+        Everywhere else, a string is the index of one of them.
+    the tournament: its name, venue, date, description...
+    the players: one record each, followed by their opponents.
+    the rounds: one record each, followed by their matches. A match
+        is the index of its two players and of its result.
+
+A file always starts with the version of the format it was written in.
+The readers of the former versions are kept in READERS, so the archives
+stay readable when the format changes.
+
+Unlike the JSON documents, a tournament read back is linked like the
+tournament that was written: its matches hold its Player instances.
+"""
+
+import datetime
+import struct
+import sys
+from array import array
+from typing import Callable, Dict, List, Tuple
+
+from models import (Match, OpponentMatrix, Player, Round, RoundPlan,
+                    Standings, Tournament)
+
+MAGIC = b"CHTB"
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct("<4sH")
+COUNT = struct.Struct("<I")
+STRING_LENGTH = struct.Struct("<H")
+TOURNAMENT = struct.Struct("<IIIIIIH")
+PLAYER = struct.Struct("<IIIIifiH")
+ROUND = struct.Struct("<IddBI")
+
+NO_PLAYER_ID = -1
+
+
+class StringTable:
+    """Gives each distinct string an index, in the order first seen."""
+    def __init__(self):
+        self.indexes: Dict[str, int] = {}
+
+    def index(self, string: str) -> int:
+        if string not in self.indexes:
+            self.indexes[string] = len(self.indexes)
+        return self.indexes[string]
+
+    def to_bytes(self) -> bytes:
+        chunks = [COUNT.pack(len(self.indexes))]
+        for string in self.indexes:
+            encoded = string.encode("utf-8")
+            if len(encoded) > 0xFFFF:
+                raise ValueError("a string of the tournament is too long "
+                                 "for the binary format")
+            chunks.append(STRING_LENGTH.pack(len(encoded)))
+            chunks.append(encoded)
+        return b"".join(chunks)
+
+
+def pack_indexes(indexes: List[int]) -> bytes:
+    packed = array("I", indexes)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def unpack_indexes(data: bytes, offset: int, count: int) -> array:
+    unpacked = array("I")
+    unpacked.frombytes(data[offset:offset + 4 * count])
+    if sys.byteorder == "big":
+        unpacked.byteswap()
+    return unpacked
+
+
+def dump_tournament(tournament: Tournament) -> bytes:
+    """Returns the tournament, its players, rounds and matches as bytes.
+
+    The players must have a player_id, i.e. be registered through
+    c_3_player_instantiation.py or loaded by c_20_tournament_loader.py.
+    """
+    strings = StringTable()
+    players = tournament.players_instances or []
+    position_of_player = {id(player): i for i, player in enumerate(players)}
+
+    tournament_record = TOURNAMENT.pack(
+        strings.index(tournament.name), strings.index(tournament.venue),
+        tournament.date.toordinal(), tournament.players_number,
+        strings.index(tournament.description),
+        strings.index(tournament.time_control), tournament.number_of_rounds)
+
+    chunks = [COUNT.pack(len(players))]
+    for player in players:
+        opponents = [strings.index(last_name)
+                     for last_name in player.opponents_faced]
+        chunks.append(PLAYER.pack(
+            strings.index(player.last_name),
+            strings.index(player.first_name),
+            player.date_of_birth.toordinal(),
+            strings.index(player.sex),
+            player.ranking,
+            player.result_field,
+            NO_PLAYER_ID if player.player_id is None else player.player_id,
+            len(opponents)))
+        chunks.append(pack_indexes(opponents))
+
+    rounds = tournament.rounds or {}
+    chunks.append(COUNT.pack(len(rounds)))
+    for round in rounds.values():
+        matches = list(round.matches.values()) if round.matches else []
+        chunks.append(ROUND.pack(strings.index(round.name_field),
+                                 round.start_datetime, round.end_datetime,
+                                 round.matches is not None, len(matches)))
+        match_fields = []
+        for match in matches:
+            match_fields.extend((position_of_player[id(match.player1)],
+                                 position_of_player[id(match.player2)],
+                                 strings.index(match.result)))
+        chunks.append(pack_indexes(match_fields))
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION)
+    return b"".join([header, strings.to_bytes(), tournament_record] + chunks)
+
+
+def read_strings(data: bytes, offset: int) -> Tuple[List[str], int]:
+    (count,) = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    strings = []
+    for _ in range(count):
+        (length,) = STRING_LENGTH.unpack_from(data, offset)
+        offset += STRING_LENGTH.size
+        strings.append(data[offset:offset + length].decode("utf-8"))
+        offset += length
+    return strings, offset
+
+
+def read_version_1(data: bytes, offset: int) -> Tournament:
+    strings, offset = read_strings(data, offset)
+
+    (name, venue, date, players_number, description, time_control,
+     number_of_rounds) = TOURNAMENT.unpack_from(data, offset)
+    offset += TOURNAMENT.size
+    tournament = Tournament(
+        strings[name], strings[venue],
+        datetime.date.fromordinal(date), players_number,
+        strings[description], strings[time_control], number_of_rounds)
+
+    (players_count,) = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    players = []
+    for _ in range(players_count):
+        (last_name, first_name, date_of_birth, sex, ranking, result_field,
+         player_id, opponents_count) = PLAYER.unpack_from(data, offset)
+        offset += PLAYER.size
+        player = Player(
+            strings[last_name], strings[first_name],
+            datetime.date.fromordinal(date_of_birth),
+            strings[sex], ranking, result_field=result_field,
+            player_id=None if player_id == NO_PLAYER_ID else player_id)
+        player.opponents_faced.extend(
+            strings[i]
+            for i in unpack_indexes(data, offset, opponents_count))
+        offset += 4 * opponents_count
+        players.append(player)
+
+    tournament.players_instances = players
+    tournament.standings = Standings(players)
+    tournament.opponent_matrix = OpponentMatrix(len(players))
+
+    (rounds_count,) = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    tournament.rounds = {}
+    for _ in range(rounds_count):
+        (round_name, start, end, has_matches,
+         matches_count) = ROUND.unpack_from(data, offset)
+        offset += ROUND.size
+        round = Round(strings[round_name], tournament, start, end)
+        match_fields = unpack_indexes(data, offset, 3 * matches_count)
+        offset += 12 * matches_count
+
+        if has_matches:
+            round.matches = {}
+            pairs = []
+            for i in range(matches_count):
+                player1 = players[match_fields[3 * i]]
+                player2 = players[match_fields[3 * i + 1]]
+                round.matches[f"match{i + 1}"] = Match(
+                    player1, player2, strings[match_fields[3 * i + 2]],
+                    round)
+                if player1.player_id is not None \
+                        and player2.player_id is not None:
+                    tournament.opponent_matrix.record_match(
+                        player1.player_id, player2.player_id)
+                pairs.append((player1, player2))
+            round.plan = RoundPlan(round.name_field, tuple(pairs))
+        tournament.rounds[round.name_field] = round
+
+    return tournament
+
+
+# the reader of each version of the format.
+READERS: Dict[int, Callable[[bytes, int], Tournament]] = {
+    1: read_version_1,
+}
+
+
+def load_tournament_binary(data: bytes) -> Tournament:
+    """Rebuilds a tournament written by dump_tournament.
+
+    Raises:
+        ValueError: the data isn't a tournament in the binary format, or
+            was written by a newer version of the program.
+    """
+    if len(data) < HEADER.size:
+        raise ValueError("the data isn't a tournament in binary format")
+    magic, version = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError("the data isn't a tournament in binary format")
+    if version not in READERS:
+        raise ValueError(f"the version {version} of the binary format "
+                         f"isn't supported")
+    return READERS[version](data, HEADER.size)
+
+
+def write_archive(tournament: Tournament, path: str):
+    with open(path, "wb") as archive:
+        archive.write(dump_tournament(tournament))
+
+
+def read_archive(path: str) -> Tournament:
+    with open(path, "rb") as archive:
+        return load_tournament_binary(archive.read())
@@ -0,0 +1,170 @@
+"""Registers the players of a tournament from a roster file.
+
+Entering hundreds of players one prompt at a time isn't an option for
+a large open. The players can be listed in a roster file instead, one
+player per row, with the columns:
+
+    last_name, first_name, date_of_birth, sex, ranking
+
+The roster is either a CSV file with those column names on its first
+line, a JSON file holding a list of objects with those keys, or a JSON
+Lines file (.jsonl) holding one object per line. The CSV and JSON Lines
+files are read row by row.
+
+All the rows are checked before any player is registered, and all the
+bad rows are reported at once, so the roster can be fixed in one go.
+
+Run from the scripts folder, e.g. with CHESS_ROSTER=players.csv, the
+interactive program registers the players of the roster instead of
+prompting for them.
+"""
+
+import csv
+import json
+import os
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from models import SEXES, parse_date
+
+ROSTER_COLUMNS = ("last_name", "first_name", "date_of_birth", "sex",
+                  "ranking")
+
+PlayerInfo = Tuple[str, str, Any, str, int]
+
+
+class RosterRow(NamedTuple):
+    """A row of a roster, or why it couldn't be read."""
+    line_number: int
+    values: Optional[Dict[str, Any]]
+    error: str = ""
+
+
+class RosterError(ValueError):
+    """Lists all the bad rows of a roster.
+
+    Attributes:
+        errors: one message per problem found, starting with the line
+            of the roster it was found on.
+    """
+    def __init__(self, errors: List[str]):
+        self.errors = errors
+        super().__init__(f"the roster has {len(errors)} error(s):\n"
+                         + "\n".join(errors))
+
+
+def roster_path_from_environment() -> str:
+    """Returns the roster file set in CHESS_ROSTER, "" if none."""
+    return os.environ.get("CHESS_ROSTER", "")
+
+
+def iter_roster_rows(path: str) -> Iterator[RosterRow]:
+    """Yields the rows of a CSV, JSON or JSON Lines roster."""
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, newline="", encoding="utf-8") as roster:
+        if extension == ".csv":
+            # the first line holds the column names.
+            for line_number, values in enumerate(csv.DictReader(roster), 2):
+                yield RosterRow(line_number, values)
+        elif extension == ".jsonl":
+            # a line that isn't JSON is reported, the next ones are
+            # still read.
+            for line_number, line in enumerate(roster, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield RosterRow(line_number, json.loads(line))
+                except json.JSONDecodeError as error:
+                    yield RosterRow(line_number, None,
+                                    f"this line isn't JSON ({error.msg})")
+        elif extension == ".json":
+            # the whole file is a single JSON document: nothing can be
+            # read past an error.
+            try:
+                rows = json.load(roster)
+            except json.JSONDecodeError as error:
+                raise RosterError([f"line {error.lineno}: the file isn't "
+                                   f"JSON ({error.msg})"])
+            for row_number, values in enumerate(rows, 1):
+                yield RosterRow(row_number, values)
+        else:
+            raise ValueError("the roster must be a .csv, .json or "
+                             ".jsonl file")
+
+
+def check_row(row: RosterRow) -> Tuple[Optional[PlayerInfo], List[str]]:
+    """Returns the player info of a row and the problems found in it.
+
+    The player info is None if a problem was found.
+    """
+    where = f"line {row.line_number}"
+    if row.error:
+        return None, [f"{where}: {row.error}"]
+    if not isinstance(row.values, dict):
+        return None, [f"{where}: a player should be an object"]
+
+    problems = []
+    missing = [column for column in ROSTER_COLUMNS
+               if str(row.values.get(column) or "").strip() == ""]
+    if missing:
+        problems.append(f"{where}: missing {', '.join(missing)}")
+
+    sex = str(row.values.get("sex") or "").strip()
+    if "sex" not in missing and sex not in SEXES:
+        problems.append(f"{where}: the sex {sex!r} should be either "
+                        f"'men' or 'women' or 'other'")
+
+    ranking = None
+    if "ranking" not in missing:
+        try:
+            ranking = int(row.values["ranking"])
+        except (TypeError, ValueError):
+            problems.append(f"{where}: the ranking "
+                            f"{row.values['ranking']!r} isn't a number")
+
+    date_of_birth = None
+    if "date_of_birth" not in missing:
+        try:
+            date_of_birth = parse_date(
+                str(row.values["date_of_birth"]).strip())
+        except ValueError as error:
+            problems.append(f"{where}: {error}")
+
+    if problems:
+        return None, problems
+    return (str(row.values["last_name"]).strip(),
+            str(row.values["first_name"]).strip(),
+            date_of_birth, sex, ranking), []
+
+
+def load_roster(path: str, players_number: int = None) -> List[PlayerInfo]:
+    """Reads and checks a roster in a single pass.
+
+    Args:
+        path: the roster file.
+        players_number: the number of players of the tournament. None
+            not to check it.
+
+    Returns: one tuple per player, as collect_player_info from view.py
+        would return it, the date of birth already parsed.
+
+    Raises:
+        RosterError: listing every problem found in the roster.
+    """
+    players_info = []
+    errors = []
+    rows_number = 0
+    for row in iter_roster_rows(path):
+        rows_number += 1
+        player_info, problems = check_row(row)
+        if problems:
+            errors.extend(problems)
+        else:
+            players_info.append(player_info)
+
+    if players_number is not None and rows_number != players_number:
+        errors.append(f"the roster lists {rows_number} players but the "
+                      f"tournament has {players_number}")
+
+    if errors:
+        raise RosterError(errors)
+    return players_info
@@ -0,0 +1,143 @@
+"""Breaks the ties between players with the same number of points.
+
+Ranking players on points then on their ranking is enough to pair a
+round, not to publish the final standings. The usual tiebreaks are:
+
+    buchholz: the sum of the points of the opponents met.
+    median_buchholz: the buchholz without the best and the worst
+        opponent, once the player met at least three opponents.
+    sonneborn_berger: the sum of the points of the opponents beaten,
+        plus half the points of the opponents drawn.
+    cumulative: the sum of the points the player had after each round,
+        favoring the players who won early.
+
+Computed player by player from the opponents_faced lists, each of them
+means searching every opponent by last name, which gets quadratic with
+the number of players. Here the played rounds are read once into two
+tables with a row per player and a column per round: the opponent met,
+as an index, and the points scored. Every tiebreak is then computed for
+all the players at once with NumPy.
+
+A player meets at most one opponent per round, so the two tables hold
+the same information as a player by player result matrix, while their
+size only grows linearly with the number of players.
+
+The tiebreaks need the players linked to their matches, i.e. a
+tournament run by the engine or loaded by c_20_tournament_loader.py.
+"""
+
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from models import Player, Tournament
+
+TIEBREAKS = ("buchholz", "median_buchholz", "sonneborn_berger",
+             "cumulative")
+
+# a median buchholz drops the best and the worst opponent, so it is only
+# computed once a player met at least that many opponents.
+MEDIAN_BUCHHOLZ_MINIMUM_GAMES = 3
+
+NO_OPPONENT = -1
+
+
+class Tiebreaks:
+    """Holds the points and tiebreaks of every player of a tournament.
+
+    Attributes:
+        players: the players, in registration order.
+        scores: the points of each player, same order.
+        buchholz, median_buchholz, sonneborn_berger, cumulative: the
+            tiebreaks of each player, same order.
+
+    Args:
+        players: the players, in registration order.
+        opponents: the index of the opponent each player met in each
+            round, NO_OPPONENT if the player didn't play.
+        points: the points each player scored in each round.
+    """
+    def __init__(self, players: List[Player], opponents: np.ndarray,
+                 points: np.ndarray):
+        self.players = players
+        self.position_of_player: Dict[int, int] = {
+            id(player): i for i, player in enumerate(players)}
+        self.scores = np.array([player.result_field for player in players],
+                               dtype=np.float64)
+
+        played = opponents != NO_OPPONENT
+        opponent_scores = np.where(
+            played, self.scores[np.where(played, opponents, 0)], 0.0)
+
+        self.buchholz = opponent_scores.sum(axis=1)
+
+        enough_games = played.sum(axis=1) >= MEDIAN_BUCHHOLZ_MINIMUM_GAMES
+        best = np.where(played, opponent_scores, -np.inf).max(
+            axis=1, initial=-np.inf)
+        worst = np.where(played, opponent_scores, np.inf).min(
+            axis=1, initial=np.inf)
+        self.median_buchholz = (self.buchholz
+                                - np.where(enough_games, best, 0.0)
+                                - np.where(enough_games, worst, 0.0))
+
+        self.sonneborn_berger = (opponent_scores * points).sum(axis=1)
+        self.cumulative = np.cumsum(points, axis=1).sum(axis=1)
+
+    def values(self, player: Player) -> Dict[str, float]:
+        """Returns the tiebreaks of a player, keyed by name."""
+        i = self.position_of_player[id(player)]
+        return {name: float(getattr(self, name)[i]) for name in TIEBREAKS}
+
+    def ranked_players(self, players: Sequence[Player],
+                       order: Sequence[str] = TIEBREAKS) -> List[Player]:
+        """Sorts the players by points, then by tiebreaks.
+
+        Args:
+            players: players of the tournament.
+            order: the tiebreaks to use, from the first one to the last.
+                The players still tied are then sorted by ranking and
+                by registration order.
+
+        Returns: the players, from the first to the last.
+        """
+        positions = np.array([self.position_of_player[id(player)]
+                              for player in players], dtype=np.int64)
+        rankings = np.array([player.ranking for player in players],
+                            dtype=np.int64)
+
+        # lexsort sorts on the last key first.
+        keys = [positions, rankings]
+        keys.extend(-getattr(self, name)[positions]
+                    for name in reversed(order))
+        keys.append(-self.scores[positions])
+        return [players[i] for i in np.lexsort(keys)]
+
+
+def compute_tiebreaks(tournament: Tournament) -> Tiebreaks:
+    """Computes the tiebreaks of the players from the rounds played."""
+    players = tournament.players_instances
+    position_of_player = {id(player): i for i, player in enumerate(players)}
+    played_rounds = [round for round in (tournament.rounds or {}).values()
+                     if round.matches]
+
+    opponents = np.full((len(players), len(played_rounds)), NO_OPPONENT,
+                        dtype=np.int64)
+    points = np.zeros((len(players), len(played_rounds)), dtype=np.float64)
+
+    rows1, rows2, columns, points1, points2 = [], [], [], [], []
+    for column, played_round in enumerate(played_rounds):
+        for match in played_round.matches.values():
+            ((player1, player1_points),
+             (player2, player2_points)) = \
+                match.convert_match_result_into_points()
+            rows1.append(position_of_player[id(player1)])
+            rows2.append(position_of_player[id(player2)])
+            columns.append(column)
+            points1.append(player1_points)
+            points2.append(player2_points)
+
+    opponents[rows1, columns] = rows2
+    opponents[rows2, columns] = rows1
+    points[rows1, columns] = points1
+    points[rows2, columns] = points2
+    return Tiebreaks(players, opponents, points)
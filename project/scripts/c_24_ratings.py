@@ -0,0 +1,349 @@
+"""Rates the players of all the saved tournaments with the Elo system.
+
+The ranking of a player is entered by hand and only changes when it is
+overridden. The rating engine computes a rating from the results of the
+matches instead, across all the tournaments of the database.
+
+Every player starts at INITIAL_RATING. After each game, a player wins
+K * (score - expected score) points, the expected score being the one
+of the Elo model (see expected_score in c_12_simulation.py). K depends
+on the player, as for FIDE ratings: K_NEW_PLAYER for the first
+NEW_PLAYER_GAMES games, then K_MASTER once rated MASTER_RATING or more,
+K_DEFAULT otherwise.
+
+The games are rated by rating periods: the same round of all the
+tournaments played on the same date. All the games of a period are
+rated from the ratings the players had before it, so a whole period is
+rated at once with NumPy, whatever the number of players.
+
+A player is identified across tournaments by name and date of birth,
+as in the index of the players (c_16_player_index.py). The rating of
+each player after each period is kept, so the rating history of a
+player can be listed.
+
+At the end of a tournament, with CHESS_RATINGS=1, the interactive
+program rates its players from the database then from the tournament,
+and announces their new ratings (see TournamentEngine.ratings).
+
+Run from the scripts folder, e.g.:
+    python c_24_ratings.py --top 10
+    python c_24_ratings.py --player "Carlsen|Magnus|1990-11-30"
+"""
+
+import argparse
+import itertools
+import time
+from typing import (Any, Dict, Iterable, List, NamedTuple, Optional,
+                    Sequence, Tuple)
+
+import numpy as np
+
+from c_13_save_deltas import DATABASE_FILE, DELTAS_FILE
+from c_15_stream_reader import iter_documents
+from c_16_player_index import PLAYER_TABLE_PREFIX, player_identity
+from models import Player, Tournament
+
+INITIAL_RATING = 1500.0
+K_NEW_PLAYER = 40.0
+NEW_PLAYER_GAMES = 30
+K_DEFAULT = 20.0
+K_MASTER = 10.0
+MASTER_RATING = 2400.0
+
+# the points of player1, per result of a match.
+POINTS_OF_PLAYER1 = {"W": 1.0, "D": 0.5, "L": 0.0}
+
+
+class RatedRound(NamedTuple):
+    """The games of a round, players identified across tournaments."""
+    date: str
+    round_position: int
+    players1: List[str]
+    players2: List[str]
+    scores1: List[float]
+
+
+class RatingEngine:
+    """Holds the rating of every player and its history.
+
+    Attributes:
+        identities: the identity of each player, in the order first met.
+        index_of_identity: the position of each identity in identities.
+        ratings: the current rating of each player, same order. The
+            array is longer than identities, to grow without copying.
+        games: the number of games rated for each player, same order.
+        period_labels: the label of each rating period rated.
+    """
+    def __init__(self, capacity: int = 1024):
+        self.identities: List[str] = []
+        self.index_of_identity: Dict[str, int] = {}
+        self.ratings = np.full(capacity, INITIAL_RATING)
+        self.games = np.zeros(capacity, dtype=np.int64)
+        self.period_labels: List[str] = []
+        # per period: the players who played and their new ratings.
+        self.rated_players: List[np.ndarray] = []
+        self.new_ratings: List[np.ndarray] = []
+
+    def indexes(self, identities: Iterable[str]) -> np.ndarray:
+        """Returns the position of each player, adding the new ones."""
+        indexes = []
+        for identity in identities:
+            index = self.index_of_identity.get(identity)
+            if index is None:
+                index = len(self.identities)
+                self.index_of_identity[identity] = index
+                self.identities.append(identity)
+            indexes.append(index)
+
+        if len(self.identities) > len(self.ratings):
+            added = max(len(self.identities), 2 * len(self.ratings)) \
+                - len(self.ratings)
+            self.ratings = np.concatenate(
+                [self.ratings, np.full(added, INITIAL_RATING)])
+            self.games = np.concatenate(
+                [self.games, np.zeros(added, dtype=np.int64)])
+        return np.array(indexes, dtype=np.int64)
+
+    def k_factors(self, indexes: np.ndarray) -> np.ndarray:
+        return np.where(self.games[indexes] < NEW_PLAYER_GAMES,
+                        K_NEW_PLAYER,
+                        np.where(self.ratings[indexes] >= MASTER_RATING,
+                                 K_MASTER, K_DEFAULT))
+
+    def rate_period(self, label: str, players1: Sequence[str],
+                    players2: Sequence[str], scores1: Sequence[float]):
+        """Rates the games of a rating period at once.
+
+        Args:
+            label: the name of the period in the rating history.
+            players1, players2: the identities of the players of each
+                game.
+            scores1: the points of players1 in each game.
+        """
+        indexes1 = self.indexes(players1)
+        indexes2 = self.indexes(players2)
+        scores1 = np.asarray(scores1, dtype=np.float64)
+
+        expected1 = 1 / (1 + 10 ** ((self.ratings[indexes2]
+                                     - self.ratings[indexes1]) / 400))
+        players = np.concatenate([indexes1, indexes2])
+        changes = np.concatenate([
+            self.k_factors(indexes1) * (scores1 - expected1),
+            self.k_factors(indexes2) * (expected1 - scores1)])
+
+        # a player can play several games in a period: add.at adds all
+        # the changes of a player instead of keeping the last one.
+        np.add.at(self.ratings, players, changes)
+        np.add.at(self.games, players, 1)
+
+        rated_players = np.unique(players)
+        self.period_labels.append(label)
+        self.rated_players.append(rated_players)
+        self.new_ratings.append(self.ratings[rated_players])
+
+    def rate_rounds(self, rated_rounds: Iterable[RatedRound]):
+        """Rates rounds, grouped by date and position in rating periods."""
+        rounds_in_order = sorted(
+            rated_rounds,
+            key=lambda rated_round: (rated_round.date,
+                                     rated_round.round_position))
+        for (date, round_position), period in itertools.groupby(
+                rounds_in_order,
+                key=lambda rated_round: (rated_round.date,
+                                         rated_round.round_position)):
+            players1, players2, scores1 = [], [], []
+            for rated_round in period:
+                players1.extend(rated_round.players1)
+                players2.extend(rated_round.players2)
+                scores1.extend(rated_round.scores1)
+            if scores1:
+                self.rate_period(f"{date} round {round_position}",
+                                 players1, players2, scores1)
+
+    def rating(self, identity: str) -> float:
+        """Returns the current rating of a player.
+
+        Raises:
+            KeyError: the player never played a rated game.
+        """
+        return float(self.ratings[self.index_of_identity[identity]])
+
+    def time_series(self, identity: str) -> List[Tuple[str, float]]:
+        """Returns the rating of a player after each period played."""
+        index = self.index_of_identity[identity]
+        series = []
+        for label, rated_players, new_ratings in zip(
+                self.period_labels, self.rated_players, self.new_ratings):
+            position = np.searchsorted(rated_players, index)
+            if (position < len(rated_players)
+                    and rated_players[position] == index):
+                series.append((label, float(new_ratings[position])))
+        return series
+
+    def best_rated(self, number: int) -> List[Tuple[str, float]]:
+        """Returns the best rated players with their rating."""
+        ratings = self.ratings[:len(self.identities)]
+        return [(self.identities[i], float(ratings[i]))
+                for i in np.argsort(-ratings, kind="stable")[:number]]
+
+
+def rated_rounds_of_tournament(serialized_tournament: Dict[str, Any],
+                               serialized_players: List[Dict[str, Any]]
+                               ) -> List[RatedRound]:
+    """Returns the games of a serialized tournament with a result."""
+    identity_of_player: Dict[Any, str] = {}
+    for position, serialized_player in enumerate(serialized_players):
+        identity = player_identity(serialized_player)
+        player_id = serialized_player.get("player_id", position)
+        identity_of_player[int(player_id)] = identity
+        # as in the rest of the program, a shared last name refers to
+        # the first player who has it.
+        identity_of_player.setdefault(serialized_player["last_name"],
+                                      identity)
+
+    def find_identity(serialized_match: Dict[str, Any], which: str) -> str:
+        player_id = serialized_match.get(f"{which}_id")
+        if player_id is not None:
+            return identity_of_player[int(player_id)]
+        return identity_of_player[serialized_match[which]]
+
+    rated_rounds = []
+    for round_position, serialized_round in enumerate(
+            serialized_tournament["rounds"].values(), 1):
+        players1, players2, scores1 = [], [], []
+        # the matches of a round saved before its results are "".
+        for serialized_match in (serialized_round["matches"] or {}).values():
+            points = POINTS_OF_PLAYER1.get(serialized_match["result"].upper())
+            if points is None:
+                continue
+            players1.append(find_identity(serialized_match, "player1"))
+            players2.append(find_identity(serialized_match, "player2"))
+            scores1.append(points)
+        if scores1:
+            rated_rounds.append(RatedRound(serialized_tournament["date"],
+                                           round_position, players1,
+                                           players2, scores1))
+    return rated_rounds
+
+
+def read_rated_rounds(database_path: str = DATABASE_FILE,
+                      deltas_path: str = DELTAS_FILE,
+                      excluded_tournament: Optional[str] = None
+                      ) -> List[RatedRound]:
+    """Reads the games of all the tournaments in one pass over db.json.
+
+    Args:
+        excluded_tournament: the name of a tournament whose games are
+            not read, e.g. the one taking place, saved along the way.
+    """
+    tournaments: Dict[str, Dict[str, Any]] = {}
+    players_by_tournament: Dict[str, List[Dict[str, Any]]] = {}
+    for table_name, _, document in iter_documents(database_path,
+                                                  deltas_path):
+        if table_name.startswith(PLAYER_TABLE_PREFIX):
+            players_by_tournament.setdefault(
+                table_name[len(PLAYER_TABLE_PREFIX):], []).append(document)
+        # the tournament's first key is "venue".
+        elif next(iter(document), None) == "venue":
+            tournaments[table_name] = document
+
+    rated_rounds = []
+    tournaments.pop(excluded_tournament, None)
+    for tournament_name, serialized_tournament in tournaments.items():
+        # the games of a tournament saved without its players can't be
+        # attributed to anyone.
+        if tournament_name in players_by_tournament:
+            rated_rounds.extend(rated_rounds_of_tournament(
+                serialized_tournament,
+                players_by_tournament[tournament_name]))
+    return rated_rounds
+
+
+def rate_history(database_path: str = DATABASE_FILE,
+                 deltas_path: str = DELTAS_FILE,
+                 excluded_tournament: Optional[str] = None
+                 ) -> RatingEngine:
+    """Rates the players from all the tournaments of the database."""
+    engine = RatingEngine()
+    engine.rate_rounds(read_rated_rounds(database_path, deltas_path,
+                                         excluded_tournament))
+    return engine
+
+
+def rate_tournament(engine: RatingEngine, tournament: Tournament):
+    """Rates the rounds played of a tournament taking place."""
+    serialized_players = [player.serialize_player()
+                          for player in tournament.players_instances]
+    engine.rate_rounds(rated_rounds_of_tournament(
+        tournament.serialize_tournament(), serialized_players))
+
+
+def rate_players(tournament: Tournament,
+                 database_path: str = DATABASE_FILE,
+                 deltas_path: str = DELTAS_FILE
+                 ) -> List[Tuple[Player, float, float]]:
+    """Rates the players of a tournament that took place.
+
+    The players are first rated from the other tournaments of the
+    database, then from the rounds of the tournament. The tournament
+    itself is not read from the database, even if it was saved, so its
+    games are only rated once.
+
+    Returns: each player with his rating before and after the
+        tournament, from the best rated after it to the worst.
+    """
+    engine = rate_history(database_path, deltas_path, tournament.name)
+    identities = [player_identity(player.serialize_player())
+                  for player in tournament.players_instances]
+
+    def current_ratings() -> List[float]:
+        # a player who never played a rated game keeps the initial
+        # rating.
+        return [engine.rating(identity)
+                if identity in engine.index_of_identity
+                else INITIAL_RATING
+                for identity in identities]
+
+    ratings_before = current_ratings()
+    rate_tournament(engine, tournament)
+    rated_players = list(zip(tournament.players_instances, ratings_before,
+                             current_ratings()))
+    rated_players.sort(key=lambda rated_player: -rated_player[2])
+    return rated_players
+
+
+def announce_ratings(rated_players: List[Tuple[Player, float, float]]
+                     ) -> List[str]:
+    """Returns and prints the new rating of each player, see rate_players.
+    """
+    ratings_announcement = [
+        f"{player.last_name} is rated {after:.0f} ({after - before:+.0f})"
+        for player, before, after in rated_players]
+    print(f"\nthe new ratings are :\n{ratings_announcement}\n")
+    return ratings_announcement
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rates the players of all the saved tournaments.")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--player", default=None,
+                        help="last_name|first_name|yyyy-mm-dd")
+    arguments = parser.parse_args()
+
+    start = time.perf_counter()
+    engine = rate_history()
+    elapsed = time.perf_counter() - start
+    print(f"{len(engine.identities)} players rated over "
+          f"{len(engine.period_labels)} rating periods in {elapsed:.2f}s")
+
+    if arguments.player is not None:
+        for label, rating in engine.time_series(arguments.player):
+            print(f"{label}: {rating:.0f}")
+    else:
+        for identity, rating in engine.best_rated(arguments.top):
+            print(f"{identity}: {rating:.0f}")
+
+
+if __name__ == "__main__":
+    main()
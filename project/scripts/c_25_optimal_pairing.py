@@ -0,0 +1,555 @@
+"""Pairs a round with a minimum-cost perfect matching.
+
+The pairing of c_2_pairing_subsequent_rounds.py is greedy: each player
+meets the highest placed opponent he didn't meet yet, and the players
+left over are repaired at the end. It is fast, but it can end with a
+rematch when a pairing without any exists, and it doesn't look for the
+pairing with the smallest score differences.
+
+The optimal pairing models the round as a graph instead. The players
+are the vertices. Two players are linked by an edge if they didn't meet
+yet, a rematch having an infinite cost. Each edge costs:
+
+    SCORE_GAP_COST times the square of the score difference, counted
+        in half points, so that two players of the same score group are
+        always paired before a player floats to another group;
+    plus the difference between the places of the players, so that
+        the pairing stays as close as possible to the swiss order.
+
+The pairing is then the perfect matching of smallest total cost,
+found by the blossom algorithm of Edmonds (max_weight_matching). With
+all the pairs of the field, the graph is too big for a large field: a
+player is only linked to the WINDOW players placed right below him.
+
+The blossom algorithm takes a time growing faster than the number of
+players. If it doesn't finish within the time budget, or if no pairing
+without a rematch exists among the edges, the round is paired by the
+greedy pairing instead.
+"""
+
+import os
+import time
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from c_2_pairing_subsequent_rounds import (build_have_met,
+                                           pair_players_for_subsequent_round,
+                                           rank_players_for_subsequent_round)
+from models import OpponentMatrix, Player, Standings
+
+SCORE_GAP_COST = 10000
+WINDOW = 12
+TIME_BUDGET = 2.0
+
+Edge = Tuple[int, int, int]
+
+
+def pairing_from_environment() -> Optional[Callable]:
+    """Returns the pairing asked for by CHESS_PAIRING, None if greedy.
+
+    With CHESS_PAIRING=optimal, the rounds are paired by OptimalPairing.
+    With CHESS_PAIRING=parallel, they are paired score group by score
+    group on a pool of processes, see c_26_parallel_pairing.py. Either
+    way, a round or a group can take CHESS_PAIRING_TIME_BUDGET seconds
+    if set.
+    """
+    pairing = os.environ.get("CHESS_PAIRING", "")
+    time_budget = float(os.environ.get("CHESS_PAIRING_TIME_BUDGET",
+                                       TIME_BUDGET))
+    if pairing == "optimal":
+        return OptimalPairing(time_budget)
+    if pairing == "parallel":
+        # imported here: the parallel pairing is built on this module.
+        from c_26_parallel_pairing import ParallelPairing
+        return ParallelPairing(time_budget)
+    return None
+
+
+class PairingTimeout(Exception):
+    """The matching didn't finish within its time budget."""
+
+
+def max_weight_matching(edges: Sequence[Edge], vertices_number: int,
+                        deadline: float = None) -> List[int]:
+    """Finds the matching of maximum weight among those of maximum size.
+
+    This is the blossom algorithm of Edmonds, with the primal-dual
+    method of Galil, as written in "Efficient algorithms for finding
+    maximum matching in graphs" (Zvi Galil, ACM Computing Surveys,
+    1986). The weights must be integers, so that the dual variables
+    stay exact.
+
+    Args:
+        edges: (i, j, weight), i and j being vertices from 0 to
+            vertices_number - 1.
+        vertices_number: the number of vertices.
+        deadline: the time.perf_counter() value after which the search
+            is given up. None for no limit.
+
+    Returns: the vertex matched with each vertex, -1 if it isn't.
+
+    Raises:
+        PairingTimeout: the deadline passed.
+    """
+    if not edges:
+        return [-1] * vertices_number
+
+    nvertex = vertices_number
+    nedge = len(edges)
+    max_weight = max(0, max(weight for _, _, weight in edges))
+
+    # the endpoints of edge k are 2k and 2k + 1; p ^ 1 is the other one.
+    endpoint = [edges[p // 2][p % 2] for p in range(2 * nedge)]
+    neighbour_ends: List[List[int]] = [[] for _ in range(nvertex)]
+    for k, (i, j, _) in enumerate(edges):
+        neighbour_ends[i].append(2 * k + 1)
+        neighbour_ends[j].append(2 * k)
+
+    mate = [-1] * nvertex
+    # 0 free, 1 S (outer), 2 T (inner), for vertices and blossoms.
+    label = [0] * (2 * nvertex)
+    label_end = [-1] * (2 * nvertex)
+    in_blossom = list(range(nvertex))
+    blossom_parent = [-1] * (2 * nvertex)
+    blossom_children: List[Optional[List[int]]] = [None] * (2 * nvertex)
+    blossom_base = list(range(nvertex)) + [-1] * nvertex
+    blossom_ends: List[Optional[List[int]]] = [None] * (2 * nvertex)
+    best_edge = [-1] * (2 * nvertex)
+    blossom_best_edges: List[Optional[List[int]]] = [None] * (2 * nvertex)
+    unused_blossoms = list(range(nvertex, 2 * nvertex))
+    dual = [max_weight] * nvertex + [0] * nvertex
+    allowed = [False] * nedge
+    queue: List[int] = []
+
+    double_weight = [2 * weight for _, _, weight in edges]
+
+    def slack(k: int) -> int:
+        return (dual[endpoint[2 * k]] + dual[endpoint[2 * k + 1]]
+                - double_weight[k])
+
+    def blossom_leaves(b: int):
+        if b < nvertex:
+            yield b
+        else:
+            for child in blossom_children[b]:
+                if child < nvertex:
+                    yield child
+                else:
+                    yield from blossom_leaves(child)
+
+    def assign_label(w: int, t: int, p: int):
+        b = in_blossom[w]
+        label[w] = label[b] = t
+        label_end[w] = label_end[b] = p
+        best_edge[w] = best_edge[b] = -1
+        if t == 1:
+            queue.extend(blossom_leaves(b))
+        else:
+            base = blossom_base[b]
+            assign_label(endpoint[mate[base]], 1, mate[base] ^ 1)
+
+    def scan_blossom(v: int, w: int) -> int:
+        """Returns the base of the new blossom, -1 for an augmenting path.
+        """
+        path = []
+        base = -1
+        while v != -1 or w != -1:
+            b = in_blossom[v]
+            if label[b] & 4:
+                base = blossom_base[b]
+                break
+            path.append(b)
+            label[b] = 5
+            if label_end[b] == -1:
+                v = -1
+            else:
+                v = endpoint[label_end[b]]
+                b = in_blossom[v]
+                v = endpoint[label_end[b]]
+            if w != -1:
+                v, w = w, v
+        for b in path:
+            label[b] = 1
+        return base
+
+    def add_blossom(base: int, k: int):
+        v, w, _ = edges[k]
+        base_blossom = in_blossom[base]
+        bv = in_blossom[v]
+        bw = in_blossom[w]
+        b = unused_blossoms.pop()
+        blossom_base[b] = base
+        blossom_parent[b] = -1
+        blossom_parent[base_blossom] = b
+        blossom_children[b] = path = []
+        blossom_ends[b] = ends = []
+        while bv != base_blossom:
+            blossom_parent[bv] = b
+            path.append(bv)
+            ends.append(label_end[bv])
+            v = endpoint[label_end[bv]]
+            bv = in_blossom[v]
+        path.append(base_blossom)
+        path.reverse()
+        ends.reverse()
+        ends.append(2 * k)
+        while bw != base_blossom:
+            blossom_parent[bw] = b
+            path.append(bw)
+            ends.append(label_end[bw] ^ 1)
+            w = endpoint[label_end[bw]]
+            bw = in_blossom[w]
+        label[b] = 1
+        label_end[b] = label_end[base_blossom]
+        dual[b] = 0
+        for v in blossom_leaves(b):
+            if label[in_blossom[v]] == 2:
+                queue.append(v)
+            in_blossom[v] = b
+
+        best_edge_to = [-1] * (2 * nvertex)
+        for bv in path:
+            if blossom_best_edges[bv] is None:
+                edge_lists = [[p // 2 for p in neighbour_ends[v]]
+                              for v in blossom_leaves(bv)]
+            else:
+                edge_lists = [blossom_best_edges[bv]]
+            for edge_list in edge_lists:
+                for k in edge_list:
+                    i, j, _ = edges[k]
+                    if in_blossom[j] == b:
+                        i, j = j, i
+                    bj = in_blossom[j]
+                    if (bj != b and label[bj] == 1
+                            and (best_edge_to[bj] == -1
+                                 or slack(k) < slack(best_edge_to[bj]))):
+                        best_edge_to[bj] = k
+            blossom_best_edges[bv] = None
+            best_edge[bv] = -1
+        blossom_best_edges[b] = [k for k in best_edge_to if k != -1]
+        best_edge[b] = -1
+        for k in blossom_best_edges[b]:
+            if best_edge[b] == -1 or slack(k) < slack(best_edge[b]):
+                best_edge[b] = k
+
+    def expand_blossom(b: int, end_stage: bool):
+        for s in blossom_children[b]:
+            blossom_parent[s] = -1
+            if s < nvertex:
+                in_blossom[s] = s
+            elif end_stage and dual[s] == 0:
+                expand_blossom(s, end_stage)
+            else:
+                for v in blossom_leaves(s):
+                    in_blossom[v] = s
+
+        if not end_stage and label[b] == 2:
+            entry_child = in_blossom[endpoint[label_end[b] ^ 1]]
+            j = blossom_children[b].index(entry_child)
+            if j & 1:
+                j -= len(blossom_children[b])
+                step = 1
+                end_trick = 0
+            else:
+                step = -1
+                end_trick = 1
+            p = label_end[b]
+            while j != 0:
+                label[endpoint[p ^ 1]] = 0
+                label[endpoint[blossom_ends[b][j - end_trick]
+                               ^ end_trick ^ 1]] = 0
+                assign_label(endpoint[p ^ 1], 2, p)
+                allowed[blossom_ends[b][j - end_trick] // 2] = True
+                j += step
+                p = blossom_ends[b][j - end_trick] ^ end_trick
+                allowed[p // 2] = True
+                j += step
+            bv = blossom_children[b][j]
+            label[endpoint[p ^ 1]] = label[bv] = 2
+            label_end[endpoint[p ^ 1]] = label_end[bv] = p
+            best_edge[bv] = -1
+            j += step
+            while blossom_children[b][j] != entry_child:
+                bv = blossom_children[b][j]
+                if label[bv] == 1:
+                    j += step
+                    continue
+                for v in blossom_leaves(bv):
+                    if label[v] != 0:
+                        break
+                if label[v] != 0:
+                    label[v] = 0
+                    label[endpoint[mate[blossom_base[bv]]]] = 0
+                    assign_label(v, 2, label_end[v])
+                j += step
+
+        label[b] = label_end[b] = -1
+        blossom_children[b] = blossom_ends[b] = None
+        blossom_base[b] = -1
+        blossom_best_edges[b] = None
+        best_edge[b] = -1
+        unused_blossoms.append(b)
+
+    def augment_blossom(b: int, v: int):
+        t = v
+        while blossom_parent[t] != b:
+            t = blossom_parent[t]
+        if t >= nvertex:
+            augment_blossom(t, v)
+        i = j = blossom_children[b].index(t)
+        if i & 1:
+            j -= len(blossom_children[b])
+            step = 1
+            end_trick = 0
+        else:
+            step = -1
+            end_trick = 1
+        while j != 0:
+            j += step
+            t = blossom_children[b][j]
+            p = blossom_ends[b][j - end_trick] ^ end_trick
+            if t >= nvertex:
+                augment_blossom(t, endpoint[p])
+            j += step
+            t = blossom_children[b][j]
+            if t >= nvertex:
+                augment_blossom(t, endpoint[p ^ 1])
+            mate[endpoint[p]] = p ^ 1
+            mate[endpoint[p ^ 1]] = p
+        blossom_children[b] = (blossom_children[b][i:]
+                               + blossom_children[b][:i])
+        blossom_ends[b] = blossom_ends[b][i:] + blossom_ends[b][:i]
+        blossom_base[b] = blossom_base[blossom_children[b][0]]
+
+    def augment_matching(k: int):
+        v, w, _ = edges[k]
+        for s, p in ((v, 2 * k + 1), (w, 2 * k)):
+            while True:
+                bs = in_blossom[s]
+                if bs >= nvertex:
+                    augment_blossom(bs, s)
+                mate[s] = p
+                if label_end[bs] == -1:
+                    break
+                t = endpoint[label_end[bs]]
+                bt = in_blossom[t]
+                s = endpoint[label_end[bt]]
+                j = endpoint[label_end[bt] ^ 1]
+                if bt >= nvertex:
+                    augment_blossom(bt, j)
+                mate[j] = label_end[bt]
+                p = label_end[bt] ^ 1
+
+    # each stage looks for an augmenting path, adding a pair.
+    for _ in range(nvertex):
+        label[:] = [0] * (2 * nvertex)
+        best_edge[:] = [-1] * (2 * nvertex)
+        blossom_best_edges[nvertex:] = [None] * nvertex
+        allowed[:] = [False] * nedge
+        queue[:] = []
+        for v in range(nvertex):
+            if mate[v] == -1 and label[in_blossom[v]] == 0:
+                assign_label(v, 1, -1)
+
+        augmented = False
+        while True:
+            if deadline is not None and time.perf_counter() > deadline:
+                raise PairingTimeout("the matching took too long")
+
+            while queue and not augmented:
+                v = queue.pop()
+                for p in neighbour_ends[v]:
+                    k = p // 2
+                    w = endpoint[p]
+                    if in_blossom[v] == in_blossom[w]:
+                        continue
+                    if not allowed[k]:
+                        k_slack = dual[v] + dual[w] - double_weight[k]
+                        if k_slack <= 0:
+                            allowed[k] = True
+                    if allowed[k]:
+                        if label[in_blossom[w]] == 0:
+                            assign_label(w, 2, p ^ 1)
+                        elif label[in_blossom[w]] == 1:
+                            base = scan_blossom(v, w)
+                            if base >= 0:
+                                add_blossom(base, k)
+                            else:
+                                augment_matching(k)
+                                augmented = True
+                                break
+                        elif label[w] == 0:
+                            label[w] = 2
+                            label_end[w] = p ^ 1
+                    elif label[in_blossom[w]] == 1:
+                        b = in_blossom[v]
+                        if best_edge[b] == -1 or k_slack < slack(best_edge[b]):
+                            best_edge[b] = k
+                    elif label[w] == 0:
+                        if best_edge[w] == -1 or k_slack < slack(best_edge[w]):
+                            best_edge[w] = k
+            if augmented:
+                break
+
+            # no augmenting path with the allowed edges: the dual
+            # variables are updated to allow more edges.
+            delta_type = -1
+            delta = delta_edge = delta_blossom = None
+            for v in range(nvertex):
+                if label[in_blossom[v]] == 0 and best_edge[v] != -1:
+                    d = slack(best_edge[v])
+                    if delta_type == -1 or d < delta:
+                        delta = d
+                        delta_type = 2
+                        delta_edge = best_edge[v]
+            for b in range(2 * nvertex):
+                if (blossom_parent[b] == -1 and label[b] == 1
+                        and best_edge[b] != -1):
+                    d = slack(best_edge[b]) // 2
+                    if delta_type == -1 or d < delta:
+                        delta = d
+                        delta_type = 3
+                        delta_edge = best_edge[b]
+            for b in range(nvertex, 2 * nvertex):
+                if (blossom_base[b] >= 0 and blossom_parent[b] == -1
+                        and label[b] == 2
+                        and (delta_type == -1 or dual[b] < delta)):
+                    delta = dual[b]
+                    delta_type = 4
+                    delta_blossom = b
+            if delta_type == -1:
+                # the matching is of maximum size: only the weights can
+                # still improve.
+                delta_type = 1
+                delta = max(0, min(dual[:nvertex]))
+
+            for v in range(nvertex):
+                if label[in_blossom[v]] == 1:
+                    dual[v] -= delta
+                elif label[in_blossom[v]] == 2:
+                    dual[v] += delta
+            for b in range(nvertex, 2 * nvertex):
+                if blossom_base[b] >= 0 and blossom_parent[b] == -1:
+                    if label[b] == 1:
+                        dual[b] += delta
+                    elif label[b] == 2:
+                        dual[b] -= delta
+
+            if delta_type == 1:
+                break
+            elif delta_type == 2:
+                allowed[delta_edge] = True
+                i, j, _ = edges[delta_edge]
+                if label[in_blossom[i]] == 0:
+                    i, j = j, i
+                queue.append(i)
+            elif delta_type == 3:
+                allowed[delta_edge] = True
+                i, j, _ = edges[delta_edge]
+                queue.append(i)
+            else:
+                expand_blossom(delta_blossom, False)
+
+        if not augmented:
+            break
+
+        for b in range(nvertex, 2 * nvertex):
+            if (blossom_parent[b] == -1 and blossom_base[b] >= 0
+                    and label[b] == 1 and dual[b] == 0):
+                expand_blossom(b, True)
+
+    return [endpoint[mate[v]] if mate[v] >= 0 else -1
+            for v in range(nvertex)]
+
+
+def pairing_edges(ranked_players: List[Player],
+                  have_met: Callable[[Player, Player], bool],
+                  window: int = WINDOW) -> List[Edge]:
+    """Returns the weighted edges between the players who can meet.
+
+    The weight of an edge is the largest possible cost minus its cost,
+    so that the matching of maximum weight is the one of minimum cost.
+    """
+    half_points = [round(2 * player.result_field)
+                   for player in ranked_players]
+    largest_gap = max(half_points, default=0) - min(half_points, default=0)
+    largest_cost = SCORE_GAP_COST * largest_gap ** 2 + window
+
+    edges = []
+    for i, player in enumerate(ranked_players):
+        for j in range(i + 1, min(i + 1 + window, len(ranked_players))):
+            if not have_met(player, ranked_players[j]):
+                gap = half_points[i] - half_points[j]
+                cost = SCORE_GAP_COST * gap ** 2 + j - i
+                edges.append((i, j, largest_cost - cost + 1))
+    return edges
+
+
+def pairing_cost(ranked_players: List[Player],
+                 pairs: Sequence[Tuple[Player, Player]]) -> int:
+    """Returns the total cost of pairs, rematches left aside."""
+    place = {id(player): i for i, player in enumerate(ranked_players)}
+    return sum(SCORE_GAP_COST
+               * round(2 * (player1.result_field - player2.result_field)) ** 2
+               + abs(place[id(player1)] - place[id(player2)])
+               for player1, player2 in pairs)
+
+
+def pair_players_optimally(
+        players_ranked_in_previous_round: List[Player],
+        standings: Standings = None,
+        opponent_matrix: OpponentMatrix = None,
+        time_budget: float = TIME_BUDGET,
+        window: int = WINDOW) -> List[Tuple[Player, Player]]:
+    """Pairs the players with the minimum-cost perfect matching.
+
+    Takes the same arguments and returns the same pairs as
+    pair_players_for_subsequent_round, to which it falls back.
+
+    Args:
+        time_budget: the seconds the matching can take before the
+            greedy pairing is used instead.
+        window: the number of players placed below a player he can be
+            paired with.
+    """
+    deadline = time.perf_counter() + time_budget
+    ranked_players = rank_players_for_subsequent_round(
+        players_ranked_in_previous_round, standings)
+    have_met = build_have_met(ranked_players, opponent_matrix)
+
+    try:
+        mates = max_weight_matching(
+            pairing_edges(ranked_players, have_met, window),
+            len(ranked_players), deadline)
+    except PairingTimeout:
+        mates = None
+
+    if mates is None or -1 in mates:
+        return pair_players_for_subsequent_round(
+            ranked_players, standings, opponent_matrix)
+
+    # the boards follow the place of the best placed player of each pair.
+    return [(ranked_players[i], ranked_players[mate])
+            for i, mate in enumerate(mates) if i < mate]
+
+
+class OptimalPairing:
+    """Pairs the rounds of a tournament with pair_players_optimally.
+
+    Set as the pairing of a tournament, it replaces the greedy pairing
+    in plan_round.
+
+    Attributes:
+        time_budget: the seconds each round can take to pair.
+        window: the number of players placed below a player he can be
+            paired with.
+    """
+    def __init__(self, time_budget: float = TIME_BUDGET,
+                 window: int = WINDOW):
+        self.time_budget = time_budget
+        self.window = window
+
+    def __call__(self, players: List[Player], standings: Standings = None,
+                 opponent_matrix: OpponentMatrix = None
+                 ) -> List[Tuple[Player, Player]]:
+        return pair_players_optimally(players, standings, opponent_matrix,
+                                      self.time_budget, self.window)
@@ -0,0 +1,199 @@
+"""Pairs the score groups of a round in parallel.
+
+The optimal pairing of c_25_optimal_pairing.py solves the whole round
+as one matching, whose time grows faster than the number of players.
+Yet the players mostly meet opponents of their own score group: each
+score group can be paired on its own.
+
+Which players float from one group to the next only depends on the
+size of the groups, so it is decided before pairing anything: when a
+group, floaters included, has an odd number of players, its lowest
+placed player floats down to the next group. Each group is then an
+independent matching, solved on a pool of processes, one per core by
+default. Sending a group to another process costs about a millisecond,
+which is as long as pairing a small group: the groups of fewer than
+PARALLEL_GROUP_SIZE players are paired in this process, while the
+larger ones are paired by the pool. ParallelPairing keeps its pool for
+the whole tournament instead of starting one each round.
+
+Once all the groups are paired, the players a group couldn't pair,
+e.g. because they all met already, are reconciled from the top group
+to the bottom one: they are paired with the players left over in the
+groups below by the greedy pairing of c_2_pairing_subsequent_rounds.py,
+whose repair of the last floaters also applies.
+
+A group that doesn't finish within the time budget is paired by the
+greedy pairing.
+"""
+
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from c_2_pairing_subsequent_rounds import (build_have_met,
+                                           group_players_by_score,
+                                           pair_score_group,
+                                           rank_players_for_subsequent_round,
+                                           repair_last_floaters)
+from c_25_optimal_pairing import (TIME_BUDGET, WINDOW, Edge, PairingTimeout,
+                                  max_weight_matching, pairing_edges)
+from models import OpponentMatrix, Player, Standings
+
+# the groups of fewer players are paired in this process.
+PARALLEL_GROUP_SIZE = 64
+
+
+class GroupMatching(NamedTuple):
+    """The matching of one score group, as sent to a process."""
+    edges: List[Edge]
+    players_number: int
+    time_budget: float
+
+
+def plan_score_groups(ranked_players: List[Player]) -> List[List[Player]]:
+    """Buckets the players into groups of even size, floaters included.
+
+    The lowest placed player of a group of odd size floats down to the
+    next group. The tournament has an even number of players, so the
+    last group never has a floater left.
+    """
+    groups = []
+    floaters: List[Player] = []
+    for score_group in group_players_by_score(ranked_players):
+        group = floaters + score_group
+        floaters = [group.pop()] if len(group) % 2 else []
+        groups.append(group)
+    return groups
+
+
+def match_group(group_matching: GroupMatching) -> Optional[List[int]]:
+    """Returns the mates of the players of a group, None if too long."""
+    deadline = time.perf_counter() + group_matching.time_budget
+    try:
+        return max_weight_matching(group_matching.edges,
+                                   group_matching.players_number, deadline)
+    except PairingTimeout:
+        return None
+
+
+def match_groups(group_matchings: List[GroupMatching], in_pool: List[bool],
+                 executor: Executor) -> List[Optional[List[int]]]:
+    """Returns the mates of the players of each group.
+
+    The groups marked in_pool are sent to the pool first. The other
+    groups are paired in this process in the meantime.
+    """
+    futures = {i: executor.submit(match_group, group_matching)
+               for i, group_matching in enumerate(group_matchings)
+               if in_pool[i]}
+    all_mates = [None if in_pool[i] else match_group(group_matching)
+                 for i, group_matching in enumerate(group_matchings)]
+    for i, future in futures.items():
+        all_mates[i] = future.result()
+    return all_mates
+
+
+def pair_players_in_parallel(
+        players_ranked_in_previous_round: List[Player],
+        standings: Standings = None,
+        opponent_matrix: OpponentMatrix = None,
+        time_budget: float = TIME_BUDGET,
+        window: int = WINDOW,
+        processes: Optional[int] = None,
+        pool: Optional[Callable[[], Executor]] = None
+        ) -> List[Tuple[Player, Player]]:
+    """Pairs each score group with the optimal pairing, in parallel.
+
+    Takes the same arguments and returns the same pairs as
+    pair_players_for_subsequent_round.
+
+    Args:
+        time_budget: the seconds the matching of each group can take
+            before the group is paired by the greedy pairing.
+        window: see pair_players_optimally.
+        processes: the number of processes of the pool. By default, one
+            per core. With 1, the groups are paired in this process.
+        pool: returns the pool to pair the large groups on. By default,
+            a pool is started for this round only, if it is needed.
+    """
+    ranked_players = rank_players_for_subsequent_round(
+        players_ranked_in_previous_round, standings)
+    have_met = build_have_met(ranked_players, opponent_matrix)
+
+    groups = plan_score_groups(ranked_players)
+    group_matchings = [GroupMatching(pairing_edges(group, have_met, window),
+                                     len(group), time_budget)
+                       for group in groups]
+
+    # the pool is only worth it for two large groups or more.
+    if processes is None:
+        processes = os.cpu_count() or 1
+    in_pool = [group_matching.players_number >= PARALLEL_GROUP_SIZE
+               for group_matching in group_matchings]
+    if processes == 1 or sum(in_pool) < 2:
+        all_mates = [match_group(group_matching)
+                     for group_matching in group_matchings]
+    elif pool is not None:
+        all_mates = match_groups(group_matchings, in_pool, pool())
+    else:
+        with ProcessPoolExecutor(
+                max_workers=min(processes, sum(in_pool))) as executor:
+            all_mates = match_groups(group_matchings, in_pool, executor)
+
+    pairs: List[Tuple[Player, Player]] = []
+    floaters: List[Player] = []
+    for group, mates in zip(groups, all_mates):
+        if mates is None:
+            left_over = group
+        else:
+            pairs.extend((group[i], group[mate])
+                         for i, mate in enumerate(mates) if i < mate)
+            left_over = [group[i] for i, mate in enumerate(mates)
+                         if mate == -1]
+        group_pairs, floaters = pair_score_group(floaters + left_over,
+                                                 have_met)
+        pairs.extend(group_pairs)
+
+    return repair_last_floaters(pairs, floaters, have_met)
+
+
+class ParallelPairing:
+    """Pairs the rounds of a tournament with pair_players_in_parallel.
+
+    Set as the pairing of a tournament, it replaces the greedy pairing
+    in plan_round. Its pool of processes is started the first time a
+    round needs it, then kept for the next rounds. It is stopped by
+    close, once the tournament is over.
+
+    Attributes:
+        time_budget: the seconds each score group can take to pair.
+        window: see pair_players_optimally.
+        processes: the number of processes of the pool, None for one
+            per core.
+        executor: the pool of processes, None until a round needs it.
+    """
+    def __init__(self, time_budget: float = TIME_BUDGET,
+                 window: int = WINDOW, processes: Optional[int] = None):
+        self.time_budget = time_budget
+        self.window = window
+        self.processes = processes
+        self.executor: Optional[ProcessPoolExecutor] = None
+
+    def pool(self) -> ProcessPoolExecutor:
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.processes)
+        return self.executor
+
+    def close(self):
+        """Stops the pool of processes, if it was started."""
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def __call__(self, players: List[Player], standings: Standings = None,
+                 opponent_matrix: OpponentMatrix = None
+                 ) -> List[Tuple[Player, Player]]:
+        return pair_players_in_parallel(players, standings, opponent_matrix,
+                                        self.time_budget, self.window,
+                                        self.processes, self.pool)
@@ -0,0 +1,179 @@
+"""Measures where the time of a tournament goes, when asked to.
+
+The profiler is off by default. Once enabled, e.g. with CHESS_PROFILE=1
+for the interactive program, it records:
+
+    the duration of each call to the main phases of the program: the
+        pairing of the rounds, the ranking, the serialization of the
+        tournament and the players, the saves and the requests to the
+        database;
+    the bytes written to each file of the database. With SQLite, the
+        bytes of the values saved: the pages and indexes SQLite writes
+        around them are not counted.
+
+The phases are nested: e.g. the ranking is also counted in the pairing
+that ranks the players first.
+
+At the end, the profile is written as a JSON summary, with the number
+of calls, the total time and the percentiles of the duration of each
+phase, and in the text format of Prometheus.
+
+The model knows nothing of the profiler: the serialization methods of
+the model are only wrapped when the profiler is enabled. The other
+phases are marked with the profiled decorator or the timed context
+manager. While the profiler is off, they cost a single check.
+"""
+
+import contextlib
+import functools
+import json
+import os
+import time
+from typing import Any, Callable, Dict, Iterator, List
+
+PROFILE_JSON_FILE = "profile.json"
+PROFILE_PROMETHEUS_FILE = "profile.prom"
+
+PERCENTILES = (50, 90, 99)
+
+
+def profiling_from_environment() -> bool:
+    """Returns True if the CHESS_PROFILE variable is set to 1."""
+    return os.environ.get("CHESS_PROFILE", "") == "1"
+
+
+def percentile(sorted_values: List[float], rank: float) -> float:
+    """Returns the nearest-rank percentile of values sorted ascending."""
+    index = max(0, -(-len(sorted_values) * rank // 100) - 1)
+    return sorted_values[int(index)]
+
+
+class Profiler:
+    """Records the duration of the phases and the bytes written.
+
+    Attributes:
+        enabled: whether anything is recorded.
+        durations: the duration of each call, in seconds, per phase.
+        bytes_written: the bytes written, per file.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.durations: Dict[str, List[float]] = {}
+        self.bytes_written: Dict[str, int] = {}
+
+    def record(self, phase: str, seconds: float):
+        self.durations.setdefault(phase, []).append(seconds)
+
+    def add_bytes(self, file_name: str, bytes_number: int):
+        if self.enabled:
+            self.bytes_written[file_name] = \
+                self.bytes_written.get(file_name, 0) + bytes_number
+
+    def reset(self):
+        self.durations.clear()
+        self.bytes_written.clear()
+
+    def summary(self) -> Dict[str, Any]:
+        """Returns the calls, total time and percentiles of each phase."""
+        phases = {}
+        for phase, durations in sorted(self.durations.items()):
+            sorted_durations = sorted(durations)
+            phase_summary = {"count": len(durations),
+                             "total_seconds": sum(durations)}
+            for rank in PERCENTILES:
+                phase_summary[f"p{rank}_seconds"] = percentile(
+                    sorted_durations, rank)
+            phase_summary["max_seconds"] = sorted_durations[-1]
+            phases[phase] = phase_summary
+        return {"phases": phases,
+                "bytes_written": dict(sorted(self.bytes_written.items()))}
+
+    def to_prometheus(self) -> str:
+        """Returns the profile in the text format of Prometheus."""
+        summary = self.summary()
+        lines = ["# HELP chess_phase_seconds Duration of the phases of "
+                 "the program.",
+                 "# TYPE chess_phase_seconds summary"]
+        for phase, phase_summary in summary["phases"].items():
+            for rank in PERCENTILES:
+                lines.append(
+                    f'chess_phase_seconds{{phase="{phase}",'
+                    f'quantile="{rank / 100}"}} '
+                    f'{phase_summary[f"p{rank}_seconds"]:.9f}')
+            lines.append(f'chess_phase_seconds_sum{{phase="{phase}"}} '
+                         f'{phase_summary["total_seconds"]:.9f}')
+            lines.append(f'chess_phase_seconds_count{{phase="{phase}"}} '
+                         f'{phase_summary["count"]}')
+
+        lines.extend(["# HELP chess_bytes_written_total Bytes written to "
+                      "the files of the database.",
+                      "# TYPE chess_bytes_written_total counter"])
+        for file_name, bytes_number in summary["bytes_written"].items():
+            lines.append(f'chess_bytes_written_total{{file="{file_name}"}} '
+                         f'{bytes_number}')
+        return "\n".join(lines) + "\n"
+
+    def write_reports(self, json_path: str = PROFILE_JSON_FILE,
+                      prometheus_path: str = PROFILE_PROMETHEUS_FILE):
+        with open(json_path, "w") as json_file:
+            json.dump(self.summary(), json_file, indent=4)
+        with open(prometheus_path, "w") as prometheus_file:
+            prometheus_file.write(self.to_prometheus())
+
+
+# the profiler of the program.
+profiler = Profiler()
+
+
+@contextlib.contextmanager
+def timed(phase: str) -> Iterator[None]:
+    """Records the duration of the block as a call to the phase."""
+    if not profiler.enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profiler.record(phase, time.perf_counter() - start)
+
+
+def profiled(phase: str) -> Callable[[Callable], Callable]:
+    """Decorates a function whose calls are recorded under the phase."""
+    def decorate(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                profiler.record(phase, time.perf_counter() - start)
+        wrapper.profiled_function = function
+        return wrapper
+    return decorate
+
+
+def enable_profiling():
+    """Starts recording, the serialization of the model included."""
+    from models import Player, Tournament
+
+    profiler.enabled = True
+    for model, method_name in ((Tournament, "serialize_tournament"),
+                               (Player, "serialize_player")):
+        method = getattr(model, method_name)
+        if not hasattr(method, "profiled_function"):
+            setattr(model, method_name, profiled(method_name)(method))
+
+
+def disable_profiling():
+    """Stops recording and gives the model its methods back."""
+    from models import Player, Tournament
+
+    profiler.enabled = False
+    for model, method_name in ((Tournament, "serialize_tournament"),
+                               (Player, "serialize_player")):
+        method = getattr(model, method_name)
+        setattr(model, method_name,
+                getattr(method, "profiled_function", method))
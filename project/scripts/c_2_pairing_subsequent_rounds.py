@@ -1,11 +1,14 @@
 """Pairs players for subsequent rounds (all rounds except the first).
 """
 
-from operator import attrgetter
-from typing import Dict, List, Tuple
+import os
+from typing import Any, Callable, Dict, List, Set, Tuple
 
-from c_1_pairing_first_round import beautify_player_representation
-from models import Player, Tournament, Match
+from c_1_pairing_first_round import (announce_pairs, plan_first_round,
+                                     short_player_repr)
+from c_27_profiling import profiled, timed
+from models import (Player, OpponentMatrix, RoundPlan, Standings,
+                    Tournament, Match)
 
 
 def check_match_result(player1: Player, player2: Player, match: Match):
@@ -64,7 +67,10 @@ def update_player_faced_opponents_attr(match: Match):
     player2.add_opponent(player2_opponent)
 
 
-def update_all_players_attrs_after_round(matches: Dict[str, Match]):
+def update_all_players_attrs_after_round(
+        matches: Dict[str, Match],
+        standings: Standings = None,
+        opponent_matrix: OpponentMatrix = None):
     """Updates players relevant attributes in accordance to match results.
 
     Modifies the opponents_faced and result_field attribute of the players
@@ -79,16 +85,30 @@ def update_all_players_attrs_after_round(matches: Dict[str, Match]):
 
     Attributes:
         matches: conceived for the rounds attribute of the relevant tournament.
+        standings: if given, the two players of each match are moved to
+            their new place in the standings as soon as the result is
+            applied.
+        opponent_matrix: if given, the meeting of the two players of
+            each match is recorded in it.
     """
     for match in matches.values():
         player1: Player = match.player1
         player2: Player = match.player2
         change_players_result_field(player1, player2, match)
         update_player_faced_opponents_attr(match)
+        if standings is not None:
+            standings.update(player1)
+            standings.update(player2)
+        if opponent_matrix is not None:
+            opponent_matrix.record_match(player1.player_id,
+                                         player2.player_id)
 
 
+@profiled("ranking")
 def rank_players_for_subsequent_round(
-        players_ranked_in_previous_round: List[Player]) -> List[Player]:
+        players_ranked_in_previous_round: List[Player],
+        standings: Standings = None,
+        tiebreaks: Any = None) -> List[Player]:
     """Ranks the players in accordance to the swiss system algorithm.
 
     In subsequent rounds the first ranked player competes with the second,
@@ -99,83 +119,290 @@ def rank_players_for_subsequent_round(
     multiple players have an equal number of points, sort those players
     by rank in ascending order.
 
-    The sorting is done in two steps. First, negating the rank of each player.
-    Second, sorting by points and rank in decreasing order.
+    If the standings of the tournament are given, they already hold the
+    players in that order and no sorting is done. Otherwise, the players
+    are sorted on the negated points and the rank.
+
+    If tiebreaks are given, the players with an equal number of points
+    are sorted by their tiebreaks first, then by rank.
 
     Args:
         players_ranked_in_previous_round: Players instances with their
             result_field attribute up to date.
+        standings: the standings of the tournament, kept up to date by
+            update_all_players_attrs_after_round.
+        tiebreaks: the Tiebreaks of the tournament, computed by
+            compute_tiebreaks from c_23_tiebreaks.py.
 
     Returns: players with their ranking attribute up to date.
     """
-    for player in players_ranked_in_previous_round:
-        player.ranking = -player.__getattribute__("ranking")
+    if tiebreaks is not None:
+        players_sorted = tiebreaks.ranked_players(
+            players_ranked_in_previous_round)
+        if standings is not None:
+            standings.reorder(players_sorted)
+            return standings.ranked_players()
+        for i, player in enumerate(players_sorted):
+            player.ranking = i + 1
+        return players_sorted
+
+    if standings is not None:
+        standings.refresh_rankings()
+        return standings.ranked_players()
 
     players_sorted_by_points_then_rank = sorted(
         players_ranked_in_previous_round,
-        key=attrgetter("result_field", 'ranking'),
-        reverse=True)
-
-    # Restoring the rank of each player for further uses.
-    for player in players_ranked_in_previous_round:
-        player.ranking = -player.__getattribute__("ranking")
+        key=lambda player: (-player.result_field, player.ranking))
 
     # Updating the players' rank attribute in accordance
     # to the ranking we just done.
     # remember that index starts at 0 but rankings starts at 1.
-    for player in players_sorted_by_points_then_rank:
-        player.ranking = players_sorted_by_points_then_rank.index(player) + 1
+    for i, player in enumerate(players_sorted_by_points_then_rank):
+        player.ranking = i + 1
 
     return players_sorted_by_points_then_rank
 
 
+def group_players_by_score(
+        ranked_players: List[Player]) -> List[List[Player]]:
+    """Buckets the players into score groups.
+
+    Args:
+        ranked_players: players sorted by points in decreasing order.
+
+    Returns: one list per distinct result_field value, from the highest
+        score group to the lowest. Inside each group, the players keep
+        the order they had in ranked_players.
+    """
+    score_groups: List[List[Player]] = []
+    for player in ranked_players:
+        if (score_groups
+                and score_groups[-1][0].result_field == player.result_field):
+            score_groups[-1].append(player)
+        else:
+            score_groups.append([player])
+
+    return score_groups
+
+
+def build_have_met(
+        players: List[Player],
+        opponent_matrix: OpponentMatrix = None
+) -> Callable[[Player, Player], bool]:
+    """Returns a function telling if two players already met.
+
+    If the tournament has an opponent matrix, the answer is read from it
+    with the players' ids. Otherwise, the last names of the opponents of
+    each player are put in a set. Either way, the lookup is done in
+    constant time.
+
+    Args:
+        players: the players that will be paired.
+        opponent_matrix: the opponent matrix of the tournament, if any.
+    """
+    if opponent_matrix is not None:
+        def have_met(player1: Player, player2: Player) -> bool:
+            return opponent_matrix.have_met(player1.player_id,
+                                            player2.player_id)
+        return have_met
+
+    opponents: Dict[int, Set[str]] = {
+        id(player): set(player.opponents_faced) for player in players}
+
+    def have_met(player1: Player, player2: Player) -> bool:
+        return player2.last_name in opponents[id(player1)]
+    return have_met
+
+
+def pair_score_group(
+        pool: List[Player],
+        have_met: Callable[[Player, Player], bool]
+) -> Tuple[List[Tuple[Player, Player]], List[Player]]:
+    """Pairs the players of one score group.
+
+    Each player, from the top of the group, meets the highest placed
+    player of the group he didn't meet yet. The players that cannot be
+    paired inside the group become floaters.
+
+    Args:
+        pool: the floaters coming from the group above followed by the
+            players of the score group.
+        have_met: tells if two players already met.
+
+    Returns: the pairs formed in the group and the floaters that will
+        be moved down to the next group.
+    """
+    pairs = []
+    floaters = []
+    remaining = list(pool)
+    while remaining:
+        top_player = remaining.pop(0)
+        for k, candidate in enumerate(remaining):
+            if not have_met(top_player, candidate):
+                pairs.append((top_player, remaining.pop(k)))
+                break
+        else:
+            floaters.append(top_player)
+
+    return pairs, floaters
+
+
+def repair_last_floaters(
+        pairs: List[Tuple[Player, Player]],
+        floaters: List[Player],
+        have_met: Callable[[Player, Player], bool]
+) -> List[Tuple[Player, Player]]:
+    """Pairs the players left over once all the score groups were paired.
+
+    The left over players already met each other. The function looks,
+    from the bottom of the standings, for an existing pair it can split
+    in order to give each left over player a new opponent. If no such
+    pair exists, the rematch is unavoidable and is kept.
+
+    Args:
+        pairs: the pairs formed in all the score groups.
+        floaters: the players floated out of the lowest score group.
+        have_met: tells if two players already met.
+
+    Returns: the pairs, the left over players included.
+    """
+    for i in range(0, len(floaters) - 1, 2):
+        first, second = floaters[i], floaters[i + 1]
+        for k in range(len(pairs) - 1, -1, -1):
+            third, fourth = pairs[k]
+            if not have_met(first, third) and not have_met(second, fourth):
+                pairs[k] = (third, first)
+                pairs.append((fourth, second))
+                break
+            if not have_met(first, fourth) and not have_met(second, third):
+                pairs[k] = (third, second)
+                pairs.append((fourth, first))
+                break
+        else:
+            pairs.append((first, second))
+
+    return pairs
+
+
+def pair_players_for_subsequent_round(
+        players_ranked_in_previous_round: List[Player],
+        standings: Standings = None,
+        opponent_matrix: OpponentMatrix = None
+) -> List[Tuple[Player, Player]]:
+    """Pairs the players score group by score group.
+
+    The players are ranked then bucketed by number of points. Each
+    score group is paired from the top, a player meeting the highest
+    placed opponent of the group he didn't face yet. The players that
+    cannot be paired in their group float down to the next group.
+
+    Whether two players already met is looked up in constant time, so
+    the runtime stays close to linear in the number of players.
+
+    Args:
+        players_ranked_in_previous_round: Players instances with their
+            result_field and opponents_faced attribute up to date
+        standings: the standings of the tournament, if any.
+        opponent_matrix: the opponent matrix of the tournament, if any.
+
+    Returns: the pairs, from the top board to the bottom board.
+    """
+    players_ranked_for_subsequent_round = rank_players_for_subsequent_round(
+        players_ranked_in_previous_round, standings)
+
+    have_met = build_have_met(players_ranked_for_subsequent_round,
+                              opponent_matrix)
+
+    pairs: List[Tuple[Player, Player]] = []
+    floaters: List[Player] = []
+    for score_group in group_players_by_score(
+            players_ranked_for_subsequent_round):
+        group_pairs, floaters = pair_score_group(floaters + score_group,
+                                                 have_met)
+        pairs.extend(group_pairs)
+
+    return repair_last_floaters(pairs, floaters, have_met)
+
+
+@profiled("pairing")
 def avoid_player_meeting_twice(
-        players_ranked_in_previous_round: List[Player]) -> List[Player]:
+        players_ranked_in_previous_round: List[Player],
+        standings: Standings = None) -> List[Player]:
     """Avoids as much as possible match duplicate.
 
-    If two players are about to meet, and already met, the function swaps
-    one of the players w/ another one located two indexes further in the list.
+    The pairing is delegated to pair_players_for_subsequent_round. A
+    rematch only happens if no other pairing of the lowest score
+    groups exists.
 
     Args:
         players_ranked_in_previous_round: Players instances with their
             result_field and opponents_faced attribute up to date
+        standings: the standings of the tournament, if any.
 
-    Returns: The players ranked in order to avoid duplicate.
+    Returns: The players ordered so that the first player meets the
+        second, the third meets the fourth and so on.
     """
-    players_ranked_for_subsequent_round = rank_players_for_subsequent_round(
-        players_ranked_in_previous_round)
+    pairs = pair_players_for_subsequent_round(
+        players_ranked_in_previous_round, standings)
 
-    p = players_ranked_for_subsequent_round
-    for _ in range(len(p)):
-        for i in range(len(p)):
-            if i == 0:
-                continue
-            if p[i - 1].last_name in p[i].opponents_faced:
-                p[i], p[(i + 2) % (len(p))] = p[(i + 2) % (len(p))], p[i]
-    players_paired_without_duplicate = p
+    players_paired_without_duplicate = []
+    for player1, player2 in pairs:
+        players_paired_without_duplicate.append(player1)
+        players_paired_without_duplicate.append(player2)
 
     return players_paired_without_duplicate
 
 
-@beautify_player_representation
-def announce_pairing_for_subsequent_round(tournament: Tournament) -> List[str]:
+def plan_round(tournament: Tournament, round_number: int) -> RoundPlan:
+    """Returns the pairing of a round, computing it only once.
+
+    The first time the plan of a round is requested, the players are
+    paired and the plan is cached in the plan attribute of the round.
+    Further requests return the cached plan. Therefore, the players are
+    ranked and paired only once per round.
+
+    The rounds after the first are paired by the pairing of the
+    tournament if it has one, by pair_players_for_subsequent_round
+    otherwise. Their plan is journaled if the tournament is: it is
+    found again if the program stops during the round.
+
+    Args:
+        tournament: The tournament taking place with the player
+            objects' attributes up to date.
+        round_number: the number of the round to pair. The rounds must
+            have been instantiated beforehand.
+    """
+    if round_number == 1:
+        return plan_first_round(tournament)
+
+    round_to_pair = tournament.rounds[f"Round {round_number}"]
+    if round_to_pair.plan is None:
+        pair_players = (tournament.pairing
+                        or pair_players_for_subsequent_round)
+        with timed("pairing"):
+            pairs = pair_players(
+                tournament.players_instances, tournament.standings,
+                tournament.opponent_matrix)
+        round_to_pair.plan = RoundPlan(round_to_pair.name_field, tuple(pairs))
+        if tournament.journal is not None:
+            tournament.journal.record_plan(round_number, round_to_pair.plan)
+
+    return round_to_pair.plan
+
+
+def announce_pairing_for_subsequent_round(tournament: Tournament,
+                                          round_number: int) -> List[str]:
     """Returns the matches taking place in the subsequent rounds.
 
     Args:
         tournament: The tournament taking place with the player
             objects' attributes up to date. The players will be retrieved
             from the players_instances attribute of the tournament.
+        round_number: the number of the round about to take place.
     """
-    paired_players: List[Player] = avoid_player_meeting_twice(
-        tournament.players_instances)
+    pairs = plan_round(tournament, round_number).pairs
 
-    p = paired_players
-    pairing_announcement = [f'{p[0]} will meet {p[1]}']
-    for i in range(len(p)):
-        if i == 0 or i == 1 or i == 2:
-            continue
-        if i >= 3 and (i % 2) != 0:
-            pairing_announcement.append(f'{p[i - 1]} will meet {p[i]}')
+    pairing_announcement = announce_pairs(pairs)
 
     print(f"\nthe matches for the following round are:"
           f"\n{pairing_announcement}\n")
@@ -183,20 +410,43 @@ def announce_pairing_for_subsequent_round(tournament: Tournament) -> List[str]:
     return pairing_announcement
 
 
-@beautify_player_representation
+def tiebreaks_from_environment() -> bool:
+    """Whether CHESS_TIEBREAKS asks for the ties to be broken.
+
+    Defined here rather than in c_23_tiebreaks.py, which imports NumPy.
+    """
+    return os.environ.get("CHESS_TIEBREAKS", "") not in ("", "0")
+
+
 def announce_ranking(
-        tournament: Tournament) -> List[str]:
+        tournament: Tournament, tiebreaks: bool = False) -> List[str]:
     """Returns the rank of each player.
 
     Conceived to display the ranking at the end of the tournament.
 
     Args:
         tournament: The tournament that took place.
+        tiebreaks: whether to break the ties between players with the
+            same number of points, see c_23_tiebreaks.py. The tiebreaks
+            of each player are then announced too.
     """
+    computed_tiebreaks = None
+    if tiebreaks:
+        # NumPy is only imported when the tiebreaks are asked for.
+        from c_23_tiebreaks import compute_tiebreaks
+        computed_tiebreaks = compute_tiebreaks(tournament)
+
     ranking_announcement = []
-    p = rank_players_for_subsequent_round(tournament.players_instances)
+    p = rank_players_for_subsequent_round(tournament.players_instances,
+                                          tournament.standings,
+                                          computed_tiebreaks)
     for i in range(len(p)):
-        ranking_announcement.append(f'{p[i]} is number {i + 1}')
+        announcement = f'{short_player_repr(p[i])} is number {i + 1}'
+        if computed_tiebreaks is not None:
+            values = computed_tiebreaks.values(p[i])
+            announcement += " (" + ", ".join(
+                f"{name} {value:g}" for name, value in values.items()) + ")"
+        ranking_announcement.append(announcement)
 
     print(f"\nthe final ranking is :\n{ranking_announcement}\n")
 
@@ -1,9 +1,9 @@
 """Allows the dynamic instantiation of all the players in the tournament.
 """
 
-from typing import List, Tuple
+from typing import List, Optional, Sequence, Tuple
 
-from models import Player, Tournament
+from models import OpponentMatrix, Player, Standings, Tournament
 from view import collect_player_info
 
 
@@ -16,19 +16,38 @@ class CreatingPlayersStoringInTournament:
     In order to instantiate the players, we format the data from view.py.
     More precisely, collect_player_info from view.py is called once for
     every player in the tournament. With that formatted data, the players
-    are iteratively instantiated.
+    are iteratively instantiated, each one receiving his position in the
+    registration order as player_id. The standings of the tournament and
+    the matrix recording who met whom are then built from those players.
+
+    If the players info is given when the class is instantiated, the user
+    isn't prompted: the given info is used instead.
 
     Attributes:
         tournament: the tournament in which the players compete.
         players_number: the number of players competing in the
             tournament.
+        players_info: one tuple per player, with the values
+            collect_player_info would return. None to prompt the user.
+
+    Raises:
+        ValueError: the number of players info given doesn't match the
+            number of players in the tournament.
     """
-    def __init__(self, tournament: Tournament):
+    def __init__(self, tournament: Tournament,
+                 players_info: Optional[Sequence[Tuple]] = None):
         self.tournament = tournament
         self.players_number: int = tournament.players_number
+        self.players_info = players_info
         self.create_and_store_player_instances()
 
     def requesting_players_info(self) -> List[Tuple[str, str, str, str, str]]:
+        if self.players_info is not None:
+            if len(self.players_info) != self.players_number:
+                raise ValueError("the number of players given doesn't "
+                                 "match the tournament's players number")
+            return list(self.players_info)
+
         players_info = []
 
         for _ in range(self.players_number):
@@ -41,8 +60,11 @@ class CreatingPlayersStoringInTournament:
         players_info = self.requesting_players_info()
 
         player_instances: List[Player] = []
-        for player_info in players_info:
-            player_instance = Player(*player_info)
+        for player_id, player_info in enumerate(players_info):
+            player_instance = Player(*player_info, player_id=player_id)
             player_instances.append(player_instance)
 
         self.tournament.players_instances = player_instances
+        self.tournament.standings = Standings(player_instances)
+        self.tournament.opponent_matrix = OpponentMatrix(
+            len(player_instances))
@@ -1,9 +1,9 @@
 """Allows the dynamic instantiation of all the rounds in the tournament.
 """
 
-import time
 from typing import Dict, Tuple
 
+from c_9_time_control import Clock, RealClock
 from models import Round, Tournament
 
 
@@ -13,7 +13,8 @@ class CreatingRoundStoringInTournament:
     When instantiated, the class will create all the round objects from the
     the tournament. The start and end datetime of the rounds are calculated
     based on two values. The time the rounds are instantiated and
-    the tournament time_control attribute.
+    the tournament time_control attribute. The former is read from a
+    clock, by default the real clock.
 
     The rounds matches attribute will be let to the default
     value, meaning None.
@@ -23,6 +24,7 @@ class CreatingRoundStoringInTournament:
     Attributes:
         tournament: the tournament in which the round are stored.
         number_of_rounds: the number of rounds taking place in the tournament.
+        clock: the clock giving the time the rounds are instantiated.
 
     Raises:
         IndexError: if a round that should not happen in the tournament was
@@ -31,9 +33,10 @@ class CreatingRoundStoringInTournament:
         ValueError: if the round already have been created and stored
             in the tournament.
     """
-    def __init__(self, tournament: Tournament):
+    def __init__(self, tournament: Tournament, clock: Clock = None):
         self.tournament = tournament
         self.number_of_rounds: int = self.tournament.number_of_rounds
+        self.clock = clock if clock is not None else RealClock()
         self.store_rounds()
 
     def instantiate_round(self, round_number: int) -> Tuple[str, Round]:
@@ -46,17 +49,11 @@ class CreatingRoundStoringInTournament:
         # the rounds will last 20 min if time control is set to rapid,
         # 5 min if time control is
         # set to blitz, 3 min if time control is set to bullet.
-        round_start_datetime: float = time.time()
-        if (self.tournament.time_control == "bullet" or
-                self.tournament.time_control == "BULLET"):
-            round_end_datetime: float = round_start_datetime + 180
-        elif (self.tournament.time_control == "blitz" or
-              self.tournament.time_control == "BLITZ"):
-            round_end_datetime: float = round_start_datetime + 300
-        elif (self.tournament.time_control == "rapid" or
-              self.tournament.time_control == "RAPID"):
-            round_end_datetime: float = round_start_datetime + 12000
-        else:
+        round_start_datetime: float = self.clock.now()
+        try:
+            round_end_datetime: float = (round_start_datetime
+                                         + self.tournament.round_duration())
+        except KeyError:
             # double-check. The error should be triggered previously
             # when the tournament is instantiated.
             raise ValueError("something went wrong with the"
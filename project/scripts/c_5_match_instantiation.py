@@ -4,15 +4,79 @@ Keep in mind that for the swiss-system algorithm, the pairing for the
 first round is different from the one for subsequent rounds.
 """
 
-import itertools
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 
-from c_1_pairing_first_round import pairing_for_first_round
-from c_2_pairing_subsequent_rounds import avoid_player_meeting_twice
-from models import Player, Round, Tournament, Match
+from c_2_pairing_subsequent_rounds import plan_round
+from models import MATCH_RESULTS, Player, Round, Tournament, Match
 from view import collect_results
 
 
+def check_result(match_result: str) -> str:
+    """Returns the result of a match if it is "W", "L" or "D".
+
+    Raises:
+        ValueError: the result is anything else.
+    """
+    if match_result not in MATCH_RESULTS:
+        raise ValueError(f'{match_result!r} is not a result: '
+                         f'please enter "W", "L" or "D"')
+    return match_result
+
+
+def given_results(results: Sequence[str],
+                  players_pairs: Sequence[Tuple[Player, Player]]
+                  ) -> List[str]:
+    """Checks the results given instead of prompting the user.
+
+    All the results are checked before any match is instantiated: if
+    one of them is wrong, the tournament is left unchanged.
+
+    Raises:
+        ValueError: there isn't exactly one result per match, or one of
+            them isn't "W", "L" or "D".
+    """
+    if len(results) != len(players_pairs):
+        raise ValueError("please, give exactly one result per match")
+    return [check_result(match_result) for match_result in results]
+
+
+def collect_round_results(tournament: Tournament, round_number: int,
+                          known_results: Sequence[str] = ()) -> List[str]:
+    """Prompts the user for the results of a round not known yet.
+
+    Each result is checked, then journaled as soon as it is entered, if
+    the tournament is journaled. A wrong result is never journaled: the
+    tournament can be recovered up to the result before it.
+
+    Args:
+        tournament: the tournament taking place.
+        round_number: the number of the round taking place.
+        known_results: the results of the first matches of the round,
+            e.g. recovered from the journal after a crash.
+
+    Raises:
+        ValueError: a result entered isn't "W", "L" or "D".
+    """
+    players_pairs = plan_round(tournament, round_number).pairs
+
+    results = list(known_results)
+    for player1, _ in players_pairs[len(results):]:
+        match_result = check_result(collect_results(player1.last_name))
+        if tournament.journal is not None:
+            tournament.journal.record_results(round_number, len(results),
+                                              [match_result])
+        results.append(match_result)
+
+    return results
+
+
+def journal_results(tournament: Tournament, round_number: int,
+                    results: List[str]):
+    """Journals the results accepted, if the tournament is journaled."""
+    if tournament.journal is not None:
+        tournament.journal.record_results(round_number, 0, results)
+
+
 class CreatingMatchesStoringInRoundOne:
     """Instantiates and stores the matches from round one.
 
@@ -33,27 +97,30 @@ class CreatingMatchesStoringInRoundOne:
         tournament: the tournament taking place.
         round_number: the number of the round taking place.
             Should be 1.
+        results: the result of each match of the round, in the order of
+            the round plan. None to prompt the user.
     """
-    def __init__(self, tournament: Tournament, round_number: int):
+    def __init__(self, tournament: Tournament, round_number: int,
+                 results: Optional[Sequence[str]] = None):
         self.tournament = tournament
         self.round_number = round_number
+        self.results = results
         self.instantiate_and_store_matches_in_round()
 
     def request_match_results(self) -> List[str]:
-        players_pairs: List[Tuple[Player, Player]] = pairing_for_first_round(
-            self.tournament.players_instances)
+        players_pairs: Tuple[Tuple[Player, Player], ...] = plan_round(
+            self.tournament, self.round_number).pairs
 
-        results = []
-        for i in range(len(players_pairs)):
-            player1 = players_pairs[i][0]
-            match_result = collect_results(player1.last_name)
-            results.append(match_result)
+        if self.results is not None:
+            results = given_results(self.results, players_pairs)
+            journal_results(self.tournament, self.round_number, results)
+            return results
 
-        return results
+        return collect_round_results(self.tournament, self.round_number)
 
     def gather_matches_info(self) -> List[Tuple[Player, Player, str, Round]]:
-        player_pairs_for_first_round = pairing_for_first_round(
-            self.tournament.players_instances)
+        player_pairs_for_first_round = plan_round(
+            self.tournament, self.round_number).pairs
 
         match_results = self.request_match_results()
 
@@ -103,30 +170,33 @@ class CreatingMatchesStoringInSubsequentRounds:
     Attributes:
         tournament: the tournament taking place.
         round_number: the number of the round taking place.
+        results: the result of each match of the round, in the order of
+            the round plan. None to prompt the user.
     """
-    def __init__(self, tournament: Tournament, round_number: int):
+    def __init__(self, tournament: Tournament, round_number: int,
+                 results: Optional[Sequence[str]] = None):
         self.tournament = tournament
         self.round_number = round_number
+        self.results = results
         self.instantiate_and_store_matches_in_round()
 
     def request_match_results(self) -> List[str]:
-        ranked_players: List[Player] = avoid_player_meeting_twice(
-            self.tournament.players_instances)
+        players_pairs: Tuple[Tuple[Player, Player], ...] = plan_round(
+            self.tournament, self.round_number).pairs
 
-        results = []
-        for i in range(0, len(ranked_players), 2):
-            # in subsequent rounds, pl1 meets pl2, pl3 meets pl4 and so on.
-            # Therefore, pl1 from match1 is at index 0
-            # pl1 from match 2 is at index 2 and so on.
-            player1 = ranked_players[i]
-            match_result = collect_results(player1.last_name)
-            results.append(match_result)
+        if self.results is not None:
+            results = given_results(self.results, players_pairs)
+            journal_results(self.tournament, self.round_number, results)
+            return results
 
-        return results
+        return collect_round_results(self.tournament, self.round_number)
 
     def gather_matches_info(self) -> List[Tuple[Player, Player, str, Round]]:
-        ranked_players: List[Player] = avoid_player_meeting_twice(
-            self.tournament.players_instances)
+        # the pairing was computed when the round was announced.
+        # Reading it from the round plan guarantees the results are
+        # matched with the pairs the players actually played.
+        players_pairs: Tuple[Tuple[Player, Player], ...] = plan_round(
+            self.tournament, self.round_number).pairs
 
         match_results: List[str] = self.request_match_results()
 
@@ -134,16 +204,8 @@ class CreatingMatchesStoringInSubsequentRounds:
             f"Round {self.round_number}"]
 
         match_instances_attributes = []
-
-        iterable_pl_pairs = range(0, len(ranked_players), 2)
-        # for each two players there is one match,
-        # so if there are 10 players in the tournament, we have 5 matches.
-        iterable_results = range(len(ranked_players) // 2)
-
-        for i, j in itertools.zip_longest(iterable_pl_pairs, iterable_results):
-            match_players_1 = ranked_players[i]
-            match_players_2 = ranked_players[i + 1]
-            match_result = match_results[j]
+        for (match_players_1, match_players_2), match_result in zip(
+                players_pairs, match_results):
             match_instances_attributes.append((match_players_1,
                                                match_players_2,
                                                match_result,
@@ -1,14 +1,18 @@
-"""Saves data about the tournament the user needs in a JSON database.
+"""Saves data about the tournament the user needs in the database.
 """
 
-from typing import Dict, List
-
-from tinydb import TinyDB
+import os
+from typing import Optional
 
+from c_17_storage import Storage, get_storage
+from c_27_profiling import profiled
 from models import Tournament
 from view import (what_table_to_save)
 
-db = TinyDB('db.json', indent=4, separators=(',', ': '))
+
+def incremental_save_from_environment() -> bool:
+    """Returns True if the CHESS_INCREMENTAL_SAVE variable is set to 1."""
+    return os.environ.get("CHESS_INCREMENTAL_SAVE", "") == "1"
 
 
 class SaveDataInDB:
@@ -18,20 +22,38 @@ class SaveDataInDB:
     or a tournament table. When instantiated, this class asks the user if
     he needs the player or the tournament table or both.
 
-    To requests user needs, what_table_to_save from view.py is called. To
-    format the data in order to store it in a JSON db, we use object methods
-    defined in models.py.
+    To requests user needs, what_table_to_save from view.py is called. The
+    tables are then written by the storage from c_17_storage.py: db.json
+    by default, or a SQLite database.
+
+    In db.json, a saved table is truncated then written again by
+    default, which rewrites the whole database file. An incremental
+    save instead appends to the deltas file only the fields and rounds
+    that changed since the table was last saved, see c_13_save_deltas.py.
 
     Attributes:
         tournament: The tournament that is taking place.
+        what_table_to_save: the number corresponding to the user need,
+            as what_table_to_save from view.py would return it. If None,
+            the user is prompted.
+        incremental: True to save incrementally.
+        storage: where the tables are saved. By default, the storage
+            chosen with the CHESS_STORAGE environment variable.
 
     Raises:
         ValueError: The user doesn't enter a number corresponding
             to one of the possible actions.
     """
-    def __init__(self, tournament: Tournament):
-        self.what_table_to_save = what_table_to_save()
+    def __init__(self, tournament: Tournament,
+                 what_table: Optional[str] = None,
+                 incremental: bool = False,
+                 storage: Optional[Storage] = None):
+        if what_table is None:
+            what_table = what_table_to_save()
+        self.what_table_to_save = what_table
         self.tournament = tournament
+        self.incremental = incremental
+        self.storage = storage if storage is not None else get_storage()
 
         if self.what_table_to_save == "1":
             self.save_the_tournament(self.tournament.name)
@@ -47,21 +69,11 @@ class SaveDataInDB:
                              "please only enter the number corresponding "
                              "to your need")
 
+    @profiled("save_players")
     def save_players_from_tournament(self):
-        serialized_players: List[Dict[str, str]] = []
-        for player in self.tournament.players_instances:
-            serialized_player: Dict[str, str] = player.serialize_player()
-            serialized_players.append(serialized_player)
-
-        player_table_name = f"players_competing_in_{self.tournament.name}"
-        players_table = db.table(player_table_name)
-        players_table.truncate()
-        players_table.insert_multiple(serialized_players)
+        self.storage.save_players(self.tournament, self.incremental)
 
+    @profiled("save_tournament")
     def save_the_tournament(self, tournament_table_name: str):
-
-        serialized_tournament = self.tournament.serialize_tournament()
-
-        tournament_table = db.table(tournament_table_name)
-        tournament_table.truncate()
-        tournament_table.insert(serialized_tournament)
+        # the tournament is saved under its own name.
+        self.storage.save_tournament(self.tournament, self.incremental)
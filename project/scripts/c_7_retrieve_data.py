@@ -1,14 +1,11 @@
 """Retrieves the data the user needs from the database.
 """
 
-import datetime
-import json
-from operator import attrgetter
-from typing import Dict, List, Union, Tuple, Any
+from typing import Any, Dict, Iterator, List, Optional
 
-from tinydb import Query
-
-from models import Player, Round, Tournament, Match
+from c_17_storage import ALPHABETICAL, BY_RANKING, Storage, get_storage
+from c_27_profiling import timed
+from models import Player, Tournament
 from view import (what_data_to_read,
                   what_tournament_name)
 
@@ -20,13 +17,24 @@ class RequestsMenu:
     some cases what_tournament_name from view.py to determine
     the user need.
 
-    Then, it acts in three broad steps. First, it retrieves the
-    necessary table from the database. Second, it deserializes
-    the data from the table in order to return it to the user. Third,
-    if necessary, it sorts data according to the user need.
+    Then, it asks the storage from c_17_storage.py for the data, already
+    deserialized and sorted according to the user need. With db.json,
+    the database is only parsed again if it changed since the previous
+    request. With SQLite, each request is an indexed SQL query.
+
+    The request and the tournament name can also be given when the class
+    is instantiated, in which case the user isn't prompted for them. The
+    data found is stored in the result attribute.
 
     Attributes:
         tournament: the tournament that is taking place.
+        request: the number corresponding to the user need.
+        which_tournament: the name of the tournament the request refers
+            to, for the requests that need one.
+        storage: where the data is searched. By default, the storage
+            chosen with the CHESS_STORAGE environment variable.
+        result: the data returned by the request. None if the user
+            didn't need anything.
 
     Raises:
         ValueError: The user doesn't enter a number corresponding
@@ -36,176 +44,50 @@ class RequestsMenu:
             tables are searched in the database from the tournament
             name the players competed in.
     """
-    def __init__(self, tournament: Tournament):
+    def __init__(self, tournament: Tournament,
+                 request: Optional[str] = None,
+                 which_tournament: Optional[str] = None,
+                 storage: Optional[Storage] = None):
         self.tournament = tournament
-        self.User = Query()
-        self.request: str = what_data_to_read()
-        self.which_tournament: str = self.check_and_complete_the_request()
-        self.search_in_database()
-
-    def check_and_complete_the_request(self) -> str:
+        self.storage = storage if storage is not None else get_storage()
+        if request is None:
+            request = what_data_to_read()
+        self.request: str = request
+        self.which_tournament: str = self.check_and_complete_the_request(
+            which_tournament)
+        self.result = self.search_in_database()
+
+    def check_and_complete_the_request(
+            self, which_tournament: Optional[str] = None) -> str:
         if self.request not in ["1", "2", "3", "4", "5", "6", "7", "8"]:
             raise ValueError("please, enter only "
                              "the number corresponding to your request")
 
         if self.request in ["1", "2", "6", "7"]:
-            which_tournament = what_tournament_name()
+            if which_tournament is None:
+                which_tournament = what_tournament_name()
             return which_tournament
 
     def search_in_database(self):
-        if self.request == "1":
-            self.players_in_a_tournament_ranked_alphabetically()
-        elif self.request == "2":
-            self.players_ranking_from_a_tournament()
-        elif self.request == "3":
-            self.all_tournaments_players_ranked_alphabetically()
-        elif self.request == "4":
-            self.all_tournaments_players_ranking()
-        elif self.request == "5":
-            self.all_tournaments()
-        elif self.request == "6":
-            self.all_rounds_in_a_tournament()
-        elif self.request == "7":
-            self.all_matches_in_a_tournament()
-
-    @staticmethod
-    def open_database():
-        f = open("db.json")
-
-        database = json.load(f)
-        f.close()
-        return database
-
-    def find_the_player_table(self) -> List[
-            Dict[str, Dict[str, Union[str, list, float]]]]:
-
-        database = self.open_database()
-
-        player_table_name = f"players_competing_in_{self.which_tournament}"
-        serialized_players = [table for table_name, table in database.items()
-                              if table_name == player_table_name]
-        if not serialized_players:
-            raise KeyError("the player table "
-                           "you're searching wasn't found."
-                           " Please, check your spelling")
-
-        return serialized_players
-
-    def deserialize_players(self) -> List[Player]:
-        # Serialized_players is a list containing one dictionary
-        # containing doc_id(key):player_attributes(value) pairs.
-        serialized_players: List[Dict[str, Dict[
-            str, Union[str, list, float]]]] = self.find_the_player_table()
-
-        list_of_deserialized_players = []
-        for serialized_players_dict in serialized_players:
-            for doc_id, player_attributes in serialized_players_dict.items():
-                player_attributes["result_field"] = float(
-                    player_attributes["result_field"])
-                player = Player(**player_attributes)
-
-                opponents_faced = json.loads(
-                    player_attributes['opponents_faced'])
-                # Why not append the entire list directly ?
-                # Because an empty list would be appended
-                for opponent in opponents_faced:
-                    player.opponents_faced.append(opponent)
-                list_of_deserialized_players.append(player)
-
-        return list_of_deserialized_players
-
-    def find_the_tournament_table(self) -> Tuple[str, Dict[
-            str, Union[str, int, Dict[str, Union[str, Dict[str, str]]]]]]:
-
-        database = self.open_database()
-
-        serialized_tournament_data: List[Tuple[str, Any]] = [
-            (table_name, table)
-            for table_name, table
-            in database.items()
-            if table_name == self.which_tournament]
-
-        if not serialized_tournament_data:
-            raise KeyError("the player table"
-                           " you're searching wasn't found."
-                           " Please, check your spelling")
-
-        # The tuple we need is the only object in the list.
-        tournament_name_and_table: Tuple = serialized_tournament_data[0]
-
-        return tournament_name_and_table
-
-    def deserialize_tournament(self) -> Tournament:
-        tournament_name, tournament_table = self.find_the_tournament_table()
-
-        tournament_name: str = tournament_name
-
-        # There will always be only one iteration of the following loop.
-        # However, given that the tinyDB table
-        # doesn't implement  the __getitem__ attr,
-        # I couldn't think of another way to deserialize the tournament.
-        tournament_attrs: List[Union[str, Any]] = []
-        for attr_name, attrs_value in tournament_table.items():
-            tournament_attrs.append(tournament_name)
-            tournament_attrs.append(attrs_value["venue"])
-            tournament_attrs.append(attrs_value["date"])
-            tournament_attrs.append(attrs_value["players number"])
-            tournament_attrs.append(attrs_value["description"])
-            tournament_attrs.append(attrs_value["time control"])
-            tournament_attrs.append(attrs_value["number of rounds"])
-
-            tourn_rds_serialized = attrs_value["rounds"]
-            tournament_rounds = {}
-            for round_name, serialized_round in tourn_rds_serialized.items():
-                deserialized_round = self.deserialize_round(serialized_round)
-                tournament_rounds[round_name] = deserialized_round
-            tournament_attrs.append(tournament_rounds)
-
-        deserialized_tournament = Tournament(*tournament_attrs)
-
-        return deserialized_tournament
-
-    def deserialize_round(self,
-                          serialized_round: Union[
-                              str, Dict[str, Any]]) -> Round:
-        round_name_field = serialized_round
-        round_tournament = serialized_round["tournament"]
-
-        round_s_datetime = serialized_round["start_datetime"]
-        epoch_s_datetime = datetime.datetime.fromisoformat(
-            round_s_datetime).timestamp()
-
-        round_e_datetime = serialized_round["end_datetime"]
-        epoch_e_datetime = datetime.datetime.fromisoformat(
-            round_e_datetime).timestamp()
-
-        serialized_matches = serialized_round["matches"]
-        round_matches = {}
-        for match_number, serialized_match in serialized_matches.items():
-            deserialized_match = self.deserialize_matches(serialized_match)
-            round_matches[f"match{match_number}"] = deserialized_match
-
-        deserialized_round = Round(round_name_field, round_tournament,
-                                   epoch_s_datetime,
-                                   epoch_e_datetime, round_matches)
-
-        return deserialized_round
-
-    @staticmethod
-    def deserialize_matches(serialized_match: Dict[str, Any]) -> Match:
-        match_player1 = serialized_match["player1"]
-        match_player_2 = serialized_match["player2"]
-        match_result = serialized_match["result"]
-        match_round = serialized_match["round"]
-        deserialized_match = Match(match_player1, match_player_2, match_result,
-                                   match_round)
-
-        return deserialized_match
+        with timed(f"request_{self.request}"):
+            if self.request == "1":
+                return self.players_in_a_tournament_ranked_alphabetically()
+            elif self.request == "2":
+                return self.players_ranking_from_a_tournament()
+            elif self.request == "3":
+                return self.all_tournaments_players_ranked_alphabetically()
+            elif self.request == "4":
+                return self.all_tournaments_players_ranking()
+            elif self.request == "5":
+                return self.all_tournaments()
+            elif self.request == "6":
+                return self.all_rounds_in_a_tournament()
+            elif self.request == "7":
+                return self.all_matches_in_a_tournament()
 
     def players_ranking_from_a_tournament(self) -> List[Player]:
-        deserialized_players: List[Player] = self.deserialize_players()
-        sorted_deserialized_players = sorted(deserialized_players,
-                                             key=lambda x: x.ranking)
+        sorted_deserialized_players = self.storage.players_of_tournament(
+            self.which_tournament, BY_RANKING)
 
         print(f"This is the ranking from"
               f" the selected tournament:"
@@ -214,9 +96,8 @@ class RequestsMenu:
         return sorted_deserialized_players
 
     def players_in_a_tournament_ranked_alphabetically(self) -> List[Player]:
-        list_of_deserialized_players: List[Player] = self.deserialize_players()
-        sorted_deserialized_players = sorted(list_of_deserialized_players,
-                                             key=lambda x: x.last_name)
+        sorted_deserialized_players = self.storage.players_of_tournament(
+            self.which_tournament, ALPHABETICAL)
 
         print(f"those are the players from the selected"
               f" tournament, ranked alphabetically:\n"
@@ -224,33 +105,11 @@ class RequestsMenu:
 
         return sorted_deserialized_players
 
-    def gather_players_from_all_tournaments(self) -> List[Player]:
-        # The idea is that all tournaments tables' first key is "venue" while
-        # player's first key is "last_name"
-        database = self.open_database()
-
-        all_players = []
-        for table in database.values():
-            for nested_table in table.values():
-                if list(nested_table.keys())[0] == "last_name":
-                    player_table = nested_table
-                    player_table["result_field"] = float(
-                        player_table["result_field"])
-                    player = Player(**player_table)
-                    all_players.append(player)
-
-        return all_players
-
     def all_tournaments_players_ranking(self) -> List[Player]:
-        all_players = self.gather_players_from_all_tournaments()
-
-        for player in all_players:
-            player.ranking = -player.__getattribute__("ranking")
-        all_players_ranked = sorted(all_players,
-                                    key=attrgetter("result_field", 'ranking'),
-                                    reverse=True)
-        for player in all_players:
-            player.ranking = -player.__getattribute__("ranking")
+        # sorted by points in decreasing order then by rank in
+        # ascending order.
+        all_players_ranked = self.storage.players_of_all_tournaments(
+            BY_RANKING)
 
         print(f"this is the ranking of all the players"
               f" available in the database:\n "
@@ -259,9 +118,8 @@ class RequestsMenu:
         return all_players_ranked
 
     def all_tournaments_players_ranked_alphabetically(self) -> List[Player]:
-        all_players: List[Player] = self.gather_players_from_all_tournaments()
-
-        all_players_ranked = sorted(all_players, key=attrgetter("last_name"))
+        all_players_ranked = self.storage.players_of_all_tournaments(
+            ALPHABETICAL)
 
         print(f"those are the players from all the"
               f" tournaments available in the database,"
@@ -269,39 +127,27 @@ class RequestsMenu:
 
         return all_players_ranked
 
-    def all_tournaments(self) -> List[Tournament]:
-        database = self.open_database()
-
-        all_tournaments = []
-        for table in database.values():
-            for nested_table in table.values():
-                if list(nested_table.keys())[0] == "venue":
-                    tournament_table = nested_table
-                    all_tournaments.append(tournament_table)
+    def all_tournaments(self) -> Iterator[Dict[str, Any]]:
+        # the tournaments are printed as they are read, one at a time.
+        print("those are all the tournaments available in the database:")
+        for serialized_tournament in self.storage.all_tournaments():
+            print(serialized_tournament)
 
-        print(f"those are all the tournaments available in the database:\n"
-              f"{all_tournaments}")
-
-        return all_tournaments
+        # the result is read again only if it is consumed.
+        return self.storage.all_tournaments()
 
     def all_matches_in_a_tournament(self):
-        deserialized_tournament = self.deserialize_tournament()
+        all_matches_in_a_tournament = self.storage.matches_of_tournament(
+            self.which_tournament)
 
-        all_matches_in_a_tournament = []
-        for round in deserialized_tournament.rounds.values():
-            for match in round.matches.values():
-                all_matches_in_a_tournament.append(match)
         print(f"those are all the matches in the "
               f"selected tournament: {all_matches_in_a_tournament} ")
 
         return all_matches_in_a_tournament
 
     def all_rounds_in_a_tournament(self):
-        deserialized_tournament = self.deserialize_tournament()
-
-        all_rounds_in_a_tournament = []
-        for round in deserialized_tournament.rounds.values():
-            all_rounds_in_a_tournament.append(round)
+        all_rounds_in_a_tournament = self.storage.rounds_of_tournament(
+            self.which_tournament)
 
         print(f"those are all the rounds in the"
               f" selected tournament: {all_rounds_in_a_tournament} ")
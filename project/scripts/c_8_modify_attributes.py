@@ -9,6 +9,25 @@ from view import (override_tournament_description,
                   complete_override_player_ranking)
 
 
+def change_tournament_description(tournament: Tournament,
+                                  new_description: str):
+    """Gives the tournament a new description.
+
+    An empty string leaves the description unchanged. The new
+    description is journaled if the tournament is.
+
+    Args:
+        tournament: The tournament that is taking place.
+        new_description: the new description of the tournament.
+    """
+    if new_description == "":
+        pass
+    else:
+        tournament.description = new_description
+        if tournament.journal is not None:
+            tournament.journal.record_description(new_description)
+
+
 def request_tournament_new_description(tournament: Tournament):
     """Overrides the description of the tournament.
 
@@ -20,10 +39,56 @@ def request_tournament_new_description(tournament: Tournament):
         tournament: The tournament that is taking place.
     """
     new_description: str = override_tournament_description()
-    if new_description == "":
-        pass
-    else:
-        tournament.description = new_description
+    change_tournament_description(tournament, new_description)
+
+
+def find_player_index(tournament: Tournament, which_player: str) -> int:
+    """Returns the index of a player from his last name.
+
+    Raises:
+         ValueError: If which_player isn't in the tournament's list of
+            player last names.
+    """
+    list_of_player_names: List[str] = [
+        player.last_name
+        for player
+        in tournament.players_instances]
+
+    if which_player not in list_of_player_names:
+        raise ValueError("We didn't find the player in the DB. Please,"
+                         "check the spelling of the LAST name.")
+
+    return list_of_player_names.index(which_player)
+
+
+def change_player_ranking(tournament: Tournament, which_player: str,
+                          new_ranking: str):
+    """Gives a player a new ranking.
+
+    An empty player name leaves the rankings unchanged. The standings of
+    the tournament are updated accordingly, and the new ranking is
+    journaled if the tournament is.
+
+    Args:
+        tournament: The tournament that is taking place.
+        which_player: the last name of the player.
+        new_ranking: the new ranking, as entered by the user.
+
+    Raises:
+         ValueError: If which_player isn't in the tournament's list of
+            player last names.
+    """
+    if which_player == "":
+        return
+
+    player_instances = tournament.players_instances
+    player_index = find_player_index(tournament, which_player)
+    new_ranking: int = int(new_ranking)
+    player_instances[player_index].ranking = new_ranking
+    if tournament.standings is not None:
+        tournament.standings.update(player_instances[player_index])
+    if tournament.journal is not None:
+        tournament.journal.record_ranking(which_player, new_ranking)
 
 
 def request_player_new_ranking(tournament: Tournament):
@@ -46,21 +111,11 @@ def request_player_new_ranking(tournament: Tournament):
             override_player_ranking() function
             isn't in the tournament's list of player last names.
     """
-    player_instances = tournament.players_instances
     which_player: str = override_player_ranking()
     if which_player == "":
         pass
     else:
-        list_of_player_names: List[str] = [
-            player.last_name
-            for player
-            in player_instances]
-
-        if which_player in list_of_player_names:
-            new_ranking: str = complete_override_player_ranking()
-            new_ranking: int = int(new_ranking)
-            player_index = list_of_player_names.index(which_player)
-            player_instances[player_index].ranking = new_ranking
-        else:
-            raise ValueError("We didn't find the player in the DB. Please,"
-                             "check the spelling of the LAST name.")
+        # checking the name before asking the user for the new ranking.
+        find_player_index(tournament, which_player)
+        new_ranking: str = complete_override_player_ranking()
+        change_player_ranking(tournament, which_player, new_ranking)
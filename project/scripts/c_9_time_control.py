@@ -2,14 +2,92 @@
 
 Moreover, it updates the subsequent rounds' start_datetime and end_datetime
 attributes.
+
+The time is read from a clock. The real clock waits as long as the
+rounds last. The accelerated clock makes the time go by faster, and the
+virtual clock doesn't wait at all: it only moves its own time forward.
+The latter allows running whole tournaments in tests, simulations or
+replays without waiting.
 """
 
+import os
 import time
+from typing import Union
 
 from models import Tournament, Round
 
 
-def time_control(tournament: Tournament):
+class RealClock:
+    """Reads and waits the time of the computer."""
+    def now(self) -> float:
+        return time.time()
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+
+
+class AcceleratedClock:
+    """Makes the time go by faster than on the computer.
+
+    Attributes:
+        factor: how many times faster the time goes by. With a factor of
+            60, a 3 minutes bullet round lasts 3 seconds.
+        started_at: the time of the computer when the clock was created.
+            The accelerated time starts from it.
+    """
+    def __init__(self, factor: float):
+        if factor <= 0:
+            raise ValueError("the time can only be accelerated "
+                             "by a positive factor")
+        self.factor = factor
+        self.started_at = time.time()
+
+    def now(self) -> float:
+        return self.started_at + (time.time() - self.started_at) * self.factor
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds / self.factor)
+
+
+class VirtualClock:
+    """Keeps its own time, which only moves forward when sleeping.
+
+    Attributes:
+        current_time: the epoch time of the clock. By default, the time
+            of the computer when the clock was created.
+    """
+    def __init__(self, current_time: float = None):
+        if current_time is None:
+            current_time = time.time()
+        self.current_time = current_time
+
+    def now(self) -> float:
+        return self.current_time
+
+    def sleep(self, seconds: float):
+        self.current_time += seconds
+
+
+Clock = Union[RealClock, AcceleratedClock, VirtualClock]
+
+
+def clock_from_environment() -> Clock:
+    """Returns the clock chosen with the CHESS_TIME_FACTOR variable.
+
+    If the variable isn't set, the real clock is returned. If it is set
+    to 0, the virtual clock is returned: the rounds don't last at all.
+    Otherwise, the time is accelerated by the factor given. E.g. with
+    CHESS_TIME_FACTOR=60, a bullet round lasts 3 seconds.
+    """
+    factor = os.environ.get("CHESS_TIME_FACTOR", "")
+    if factor == "":
+        return RealClock()
+    if float(factor) == 0:
+        return VirtualClock()
+    return AcceleratedClock(float(factor))
+
+
+def time_control(tournament: Tournament, clock: Clock = None):
     """Simulates the duration of the rounds.
 
     Halt the flow of the program. The duration of the halt corresponds
@@ -19,26 +97,25 @@ def time_control(tournament: Tournament):
 
     Args:
         tournament: The tournament that is taking place.
+        clock: the clock waiting for the round to end. By default, the
+            real clock.
 
     Raises:
         ValueError: The time control entered by the user do not match
             any of the implemented time control.
     """
-    rd_duration = tournament.time_control
-
-    if rd_duration == "bullet" or rd_duration == "BULLET":
-        print("the round is taking place...")
-        return time.sleep(180)
-    elif rd_duration == "blitz" or rd_duration == "BLITZ":
-        print("the round is taking place...")
-        return time.sleep(300)
-    elif rd_duration == "rapid" or rd_duration == "RAPID":
-        print("the round is taking place...")
-        return time.sleep(12000)
-    else:
+    if clock is None:
+        clock = RealClock()
+
+    try:
+        rd_duration = tournament.round_duration()
+    except KeyError:
         raise ValueError("something went wrong with the instantiation of the "
                          "tournament, namely it's time-control attribute")
 
+    print("the round is taking place...")
+    return clock.sleep(rd_duration)
+
 
 def update_start_end_datetime_round(round_number: int, tournament: Tournament):
     """Corrects the start and end datetime of subsequent rounds.
@@ -63,19 +140,9 @@ def update_start_end_datetime_round(round_number: int, tournament: Tournament):
 
     s: float = tournament.rounds[f"Round {round_number - 1}"].start_datetime
     e: float = tournament.rounds[f"Round {round_number - 1}"].end_datetime
-    rd_duration = tournament.time_control
-
-    if rd_duration == "bullet" or rd_duration == "BULLET":
-        round.start_datetime = s + 180
-        round.end_datetime = e + 180
-    elif rd_duration == "blitz" or rd_duration == "BLITZ":
-        round.start_datetime = s + 300
-        round.end_datetime = e + 300
-    elif rd_duration == "rapid" or rd_duration == "RAPID":
-        round.start_datetime = s + 12000
-        round.end_datetime = e + 12000
-
-    # Updates the beautified version of the start and end datetime.
-    round.__post_init__()
+    rd_duration = tournament.round_duration()
+
+    round.start_datetime = s + rd_duration
+    round.end_datetime = e + rd_duration
 
     tournament.rounds[f"Round {round_number}"] = round
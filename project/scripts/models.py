@@ -3,16 +3,59 @@
 
 from __future__ import annotations
 
+import bisect
 import datetime
+import functools
 import json
 from dataclasses import dataclass
 from typing import List, Dict, Optional, Union, Tuple, Any
 
+# the duration of a round, in seconds, for each time control.
+ROUND_DURATIONS: Dict[str, int] = {"bullet": 180,
+                                   "blitz": 300,
+                                   "rapid": 12000}
+
+# the values accepted for the sex of a player.
+SEXES = ("men", "women", "other", "MEN", "WOMEN", "OTHER")
+# the results of a match, from the perspective of its first player.
+MATCH_RESULTS = ("W", "L", "D", "w", "l", "d")
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_date_string(date_string: str) -> datetime.date:
+    """Parses a date written yyyy/mm/dd or yyyy-mm-dd.
+
+    Many players share a date of birth, so the dates already parsed are
+    cached.
+
+    Raises:
+        ValueError: the date doesn't respect either format.
+    """
+    separator = "/" if "/" in date_string else "-"
+    parts = date_string.split(separator)
+    if len(parts) != 3 or not all(part.isdigit() for part in parts):
+        raise ValueError(f"the date {date_string!r} should respect the "
+                         f"format yyyy/mm/dd")
+    year, month, day = parts
+    return datetime.date(int(year), int(month), int(day))
+
+
+def parse_date(value: Union[str, datetime.date]) -> datetime.date:
+    """Returns the date, parsing it if it is a string."""
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return parse_date_string(value)
+
 
-@dataclass
 class Round:
     """Stores data of a specific round.
 
+    The class declares __slots__: its instances have no __dict__. The
+    human readable start and end datetime are computed when read
+    instead of being stored next to the epoch values.
+
     Attributes:
         name_field: the name of the round.
         tournament: the tournament in which the round takes place.
@@ -26,12 +69,32 @@ class Round:
             object, the value is converted to human readable time.
         matches: contains the Match instances representing all the
             matches that happened during the round.
+        plan: the pairing of the round. Computed once, before the round
+            takes place, then read by everything that needs the pairing.
     """
-    name_field: str
-    tournament: Tournament
-    start_datetime: float = 0
-    end_datetime: float = 0
-    matches: Optional[Dict[str, Match]] = None
+    __slots__ = ("name_field", "tournament", "start_datetime",
+                 "end_datetime", "matches", "plan")
+
+    def __init__(self, name_field, tournament, start_datetime=0,
+                 end_datetime=0, matches=None, plan=None):
+        self.name_field: str = name_field
+        self.tournament: Tournament = tournament
+        self.start_datetime: float = start_datetime
+        self.end_datetime: float = end_datetime
+        self.matches: Optional[Dict[str, Match]] = matches
+        self.plan: Optional[RoundPlan] = plan
+
+    @property
+    def start_datetime_beautified(self) -> datetime.datetime:
+        """start_datetime converted to user-friendly datetime."""
+        return datetime.datetime.fromtimestamp(
+            self.start_datetime).replace(microsecond=0)
+
+    @property
+    def end_datetime_beautified(self) -> datetime.datetime:
+        """end_datetime converted to user-friendly datetime."""
+        return datetime.datetime.fromtimestamp(
+            self.end_datetime).replace(microsecond=0)
 
     def serialize_matches(self) -> Union[str, Dict[str, Dict[str, str]]]:
         """converts the Match instances to a serializable format.
@@ -88,23 +151,46 @@ class Round:
     def __repr__(self):
         return self.__str__()
 
-    def __post_init__(self):
-        """converting start and end epoch time to user-friendly datetime.
-         """
-        self.start_datetime_beautified = datetime.datetime.fromtimestamp(
-            self.start_datetime).replace(microsecond=0)
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return ((self.name_field, self.tournament, self.start_datetime,
+                 self.end_datetime, self.matches, self.plan)
+                == (other.name_field, other.tournament, other.start_datetime,
+                    other.end_datetime, other.matches, other.plan))
 
-        self.end_datetime_beautified = datetime.datetime.fromtimestamp(
-            self.end_datetime).replace(microsecond=0)
+    # like a dataclass comparing its fields, a round is unhashable.
+    __hash__ = None
+
+
+@dataclass(frozen=True)
+class RoundPlan:
+    """Stores the pairing of a round.
+
+    The plan is frozen: once the pairing of a round is computed, the
+    announcement, the collection of the results and the instantiation
+    of the matches all read the same pairs.
+
+    Attributes:
+        round_name: the name of the round the plan was computed for.
+        pairs: the two opponents of each match, from the first match
+            to the last.
+    """
+    round_name: str
+    pairs: Tuple[Tuple[Player, Player], ...]
 
 
 class Player:
     """Stores data on a specific player.
 
+    The class declares __slots__: its instances have no __dict__, which
+    divides the memory taken by each player.
+
     Attributes:
         last_name: player's last name.
         first_name: player's fist name.
-        date_of_birth: player's date of birth.
+        date_of_birth: player's date of birth. Either written yyyy/mm/dd
+            or yyyy-mm-dd, or already a date.
         sex: player's sex.
         ranking: player's ranking. Unlike for the preceding
             attributes, the value of ranking will evolve
@@ -114,9 +200,15 @@ class Player:
             the player during the tournament.
         result_field: the number of points earned by the player
             during the tournament.
+        player_id: integer identifying the player inside the tournament.
+            Given when the players are registered, it never changes.
+            Unlike the last name, two players cannot share it.
     """
+    __slots__ = ("last_name", "first_name", "date_of_birth", "sex",
+                 "ranking", "opponents_faced", "result_field", "player_id")
+
     def __init__(self, last_name, first_name, date_of_birth, sex, ranking,
-                 opponents_faced=None, result_field=0):
+                 opponents_faced=None, result_field=0, player_id=None):
         self.last_name: str = last_name
         self.first_name: str = first_name
         self.date_of_birth: Union[datetime.date, str] = date_of_birth
@@ -124,6 +216,7 @@ class Player:
         self.ranking: int = ranking
         self.opponents_faced: Optional[List[str]] = opponents_faced
         self.result_field: float = result_field
+        self.player_id: Optional[int] = player_id
         self.avoid_mutable_default_value_issue()
         self.correct_attributes_type()
         self.raise_error_for_incorrect_values()
@@ -137,22 +230,14 @@ class Player:
     def correct_attributes_type(self):
         self.ranking = int(self.ranking)
 
-        try:
-            date_in_datetime_type = \
-                datetime.datetime.strptime(self.date_of_birth, "%Y/%m/%d")
-        except ValueError:
-            date_in_datetime_type = \
-                datetime.datetime.strptime(self.date_of_birth, "%Y-%m-%d")
-        self.date_of_birth = date_in_datetime_type
-        self.date_of_birth = self.date_of_birth.date()
+        if self.player_id is not None:
+            self.player_id = int(self.player_id)
+
+        # the date can also be given already parsed, e.g. by a roster.
+        self.date_of_birth = parse_date(self.date_of_birth)
 
     def raise_error_for_incorrect_values(self):
-        if not (self.sex == "men"
-                or self.sex == "women"
-                or self.sex == "other"
-                or self.sex == "MEN"
-                or self.sex == "WOMEN"
-                or self.sex == "OTHER"):
+        if self.sex not in SEXES:
             raise ValueError("the sex of the player can be "
                              "either 'men' or 'women' or 'other'.")
 
@@ -168,6 +253,9 @@ class Player:
              "opponents_faced": json.dumps(self.opponents_faced),
              "result_field": str(self.result_field)}
 
+        if self.player_id is not None:
+            serialized_player["player_id"] = str(self.player_id)
+
         return serialized_player
 
     def __str__(self):
@@ -180,6 +268,137 @@ class Player:
         return self.__str__()
 
 
+class Standings:
+    """Keeps the players of a tournament sorted by points then ranking.
+
+    The order is the one used by the swiss-system algorithm: points in
+    decreasing order then, for players with an equal number of points,
+    ranking in ascending order. Instead of sorting all the players again
+    each time it is needed, the order is maintained in place. When a
+    player's result_field or ranking changes, update is called for that
+    player only: his position is found by bisection and he is moved to
+    his new place.
+
+    Finding the position takes O(log n). Moving the player is O(n): the
+    lists shift the players between his old and new place. The shift is
+    a single copy of pointers, which takes a few microseconds for 8192
+    players, where sorting all the players again takes milliseconds. A
+    truly logarithmic structure, e.g. a balanced tree, would be slower
+    in Python for the sizes of a tournament.
+
+    Attributes:
+        players: the players in standings order.
+        keys: the sort key of each player in players, same order.
+        key_of_player: the current sort key of each player, keyed by
+            the id of the player object.
+    """
+    def __init__(self, players: List[Player]):
+        self.key_of_player: Dict[int, Tuple[float, int, int]] = {}
+        self.registration_order: Dict[int, int] = {
+            id(player): i for i, player in enumerate(players)}
+        entries = sorted(
+            (self.sort_key(player), player) for player in players)
+        self.keys: List[Tuple[float, int, int]] = [
+            key for key, _ in entries]
+        self.players: List[Player] = [player for _, player in entries]
+        for key, player in entries:
+            self.key_of_player[id(player)] = key
+
+    def sort_key(self, player: Player) -> Tuple[float, int, int]:
+        # the registration order makes each key unique, so a player
+        # can always be found back by bisection.
+        return (-player.result_field, player.ranking,
+                self.registration_order[id(player)])
+
+    def position(self, player: Player) -> int:
+        """Returns the index of the player in the standings."""
+        return bisect.bisect_left(self.keys, self.key_of_player[id(player)])
+
+    def rank(self, player: Player) -> int:
+        """Returns the place of the player, starting at 1."""
+        return self.position(player) + 1
+
+    def update(self, player: Player):
+        """Moves a player whose result_field or ranking changed.
+
+        O(log n) to find the places, O(n) to shift the players between
+        them, see the class docstring.
+        """
+        old_position = self.position(player)
+        del self.keys[old_position]
+        del self.players[old_position]
+
+        new_key = self.sort_key(player)
+        new_position = bisect.bisect_left(self.keys, new_key)
+        self.keys.insert(new_position, new_key)
+        self.players.insert(new_position, player)
+        self.key_of_player[id(player)] = new_key
+
+    def refresh_rankings(self):
+        """Gives each player the ranking matching his place.
+
+        The order of the players is left unchanged: the new rankings
+        follow the standings order, so the keys stay sorted.
+        """
+        self.reorder(self.players)
+
+    def reorder(self, players: List[Player]):
+        """Puts the players in a new order, e.g. once their ties are broken.
+
+        The players must still be sorted by points in decreasing order.
+        Each player gets the ranking matching his new place, so the keys
+        stay sorted.
+        """
+        self.players = list(players)
+        for i, player in enumerate(self.players):
+            player.ranking = i + 1
+            key = (-player.result_field, player.ranking,
+                   self.registration_order[id(player)])
+            self.keys[i] = key
+            self.key_of_player[id(player)] = key
+
+    def ranked_players(self) -> List[Player]:
+        """Returns a copy of the players in standings order."""
+        return list(self.players)
+
+
+class OpponentMatrix:
+    """Records which players of a tournament already met.
+
+    The players are identified by their player_id, from 0 to
+    players_number - 1. Each unordered pair of players is given one bit
+    of a bytearray: the bit is set once the two players met. Only the
+    upper triangle of the matrix is stored since meeting is symmetric.
+    For 1000 players, the whole matrix holds in about 62 KB.
+
+    Attributes:
+        players_number: the number of players in the tournament.
+        bits: the bits of the upper triangle, row after row.
+    """
+    def __init__(self, players_number: int):
+        self.players_number = players_number
+        pairs_number = players_number * (players_number - 1) // 2
+        self.bits = bytearray((pairs_number + 7) // 8)
+
+    def bit_index(self, player_id1: int, player_id2: int) -> int:
+        if player_id1 > player_id2:
+            player_id1, player_id2 = player_id2, player_id1
+        if player_id1 == player_id2 or not (
+                0 <= player_id1 and player_id2 < self.players_number):
+            raise IndexError("the player ids must be distinct and "
+                             "belong to the tournament")
+        row_start = player_id1 * (2 * self.players_number - player_id1 - 1)
+        return row_start // 2 + player_id2 - player_id1 - 1
+
+    def record_match(self, player_id1: int, player_id2: int):
+        index = self.bit_index(player_id1, player_id2)
+        self.bits[index >> 3] |= 1 << (index & 7)
+
+    def have_met(self, player_id1: int, player_id2: int) -> bool:
+        index = self.bit_index(player_id1, player_id2)
+        return bool(self.bits[index >> 3] & (1 << (index & 7)))
+
+
 @dataclass
 class Tournament:
     """Stores all the data about the tournament.
@@ -196,6 +415,15 @@ class Tournament:
          rounds: store all the Round instances that took place in the
             tournament. Those instances store match instances.
         player_instances: stores player instances.
+        standings: the players sorted by points then ranking. Updated
+            after each match result.
+        opponent_matrix: which players already met, by player_id.
+        journal: where the results and overrides are journaled as soon
+            as they are accepted, see c_19_journal.py. None if they
+            aren't.
+        pairing: pairs the rounds after the first, called like
+            pair_players_for_subsequent_round, e.g. the OptimalPairing
+            of c_25_optimal_pairing.py. None for the greedy pairing.
     """
     name: str
     venue: str
@@ -206,16 +434,13 @@ class Tournament:
     number_of_rounds: int = 4
     rounds: Dict[str, Round] = None
     players_instances: List[Player] = None
+    standings: Optional[Standings] = None
+    opponent_matrix: Optional[OpponentMatrix] = None
+    journal: Optional[Any] = None
+    pairing: Optional[Any] = None
 
     def correct_attributes_type(self):
-        try:
-            date_in_datetime_type = datetime.datetime.strptime(
-                self.date, "%Y/%m/%d")
-        except ValueError:
-            date_in_datetime_type = datetime.datetime.strptime(
-                self.date, "%Y-%m-%d")
-        self.date = date_in_datetime_type
-        self.date = self.date.date()
+        self.date = parse_date(self.date)
 
         self.players_number = int(self.players_number)
 
@@ -241,6 +466,14 @@ class Tournament:
                              " there shouldn't be more "
                              "rounds than players.")
 
+    def round_duration(self) -> int:
+        """Returns the duration of a round in seconds.
+
+        The duration depends on the time control of the tournament and
+        is read from ROUND_DURATIONS.
+        """
+        return ROUND_DURATIONS[self.time_control.lower()]
+
     def serialize_rounds(
         self
     ) -> Dict[str, Dict[str, Union[str, Dict[str, Dict[str, str]]]]]:
@@ -295,7 +528,11 @@ class Match:
     "D") needs to be understood from the perspective of player1.
     The last attribute is the instance in which the matches are
     stored.
+
+    None of the fields has a default value, so the dataclass can
+    declare __slots__ and its instances have no __dict__.
     """
+    __slots__ = ("player1", "player2", "result", "round")
 
     player1: Player
     player2: Player
@@ -336,4 +573,10 @@ class Match:
                             "result": self.result,
                             "round": self.round.name_field}
 
+        # the ids tell apart two players sharing the same last name.
+        if (self.player1.player_id is not None
+                and self.player2.player_id is not None):
+            serialized_match["player1_id"] = str(self.player1.player_id)
+            serialized_match["player2_id"] = str(self.player2.player_id)
+
         return serialized_match
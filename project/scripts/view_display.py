@@ -11,9 +11,15 @@ def display_first_round_matches(tournament):
     announce_pairing_for_first_round(tournament)
 
 
-def display_subsequent_round_matches(tournament):
-    announce_pairing_for_subsequent_round(tournament)
+def display_subsequent_round_matches(tournament, round_number):
+    announce_pairing_for_subsequent_round(tournament, round_number)
 
 
-def display_ranking(tournament):
-    announce_ranking(tournament)
+def display_ranking(tournament, tiebreaks=False):
+    announce_ranking(tournament, tiebreaks)
+
+
+def display_ratings(rated_players):
+    # NumPy is only imported when the ratings are asked for.
+    from c_24_ratings import announce_ratings
+    announce_ratings(rated_players)
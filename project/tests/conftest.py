@@ -0,0 +1,12 @@
+"""Makes the modules of the scripts folder importable from the tests.
+
+The scripts folder is not a package: its modules import each other by
+their file name.
+"""
+
+import os
+import sys
+
+SCRIPTS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              os.pardir, "scripts")
+sys.path.insert(0, os.path.normpath(SCRIPTS_FOLDER))
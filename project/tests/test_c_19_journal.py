@@ -0,0 +1,95 @@
+"""Tests the recovery of a tournament interrupted during a round."""
+
+import random
+
+import pytest
+
+from c_2_pairing_subsequent_rounds import pair_players_for_subsequent_round
+from c_11_engine import TournamentEngine
+from c_19_journal import MatchJournal, recover_tournament
+from c_25_optimal_pairing import OptimalPairing
+from models import Tournament
+
+PLAYERS_NUMBER = 8
+# with this seed, the optimal and greedy pairings of round 3 differ.
+SEED = 5
+
+
+def pairs_by_id(pairs):
+    return [(player1.player_id, player2.player_id)
+            for player1, player2 in pairs]
+
+
+@pytest.fixture
+def interrupted_round(tmp_path, monkeypatch):
+    """Plays an optimal-paired tournament up to the middle of round 3.
+
+    Returns: the optimal pairs of round 3 by player_id, and the two
+        results journaled before the crash.
+    """
+    monkeypatch.chdir(tmp_path)
+    rng = random.Random(SEED)
+    tournament = Tournament("cheese", "paris", "2021/05/01",
+                            PLAYERS_NUMBER, "desc", "bullet", 4)
+    tournament.journal = MatchJournal(tournament.name)
+    tournament.pairing = OptimalPairing()
+    engine = TournamentEngine(tournament)
+    engine.register_players([(f"Name{i}", "F", "1990/01/02", "men",
+                              str(i + 1))
+                             for i in range(PLAYERS_NUMBER)])
+    for _ in range(2):
+        engine.record_results([rng.choice("WLD")
+                               for _ in engine.pairing().pairs])
+
+    optimal_pairs = pairs_by_id(engine.pairing().pairs)
+    greedy_pairs = pairs_by_id(pair_players_for_subsequent_round(
+        tournament.players_instances, tournament.standings,
+        tournament.opponent_matrix))
+    assert optimal_pairs != greedy_pairs
+
+    # two results are entered, then the program stops.
+    results = ["W", "D"]
+    tournament.journal.record_results(3, 0, results)
+    tournament.journal.close()
+    return optimal_pairs, results
+
+
+def test_recovery_keeps_the_journaled_pairs(interrupted_round):
+    optimal_pairs, results = interrupted_round
+
+    # the pairing isn't given: the round would be paired greedily.
+    engine, known_results = recover_tournament("cheese")
+    assert engine.round_number == 3
+    assert known_results == results
+    assert pairs_by_id(engine.pairing().pairs) == optimal_pairs
+
+    matches = engine.record_results(known_results + ["L", "W"])
+    assert [(match.player1.player_id, match.player2.player_id)
+            for match in matches.values()] == optimal_pairs
+    assert [match.result for match in matches.values()] == (
+        results + ["L", "W"])
+    engine.tournament.journal.close()
+
+
+def test_recovery_pairs_with_the_pairing_given(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    tournament = Tournament("cheese", "paris", "2021/05/01",
+                            PLAYERS_NUMBER, "desc", "bullet", 4)
+    tournament.journal = MatchJournal(tournament.name)
+    engine = TournamentEngine(tournament)
+    engine.register_players([(f"Name{i}", "F", "1990/01/02", "men",
+                              str(i + 1))
+                             for i in range(PLAYERS_NUMBER)])
+    engine.record_results(["W", "L", "D", "W"])
+    # the program stops before round 2 is paired.
+    tournament.journal.close()
+
+    pairing = OptimalPairing()
+    engine, known_results = recover_tournament("cheese", pairing=pairing)
+    assert known_results == []
+    assert engine.tournament.pairing is pairing
+    recovered = engine.tournament
+    assert pairs_by_id(engine.pairing().pairs) == pairs_by_id(pairing(
+        recovered.players_instances, recovered.standings,
+        recovered.opponent_matrix))
+    engine.tournament.journal.close()
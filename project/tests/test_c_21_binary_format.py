@@ -0,0 +1,192 @@
+"""Tests that tournaments survive the binary format unchanged."""
+
+import random
+import struct
+
+import pytest
+
+import c_21_binary_format
+from c_11_engine import TournamentEngine
+from c_21_binary_format import (FORMAT_VERSION, HEADER, MAGIC, READERS,
+                                dump_tournament, load_tournament_binary,
+                                read_archive, write_archive)
+from models import Tournament
+
+# a tournament of two players and one drawn round, as written by the
+# first version of the format. It must stay readable.
+VERSION_1_FILE = bytes.fromhex(
+    "4348544201000c000000030063757004006c796f6e0100640500626c69747a0600"
+    "506f6c676172030054616c07004d696b6861696c03006d656e05004a7564697405"
+    "00776f6d656e0700526f756e642031010044000000000100000077420b00020000"
+    "0002000000030000000100020000000500000006000000f1c90a00070000000100"
+    "00000000003f00000000010004000000040000000800000096020b000900000002"
+    "0000000000003f01000000010005000000010000000a00000000000040cf23d841"
+    "000000c4d223d841010100000000000000010000000b000000")
+
+
+def make_tournament(players_info, number_of_rounds=3, name="cheese",
+                    played_rounds=None):
+    """Returns a tournament whose rounds were played with random results.
+
+    Args:
+        played_rounds: the number of rounds played, all by default.
+    """
+    tournament = Tournament(name, "paris", "2021/05/01", len(players_info),
+                            "desc", "bullet", number_of_rounds)
+    engine = TournamentEngine(tournament)
+    engine.register_players(players_info)
+    rng = random.Random(0)
+    if played_rounds is None:
+        played_rounds = number_of_rounds
+    for _ in range(played_rounds):
+        engine.record_results([rng.choice("WLD")
+                               for _ in engine.pairing().pairs])
+    return tournament
+
+
+def players_info(players_number):
+    return [(f"Name{i}", "First", "1990/01/02", "men", str(i + 1))
+            for i in range(players_number)]
+
+
+def summary(tournament):
+    """Returns the data of the tournament that the format must keep."""
+    rounds = {}
+    for round_name, round in (tournament.rounds or {}).items():
+        matches = None
+        if round.matches is not None:
+            matches = [(match.player1.player_id, match.player2.player_id,
+                        match.result) for match in round.matches.values()]
+        rounds[round_name] = (round.start_datetime, round.end_datetime,
+                              matches)
+    return {"tournament": (tournament.name, tournament.venue,
+                           tournament.date, tournament.players_number,
+                           tournament.description, tournament.time_control,
+                           tournament.number_of_rounds),
+            # the points are read back as a float, as from db.json.
+            "players": [(player.last_name, player.first_name,
+                         player.date_of_birth, player.sex, player.ranking,
+                         list(player.opponents_faced),
+                         float(player.result_field), player.player_id)
+                        for player in tournament.players_instances or []],
+            "rounds": rounds}
+
+
+def test_full_tournament_round_trip():
+    tournament = make_tournament(players_info(8))
+    read_back = load_tournament_binary(dump_tournament(tournament))
+    assert summary(read_back) == summary(tournament)
+
+    # the matches hold the players of the tournament read back.
+    players = read_back.players_instances
+    for round in read_back.rounds.values():
+        for match in round.matches.values():
+            assert match.player1 is players[match.player1.player_id]
+            assert match.player2 is players[match.player2.player_id]
+        assert round.plan.pairs == tuple(
+            (match.player1, match.player2)
+            for match in round.matches.values())
+    for player_id1 in range(8):
+        for player_id2 in range(player_id1 + 1, 8):
+            assert read_back.opponent_matrix.have_met(
+                player_id1, player_id2) == (
+                tournament.opponent_matrix.have_met(player_id1, player_id2))
+
+
+def test_archive_file_round_trip(tmp_path):
+    tournament = make_tournament(players_info(4), number_of_rounds=2)
+    path = str(tmp_path / "cheese.chtb")
+    write_archive(tournament, path)
+    assert summary(read_archive(path)) == summary(tournament)
+
+
+def test_rounds_not_played_round_trip():
+    tournament = make_tournament(players_info(4), played_rounds=0)
+    read_back = load_tournament_binary(dump_tournament(tournament))
+    assert summary(read_back) == summary(tournament)
+    assert all(round.matches is None for round in read_back.rounds.values())
+
+
+def test_tournament_without_players_or_rounds_round_trip():
+    tournament = Tournament("empty", "paris", "2021/05/01", 0, "", "blitz",
+                            0)
+    read_back = load_tournament_binary(dump_tournament(tournament))
+    assert summary(read_back) == summary(tournament)
+    assert read_back.players_instances == []
+    assert read_back.rounds == {}
+
+
+def test_unicode_strings_round_trip():
+    info = [("Nepomniachtchi", "Ian", "1990/07/14", "men", "1"),
+            ("Ju", "Wenjun", "1991/01/31", "women", "2"),
+            ("Müller", "Zoë", "1985/03/03", "women", "3"),
+            ("Ясевич", "Łukasz", "1979/12/12", "men", "4")]
+    tournament = make_tournament(info, number_of_rounds=2,
+                                 name="Coupe d'Été ♔ 国际象棋")
+    tournament.description = "première ronde à 9h — 🏆"
+    read_back = load_tournament_binary(dump_tournament(tournament))
+    assert summary(read_back) == summary(tournament)
+    assert read_back.name == "Coupe d'Été ♔ 国际象棋"
+
+
+def test_version_1_file_is_read():
+    assert VERSION_1_FILE[:4] == MAGIC
+    assert HEADER.unpack_from(VERSION_1_FILE, 0)[1] == 1
+
+    tournament = load_tournament_binary(VERSION_1_FILE)
+    assert (tournament.name, tournament.venue, str(tournament.date)) == (
+        "cup", "lyon", "2021-05-01")
+    assert [player.serialize_player()
+            for player in tournament.players_instances] == [
+        {"last_name": "Tal", "first_name": "Mikhail",
+         "date_of_birth": "1936-11-09", "sex": "men", "ranking": "1",
+         "opponents_faced": '["Polgar"]', "result_field": "0.5",
+         "player_id": "0"},
+        {"last_name": "Polgar", "first_name": "Judit",
+         "date_of_birth": "1976-07-23", "sex": "women", "ranking": "2",
+         "opponents_faced": '["Tal"]', "result_field": "0.5",
+         "player_id": "1"}]
+    first_round = tournament.rounds["Round 1"]
+    assert (first_round.start_datetime, first_round.end_datetime) == (
+        1620000000.0, 1620003600.0)
+    assert [(match.player1.last_name, match.player2.last_name,
+             match.result)
+            for match in first_round.matches.values()] == [
+        ("Tal", "Polgar", "D")]
+
+
+def test_version_is_read_by_its_reader(monkeypatch):
+    calls = []
+
+    def read_version_2(data, offset):
+        calls.append(offset)
+        return "version 2"
+
+    monkeypatch.setitem(READERS, 2, read_version_2)
+    data = HEADER.pack(MAGIC, 2) + b"rest of the file"
+    assert load_tournament_binary(data) == "version 2"
+    assert calls == [HEADER.size]
+
+
+def test_current_version_is_written():
+    data = dump_tournament(make_tournament(players_info(2), 1))
+    assert HEADER.unpack_from(data, 0) == (MAGIC, FORMAT_VERSION)
+    assert READERS[FORMAT_VERSION] is c_21_binary_format.read_version_1
+
+
+@pytest.mark.parametrize("data", [
+    b"",
+    b"CHT",
+    b"JSON" + VERSION_1_FILE[4:],
+    b'{"cheese": {}}',
+])
+def test_bad_magic_is_rejected(data):
+    with pytest.raises(ValueError, match="isn't a tournament"):
+        load_tournament_binary(data)
+
+
+def test_unknown_version_is_rejected():
+    data = struct.pack("<4sH", MAGIC, FORMAT_VERSION + 1) + VERSION_1_FILE[
+        HEADER.size:]
+    with pytest.raises(ValueError, match="isn't supported"):
+        load_tournament_binary(data)